@@ -20,7 +20,8 @@ import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 import spacy
-from textstat import flesch_reading_ease
+from readability import compute_readability
+from json_codec import dumpb, PRETTY_JSON
 from typing import List, Dict, Any
 from datetime import datetime
 import os
@@ -115,29 +116,6 @@ def extract_keywords(text: str, num_keywords: int = 10) -> List[str]:
     return [word for word, _ in Counter(words).most_common(num_keywords)]
 
 
-def calculate_readability_score(text: str) -> float:
-    if not text or not isinstance(text, str):
-        return 0.0
-
-    text = re.sub(r"<[^>]+>", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    text = re.sub(r"[^a-zA-Z0-9\s.!?]", "", text)
-
-    if not re.search(r"[.!?]", text):
-        text += "."
-
-    sentences = re.split(r"[.!?]+", text)
-    sentences = [s.strip() for s in sentences if len(s.split()) > 2]
-
-    if not sentences:
-        return 0.0
-
-    text = ". ".join(sentences)
-    score = flesch_reading_ease(text)
-
-    return max(0, min(score, 100))
-
-
 def calculate_word_count(text: str) -> int:
     if not text or not isinstance(text, str):
         return 0
@@ -242,7 +220,8 @@ def WebScraperFunction(req: func.HttpRequest) -> func.HttpResponse:
         nav_text = clean_text(nav.get_text()) if nav else ""
 
         main_content = soup.find("main") or soup.find("body")
-        main_text = clean_text(main_content.get_text()) if main_content else ""
+        raw_main_text = main_content.get_text() if main_content else ""
+        main_text = clean_text(raw_main_text)
 
         footer = soup.find("footer")
         footer_text = clean_text(footer.get_text()) if footer else ""
@@ -284,7 +263,9 @@ def WebScraperFunction(req: func.HttpRequest) -> func.HttpResponse:
 
         word_count = calculate_word_count(main_text)
         keywords = extract_keywords(main_text)
-        readability_score = calculate_readability_score(main_text)
+        # clean_text strips sentence punctuation, so score the raw text
+        readability = compute_readability(raw_main_text)
+        readability_score = readability["flesch_reading_ease"]
         entities = extract_entities(main_text)
 
         links = []
@@ -307,6 +288,7 @@ def WebScraperFunction(req: func.HttpRequest) -> func.HttpResponse:
             "keywords": keywords,
             "links": links[:50],
             "readability_score": readability_score,
+            "readability": readability,
             "entities": entities,
             "structured_data": structured_data,
             "images": images,
@@ -315,8 +297,8 @@ def WebScraperFunction(req: func.HttpRequest) -> func.HttpResponse:
         output_dir = "output_json"
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"{generate_valid_id(url)}.json")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(webpage_data, f, ensure_ascii=False, indent=2)
+        with open(output_file, 'wb') as f:
+            f.write(dumpb(webpage_data, pretty=PRETTY_JSON))
         logging.info(f"Output JSON saved to {output_file}")
 
         
@@ -333,7 +315,7 @@ def WebScraperFunction(req: func.HttpRequest) -> func.HttpResponse:
             webpage_data["verification"] = "Failed"
 
         return func.HttpResponse(
-            json.dumps(webpage_data, indent=2, ensure_ascii=False),
+            dumpb(webpage_data, pretty=PRETTY_JSON),
             mimetype="application/json",
             status_code=200,
         )
@@ -0,0 +1,133 @@
+"""
+JSON Codec (json_codec.py)
+=========================
+
+Purpose:
+--------
+Single JSON encode/decode entry point for every persistence path (page
+output, shards, content store, URL queue, search results, Cosmos reads and
+the Function response). Uses the fastest installed backend and makes the
+compact-vs-pretty choice configurable in one place.
+
+Backends (first available wins):
+-------------------------------
+1. orjson   - fastest; native bytes output
+2. msgspec  - fast; pretty output via msgspec.json.format
+3. json     - stdlib fallback, always available
+
+Set KG_JSON_BACKEND=json|orjson|msgspec to force one.
+
+Configuration:
+-------------
+- KG_JSON_PRETTY=1 (default) pretty-prints human-facing files such as
+  per-page output and the queue file; set to 0 for compact output
+- Shards and other machine-only formats always ask for compact output
+
+Conventions:
+-----------
+- Output is UTF-8 with non-ASCII characters kept as-is
+  (the old ensure_ascii=False behaviour)
+- dumpb() returns bytes, dumps() returns str
+
+Usage:
+------
+from json_codec import dumpb, loads, PRETTY_JSON
+
+data = dumpb(record, pretty=PRETTY_JSON)
+record = loads(data)
+
+Note: A copy of this module lives in AzureFunction/; keep the two in sync.
+"""
+
+import io
+import os
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+PRETTY_JSON = os.getenv('KG_JSON_PRETTY', '1').lower() in ('1', 'true', 'yes')
+
+
+def _select_backend() -> str:
+    forced = os.getenv('KG_JSON_BACKEND')
+    available = {'orjson': orjson is not None, 'msgspec': msgspec is not None, 'json': True}
+    if forced:
+        if not available.get(forced):
+            raise ValueError(f"JSON backend '{forced}' is not installed")
+        return forced
+    return next(name for name in ('orjson', 'msgspec', 'json') if available[name])
+
+
+BACKEND = _select_backend()
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_sorted_encoder = msgspec.json.Encoder(order='sorted')
+    _msgspec_decoder = msgspec.json.Decoder()
+
+
+def dumpb(obj: Any, pretty: Optional[bool] = None, sort_keys: bool = False,
+          backend: Optional[str] = None) -> bytes:
+    """Encode obj as UTF-8 JSON bytes."""
+    pretty = PRETTY_JSON if pretty is None else pretty
+    backend = backend or BACKEND
+
+    if backend == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+
+    if backend == 'msgspec':
+        data = (_msgspec_sorted_encoder if sort_keys else _msgspec_encoder).encode(obj)
+        return msgspec.json.format(data, indent=2) if pretty else data
+
+    if pretty:
+        text = json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=sort_keys)
+    return text.encode('utf-8')
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None, sort_keys: bool = False) -> str:
+    """Encode obj as a JSON string."""
+    return dumpb(obj, pretty, sort_keys).decode('utf-8')
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str], backend: Optional[str] = None) -> Any:
+    """Decode JSON from bytes or str."""
+    backend = backend or BACKEND
+    if backend == 'orjson':
+        return orjson.loads(data)
+    if backend == 'msgspec':
+        return _msgspec_decoder.decode(data.encode('utf-8') if isinstance(data, str) else data)
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def load(f) -> Any:
+    """Decode JSON from an open file (text or binary)."""
+    return loads(f.read())
+
+
+def dump(obj: Any, f, pretty: Optional[bool] = None):
+    """Encode obj into an open file (text or binary)."""
+    data = dumpb(obj, pretty)
+    if isinstance(f, io.TextIOBase):
+        f.write(data.decode('utf-8'))
+    else:
+        f.write(data)
+
+
+# Catch these around loads(); msgspec's DecodeError is not a ValueError
+DECODE_ERRORS = (ValueError,) + ((msgspec.DecodeError,) if msgspec is not None else ())
@@ -0,0 +1,116 @@
+"""
+Compression Report (compression_report.py)
+=========================================
+
+Purpose:
+--------
+Compares output size and throughput for each compression codec and level on
+the real scraped corpus, to pick KG_OUTPUT_COMPRESSION for production.
+
+Measured per codec/level:
+------------------------
+- Total compressed size and ratio vs compact JSON
+- Compression and decompression throughput (MB/s of uncompressed JSON)
+- Both framing modes: one frame per record (what shards use, keeps random
+  access) and one stream per corpus (upper bound on ratio)
+
+Corpus:
+-------
+Every record readable by iter_output_records() in the input directory
+(JSON files and JSONL shards); falls back to the sample page in
+docs/json_output_size_test.txt.
+
+Usage:
+------
+python benchmarks/compression_report.py [input_dir]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from shard_writer import iter_output_records
+from compression import compress_frame, decompress_frame, zstandard
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT_DIR = os.path.join(BASE_DIR, '..', 'output_json')
+SAMPLE_FILE = os.path.join(BASE_DIR, '..', '..', 'docs', 'json_output_size_test.txt')
+
+LEVELS = {
+    'gzip': [1, 6, 9],
+    'zstd': [1, 3, 9, 19]
+}
+
+
+def load_corpus(input_dir: str) -> list:
+    """Compact JSON bytes for every record in the corpus."""
+    records = [
+        json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        for _, record in iter_output_records(input_dir) if record
+    ]
+    if records:
+        return records
+
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        sample = f.read()
+    match = re.search(r'\{.*\}', sample, re.S)
+    try:
+        record = json.loads(match.group(0))
+    except (AttributeError, ValueError):
+        record = {'content': sample}
+    return [json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n']
+
+
+def measure(records: list, codec: str, level: int) -> dict:
+    raw_bytes = sum(len(r) for r in records)
+
+    start = time.perf_counter()
+    frames = [compress_frame(r, codec, level) for r in records]
+    compress_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        decompress_frame(frame, codec)
+    decompress_seconds = time.perf_counter() - start
+
+    stream = compress_frame(b''.join(records), codec, level)
+    framed_bytes = sum(len(f) for f in frames)
+    return {
+        'codec': codec,
+        'level': level,
+        'framed_bytes': framed_bytes,
+        'framed_ratio': raw_bytes / framed_bytes,
+        'stream_bytes': len(stream),
+        'stream_ratio': raw_bytes / len(stream),
+        'compress_mb_s': raw_bytes / compress_seconds / 1e6 if compress_seconds else 0.0,
+        'decompress_mb_s': raw_bytes / decompress_seconds / 1e6 if decompress_seconds else 0.0
+    }
+
+
+def main():
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_INPUT_DIR
+    records = load_corpus(input_dir)
+    raw_bytes = sum(len(r) for r in records)
+    print(f"Corpus: {len(records)} records, {raw_bytes / 1e6:.2f} MB compact JSON")
+    print("=" * 86)
+    print(f"{'codec':<6}{'level':>6}{'framed MB':>12}{'ratio':>8}{'stream MB':>12}{'ratio':>8}"
+          f"{'comp MB/s':>12}{'decomp MB/s':>14}")
+    print("-" * 86)
+
+    for codec, levels in LEVELS.items():
+        if codec == 'zstd' and zstandard is None:
+            print("zstd    (skipped: 'zstandard' package not installed)")
+            continue
+        for level in levels:
+            r = measure(records, codec, level)
+            print(f"{r['codec']:<6}{r['level']:>6}{r['framed_bytes'] / 1e6:>12.3f}{r['framed_ratio']:>8.2f}"
+                  f"{r['stream_bytes'] / 1e6:>12.3f}{r['stream_ratio']:>8.2f}"
+                  f"{r['compress_mb_s']:>12.1f}{r['decompress_mb_s']:>14.1f}")
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
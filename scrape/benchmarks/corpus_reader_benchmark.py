@@ -0,0 +1,87 @@
+"""
+Corpus Reader Benchmark (corpus_reader_benchmark.py)
+===================================================
+
+Purpose:
+--------
+Compares scanning JSONL shards with the streaming full-decode reader
+(iter_shard_records) against the memory-mapped CorpusReader, with and
+without field projection, and times random access by ID.
+
+Reports wall time and peak Python heap (tracemalloc) per scan. Without an
+existing shard corpus, a synthetic one is built from the docs sample
+record in a temporary directory.
+
+Usage:
+------
+python benchmarks/corpus_reader_benchmark.py [input_dir] [records]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from shard_writer import ShardedJSONLWriter, iter_shard_records, list_shards
+from corpus_reader import CorpusReader, msgspec
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT_DIR = os.path.join(BASE_DIR, '..', 'output_json')
+SAMPLE_FILE = os.path.join(BASE_DIR, '..', '..', 'docs', 'json_output_size_test.txt')
+FIELDS = ['id', 'url', 'word_count']
+
+
+def build_corpus(count: int) -> str:
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        sample = json.loads(re.search(r'\{.*\}', f.read(), re.S).group(0))
+    output_dir = tempfile.mkdtemp(prefix='corpus-bench-')
+    writer = ShardedJSONLWriter(output_dir)
+    for i in range(count):
+        writer.write(dict(sample, id=f"page-{i}_20241022_162715", url=f"https://example.com/{i}"))
+    writer.close()
+    return output_dir
+
+
+def measure(label: str, scan):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = sum(1 for _ in scan())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<36}{count:>10}{elapsed:>12.3f}{peak / 1024:>14.1f}")
+
+
+def main():
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_INPUT_DIR
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    if not list_shards(input_dir):
+        print(f"No shards in {input_dir}; building {records} synthetic records")
+        input_dir = build_corpus(records)
+
+    print(f"Projection backend: {'msgspec Struct' if msgspec else 'full decode + project'}")
+    print("=" * 72)
+    print(f"{'scan':<36}{'records':>10}{'seconds':>12}{'peak KiB':>14}")
+    print("-" * 72)
+    measure("iter_shard_records (full)", lambda: iter_shard_records(input_dir))
+    with CorpusReader(input_dir) as corpus:
+        measure("CorpusReader (full)", lambda: corpus.iter_records())
+        measure(f"CorpusReader ({', '.join(FIELDS)})", lambda: corpus.iter_records(fields=FIELDS))
+
+        ids = random.sample(corpus.ids(), min(1000, len(corpus)))
+        start = time.perf_counter()
+        for record_id in ids:
+            corpus.get(record_id, fields=FIELDS)
+        per_lookup = (time.perf_counter() - start) / max(len(ids), 1) * 1e6
+    print("-" * 72)
+    print(f"Random access: {per_lookup:.1f} microseconds per get() over {len(ids)} IDs")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
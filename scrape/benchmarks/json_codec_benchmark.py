@@ -0,0 +1,102 @@
+"""
+JSON Codec Benchmark (json_codec_benchmark.py)
+=============================================
+
+Purpose:
+--------
+Times encode (pretty and compact) and decode for every installed JSON
+backend on the document shapes this project actually persists.
+
+Shapes:
+-------
+- page:    one scraped page record (first corpus record, or the docs sample)
+- queue:   queue-list.json with 10,000 URL entries
+- search:  one search_*.json result file with 20 URLs
+
+Usage:
+------
+python benchmarks/json_codec_benchmark.py [input_dir] [repeat]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from json_codec import dumpb, loads, orjson, msgspec
+from shard_writer import iter_output_records
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INPUT_DIR = os.path.join(BASE_DIR, '..', 'output_json')
+SAMPLE_FILE = os.path.join(BASE_DIR, '..', '..', 'docs', 'json_output_size_test.txt')
+
+
+def sample_page(input_dir: str) -> dict:
+    for _, record in iter_output_records(input_dir):
+        if record:
+            return record
+    with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+        match = re.search(r'\{.*\}', f.read(), re.S)
+    return json.loads(match.group(0))
+
+
+def sample_queue(size: int = 10000) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "queue_metadata": {"last_updated": now, "total_urls": size, "pending": size,
+                           "processing": 0, "completed": 0},
+        "urls": [
+            {"url": f"https://example{i % 500}.com/articles/{i}/some-article-slug",
+             "priority_score": 1.0 + (i % 10) / 10, "source_search": "artificial",
+             "discovery_date": now, "status": "pending"}
+            for i in range(size)
+        ]
+    }
+
+
+def sample_search(count: int = 20) -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "search_metadata": {"timestamp": now, "query": "machine learning algorithms", "total_results": count},
+        "urls": [
+            {"url": f"https://site{i}.org/ml/{i}", "title": f"Result {i}",
+             "description": "A detailed snippet about machine learning algorithms " * 3,
+             "priority_score": 1.21, "discovery_date": now, "domain": f"site{i}.org", "status": "pending"}
+            for i in range(count)
+        ]
+    }
+
+
+def timed(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6  # microseconds per call
+
+
+def main():
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_INPUT_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    backends = ['json'] + [name for name, module in (('orjson', orjson), ('msgspec', msgspec)) if module]
+    shapes = {'page': sample_page(input_dir), 'queue': sample_queue(), 'search': sample_search()}
+
+    print(f"Backends: {', '.join(backends)}   (microseconds per call, {repeat} repeats)")
+    print("=" * 78)
+    print(f"{'shape':<8}{'backend':<10}{'bytes':>10}{'pretty enc':>14}{'compact enc':>14}{'decode':>12}")
+    print("-" * 78)
+    for shape, obj in shapes.items():
+        for backend in backends:
+            compact = dumpb(obj, pretty=False, backend=backend)
+            pretty_us = timed(lambda: dumpb(obj, pretty=True, backend=backend), repeat)
+            compact_us = timed(lambda: dumpb(obj, pretty=False, backend=backend), repeat)
+            decode_us = timed(lambda: loads(compact, backend=backend), repeat)
+            print(f"{shape:<8}{backend:<10}{len(compact):>10}{pretty_us:>14.1f}{compact_us:>14.1f}{decode_us:>12.1f}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
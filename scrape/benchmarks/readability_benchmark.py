@@ -0,0 +1,110 @@
+"""
+Readability Benchmark (readability_benchmark.py)
+===============================================
+
+Purpose:
+--------
+Compares the single-pass readability engine (readability.py) against the
+Azure Function's previous approach (regex clean-up + textstat) on real
+scraped content.
+
+Corpus:
+-------
+- Uses the 'content' field of every JSON file in ../output_json when present
+- Falls back to the sample page in docs/json_output_size_test.txt
+
+Usage:
+------
+python benchmarks/readability_benchmark.py [corpus_dir] [repeat]
+
+textstat is optional; without it only the new engine is timed.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from readability import compute_readability_batch, count_syllables
+
+try:
+    from textstat import flesch_reading_ease
+except ImportError:
+    flesch_reading_ease = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS_DIR = os.path.join(BASE_DIR, '..', 'output_json')
+SAMPLE_FILE = os.path.join(BASE_DIR, '..', '..', 'docs', 'json_output_size_test.txt')
+
+
+def load_corpus(corpus_dir: str) -> list:
+    """Load content text from scraped JSON files, or the docs sample."""
+    texts = []
+    if os.path.isdir(corpus_dir):
+        for filename in os.listdir(corpus_dir):
+            if not filename.endswith('.json'):
+                continue
+            with open(os.path.join(corpus_dir, filename), 'r', encoding='utf-8') as f:
+                content = json.load(f).get('content', '')
+            if isinstance(content, str) and content:
+                texts.append(content)
+
+    if not texts:
+        with open(SAMPLE_FILE, 'r', encoding='utf-8') as f:
+            sample = f.read()
+        match = re.search(r'"body": "(.*?)",\n', sample, re.S)
+        texts.append(match.group(1) if match else sample)
+
+    return texts
+
+
+def legacy_readability(text: str) -> float:
+    """The Function's original calculate_readability_score."""
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    text = re.sub(r"[^a-zA-Z0-9\s.!?]", "", text)
+    if not re.search(r"[.!?]", text):
+        text += "."
+    sentences = re.split(r"[.!?]+", text)
+    sentences = [s.strip() for s in sentences if len(s.split()) > 2]
+    if not sentences:
+        return 0.0
+    return max(0, min(flesch_reading_ease(". ".join(sentences)), 100))
+
+
+def time_it(label: str, func, texts: list, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = func(texts)
+    elapsed = time.perf_counter() - start
+    total_chars = sum(len(t) for t in texts) * repeat
+    print(f"{label:<28} {elapsed:8.3f}s  {total_chars / elapsed / 1e6:8.2f} MB/s")
+    return results
+
+
+def main():
+    corpus_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CORPUS_DIR
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    texts = load_corpus(corpus_dir)
+    print(f"Corpus: {len(texts)} documents, {sum(len(t) for t in texts)} chars, x{repeat}")
+    print("=" * 56)
+
+    count_syllables.cache_clear()
+    new_results = time_it("readability (single pass)", compute_readability_batch, texts, repeat)
+
+    if flesch_reading_ease is None:
+        print("textstat not installed; skipping comparison")
+        return
+
+    old_results = time_it("regex + textstat", lambda ts: [legacy_readability(t) for t in ts], texts, repeat)
+
+    diffs = [abs(new['flesch_reading_ease'] - old) for new, old in zip(new_results, old_results)]
+    print("=" * 56)
+    print(f"Mean |Flesch difference| vs textstat: {sum(diffs) / len(diffs):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Paragraph Block Cache (block_cache.py)
+=====================================
+
+Purpose:
+--------
+Splits page content into paragraph blocks with stable content hashes and
+caches the NLP results (keyword counts and entities) per block. When an
+article is re-scraped after an in-place update, only new or changed blocks
+go through the NLP engine; page-level keywords and entities are rebuilt
+from the block results.
+
+Key Components:
+--------------
+1. Segmentation
+   - Paragraph text taken from the main content element, one block per
+     line of rendered text
+   - Very short lines (bylines, captions) merged into the following block
+   - Block hash = SHA-1 of the normalised block text
+
+2. Block Result Store (SQLite)
+   - blocks: (hash, language) -> keyword counts, entities
+   - pages: url -> block hashes of the last scrape
+
+3. Page Assembly
+   - Keyword counts summed across blocks, top-N taken
+   - Entities merged per label in block order, de-duplicated
+
+Usage:
+------
+store = BlockResultStore('output_json/block_cache.sqlite')
+blocks = segment_blocks(main_content)
+keywords, entities, stats = analyse_blocks(url, blocks, language, store,
+                                           count_keywords, extract_entities_batch)
+"""
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+MIN_BLOCK_CHARS = 80
+
+
+def hash_block(text: str) -> str:
+    """Stable hash for a normalised block of text."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def segment_blocks(element) -> List[Tuple[str, str]]:
+    """Split a BeautifulSoup element into (hash, text) paragraph blocks."""
+    if element is None:
+        return []
+
+    blocks = []
+    pending = ''
+    for line in element.get_text(separator='\n').split('\n'):
+        line = re.sub(r'\s+', ' ', line).strip()
+        if not line:
+            continue
+        pending = f"{pending} {line}" if pending else line
+        if len(pending) >= MIN_BLOCK_CHARS:
+            blocks.append((hash_block(pending), pending))
+            pending = ''
+    if pending:
+        blocks.append((hash_block(pending), pending))
+    return blocks
+
+
+class BlockResultStore:
+    """SQLite cache of per-block NLP results keyed by block hash."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                hash TEXT NOT NULL,
+                language TEXT NOT NULL,
+                keyword_counts TEXT NOT NULL,
+                entities TEXT NOT NULL,
+                PRIMARY KEY (hash, language)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                block_hashes TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+        """)
+
+    def get_blocks(self, hashes: List[str], language: str) -> Dict[str, Dict]:
+        """Cached results for the given block hashes, keyed by hash."""
+        results = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT hash, keyword_counts, entities FROM blocks "
+                f"WHERE language = ? AND hash IN ({placeholders})",
+                [language] + chunk
+            )
+            for block_hash, keyword_counts, entities in rows:
+                results[block_hash] = {
+                    'keyword_counts': json.loads(keyword_counts),
+                    'entities': json.loads(entities)
+                }
+        return results
+
+    def put_blocks(self, results: Dict[str, Dict], language: str):
+        """Store NLP results for new blocks."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO blocks (hash, language, keyword_counts, entities) VALUES (?, ?, ?, ?)",
+                [
+                    (block_hash, language, json.dumps(result['keyword_counts']), json.dumps(result['entities']))
+                    for block_hash, result in results.items()
+                ]
+            )
+
+    def get_page_blocks(self, url: str) -> List[str]:
+        """Block hashes recorded for a URL's previous scrape."""
+        row = self.conn.execute("SELECT block_hashes FROM pages WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def put_page_blocks(self, url: str, hashes: List[str]):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, block_hashes, updated_at) VALUES (?, ?, ?)",
+                (url, json.dumps(hashes), datetime.now().isoformat())
+            )
+
+
+def analyse_blocks(url: str, blocks: List[Tuple[str, str]], language: str,
+                   store: BlockResultStore,
+                   count_keywords: Callable[[str, str], Counter],
+                   extract_entities_batch: Callable[[List[str], str], List[Dict]],
+                   num_keywords: int = 10) -> Tuple[List[str], Dict, Dict]:
+    """
+    Run NLP only on blocks without cached results and rebuild page results.
+
+    Args:
+        url: Page URL, used to report how many blocks changed since last scrape
+        blocks: (hash, text) pairs from segment_blocks()
+        language: Language code the NLP functions should use
+        store: Block result cache
+        count_keywords: text, language -> Counter of candidate keywords
+        extract_entities_batch: texts, language -> list of entity dicts
+        num_keywords: Number of page keywords to return
+
+    Returns:
+        (keywords, entities, stats)
+    """
+    hashes = [block_hash for block_hash, _ in blocks]
+    cached = store.get_blocks(hashes, language)
+
+    new_blocks = {}
+    for block_hash, text in blocks:
+        if block_hash not in cached and block_hash not in new_blocks:
+            new_blocks[block_hash] = text
+
+    if new_blocks:
+        texts = list(new_blocks.values())
+        entity_results = extract_entities_batch(texts, language)
+        fresh = {
+            block_hash: {
+                'keyword_counts': dict(count_keywords(text, language)),
+                'entities': entities
+            }
+            for (block_hash, text), entities in zip(new_blocks.items(), entity_results)
+        }
+        store.put_blocks(fresh, language)
+        cached.update(fresh)
+
+    previous = set(store.get_page_blocks(url))
+    store.put_page_blocks(url, hashes)
+
+    keyword_counts = Counter()
+    entities = {}
+    for block_hash in hashes:
+        result = cached[block_hash]
+        keyword_counts.update(result['keyword_counts'])
+        for label, values in result['entities'].items():
+            merged = entities.setdefault(label, [])
+            for value in values:
+                if value not in merged:
+                    merged.append(value)
+
+    stats = {
+        'blocks': len(hashes),
+        'nlp_blocks': len(new_blocks),
+        'changed_since_last_scrape': len(set(hashes) - previous) if previous else len(set(hashes))
+    }
+    keywords = [word for word, _ in keyword_counts.most_common(num_keywords)]
+    return keywords, entities, stats
@@ -0,0 +1,102 @@
+"""
+Output Compression (compression.py)
+==================================
+
+Purpose:
+--------
+Optional gzip or zstd compression for scraped output records and JSONL
+shards, plus streaming readers so downstream stages never decompress a whole
+shard into memory.
+
+Key Components:
+--------------
+1. Frame Codec
+   - Each record is compressed as an independent frame (a gzip member or a
+     zstd frame); concatenated frames are still a valid gzip/zstd stream
+   - Independent frames keep the shard offset index usable for random
+     access: one record = one frame to decompress
+
+2. Streaming Readers
+   - open_stream() returns a binary file object that decompresses on the
+     fly and supports line iteration
+   - Memory use is bounded by the decompressor window, not the shard size
+
+3. Optional Dependency
+   - gzip is always available (stdlib)
+   - zstd requires the 'zstandard' package; asking for it without the
+     package installed raises ValueError
+
+Usage:
+------
+frame = compress_frame(line_bytes, 'zstd', level=3)
+with open_stream('output_json/shard-000001.jsonl.zst') as f:
+    for line in f:
+        ...
+"""
+
+import io
+import gzip
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = ('gzip', 'zstd')
+SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+
+
+def validate_codec(codec: Optional[str]):
+    """Raise ValueError for unknown or unavailable codecs."""
+    if codec is None:
+        return
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec} (expected one of {CODECS})")
+    if codec == 'zstd' and zstandard is None:
+        raise ValueError("zstd compression requires the 'zstandard' package")
+
+
+def codec_for_path(path: str) -> Optional[str]:
+    """Infer the codec from a file name suffix."""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def compress_frame(data: bytes, codec: Optional[str], level: Optional[int] = None) -> bytes:
+    """Compress data as one self-contained frame."""
+    if codec is None:
+        return data
+    validate_codec(codec)
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    if codec == 'gzip':
+        # mtime=0 keeps output deterministic for identical input
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def decompress_frame(data: bytes, codec: Optional[str]) -> bytes:
+    """Decompress one frame produced by compress_frame()."""
+    if codec is None:
+        return data
+    validate_codec(codec)
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def open_stream(path: str, codec: Optional[str] = None):
+    """Open a possibly compressed file for streaming binary line reads."""
+    codec = codec or codec_for_path(path)
+    validate_codec(codec)
+    if codec is None:
+        return open(path, 'rb')
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    raw = open(path, 'rb')
+    reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True)
+    return io.BufferedReader(reader)
@@ -0,0 +1,187 @@
+"""
+Content-Addressed Output Store (content_store.py)
+================================================
+
+Purpose:
+--------
+Stores scraped pages so disk use and write I/O scale with unique content
+rather than with the number of scrapes. Large text fields are kept once as
+hash-keyed blobs, page records reference them, and every write is atomic.
+
+Key Components:
+--------------
+1. Blobs
+   - Text fields (header, navigation, content, footer) stored by SHA-256
+   - Identical text across pages or re-scrapes is written once
+
+2. Page Records
+   - Blob fields replaced by {"$blob": "<sha256>"} references
+   - Keyed by the SHA-256 of the canonical record, excluding the volatile
+     'id' (which carries a scrape timestamp), so an unchanged re-scrape
+     writes nothing new
+   - refs/ maps each URL to its latest page hash
+
+3. Atomic Writes
+   - Temporary file in the target directory, fsync, then os.replace
+   - Concurrent writers of the same content converge on the same file;
+     two scrapes in the same second can no longer overwrite each other
+
+Layout:
+-------
+<root>/blobs/ab/ab12...[.gz]   raw UTF-8 text (optionally compressed)
+<root>/pages/cd/cd34....json   page record with blob references
+<root>/refs/ef/ef56...         latest page hash for a URL
+
+Usage:
+------
+store = ContentStore('output_json/cas')
+page_hash, written = store.put_page(record)
+record = store.get_page(page_hash)          # blobs resolved inline
+"""
+
+import os
+import hashlib
+import tempfile
+from typing import Dict, Iterator, Optional, Tuple
+
+from compression import SUFFIXES, codec_for_path, compress_frame, decompress_frame, validate_codec
+from json_codec import dumpb, load
+
+BLOB_FIELDS = ('header', 'navigation', 'content', 'footer')
+VOLATILE_FIELDS = ('id',)
+BLOB_REF_KEY = '$blob'
+
+
+def sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def atomic_write(path: str, data: bytes):
+    """Write bytes to path via a temporary file and rename."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ContentStore:
+    """Hash-keyed blob and page store with atomic writes."""
+
+    def __init__(self, root: str = os.path.join('output_json', 'cas'), compression: Optional[str] = None):
+        validate_codec(compression)
+        self.root = root
+        self.compression = compression
+        self.stats = {
+            'blobs_written': 0,
+            'blobs_deduplicated': 0,
+            'pages_written': 0,
+            'pages_deduplicated': 0,
+            'bytes_written': 0
+        }
+
+    def _path(self, kind: str, key: str, suffix: str = '') -> str:
+        return os.path.join(self.root, kind, key[:2], key + suffix)
+
+    def _write_once(self, path: str, data: bytes) -> bool:
+        """Write data unless the content-addressed path already exists."""
+        if os.path.exists(path):
+            return False
+        atomic_write(path, data)
+        self.stats['bytes_written'] += len(data)
+        return True
+
+    def _find_blob(self, blob_hash: str) -> Optional[str]:
+        """Path of a stored blob, whichever codec it was written with."""
+        for suffix in SUFFIXES.values():
+            path = self._path('blobs', blob_hash, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put_blob(self, text: str) -> str:
+        """Store text once; returns its hash."""
+        data = text.encode('utf-8')
+        blob_hash = sha256_hex(data)
+        if self._find_blob(blob_hash) is None:
+            path = self._path('blobs', blob_hash, SUFFIXES[self.compression])
+            self._write_once(path, compress_frame(data, self.compression))
+            self.stats['blobs_written'] += 1
+        else:
+            self.stats['blobs_deduplicated'] += 1
+        return blob_hash
+
+    def get_blob(self, blob_hash: str) -> str:
+        path = self._find_blob(blob_hash)
+        if path is None:
+            raise FileNotFoundError(f"Blob not found: {blob_hash}")
+        with open(path, 'rb') as f:
+            return decompress_frame(f.read(), codec_for_path(path)).decode('utf-8')
+
+    def put_page(self, record: Dict) -> Tuple[str, bool]:
+        """
+        Store a page record with its text fields as blobs.
+
+        Returns (page_hash, written); written is False when identical content
+        was already stored.
+        """
+        shaped = dict(record)
+        for field in BLOB_FIELDS:
+            if isinstance(shaped.get(field), str) and shaped[field]:
+                shaped[field] = {BLOB_REF_KEY: self.put_blob(shaped[field])}
+
+        hashed = {key: value for key, value in shaped.items() if key not in VOLATILE_FIELDS}
+        page_hash = sha256_hex(dumpb(hashed, pretty=False, sort_keys=True))
+
+        data = dumpb(shaped, pretty=False)
+        written = self._write_once(self._path('pages', page_hash, '.json'), data)
+        self.stats['pages_written' if written else 'pages_deduplicated'] += 1
+
+        if record.get('url'):
+            ref_path = self._path('refs', sha256_hex(record['url'].encode('utf-8')))
+            atomic_write(ref_path, page_hash.encode('ascii'))
+        return page_hash, written
+
+    def page_path(self, page_hash: str) -> str:
+        return self._path('pages', page_hash, '.json')
+
+    def get_page(self, page_hash: str, resolve: bool = True) -> Dict:
+        """Load a page record, inlining blob text when resolve is True."""
+        with open(self.page_path(page_hash), 'rb') as f:
+            record = load(f)
+        return self.resolve(record) if resolve else record
+
+    def resolve(self, record: Dict) -> Dict:
+        """Replace blob references in a page record with their text."""
+        for field, value in record.items():
+            if isinstance(value, dict) and BLOB_REF_KEY in value:
+                record[field] = self.get_blob(value[BLOB_REF_KEY])
+        return record
+
+    def latest_page_hash(self, url: str) -> Optional[str]:
+        """Hash of the most recently stored page for a URL."""
+        ref_path = self._path('refs', sha256_hex(url.encode('utf-8')))
+        if not os.path.exists(ref_path):
+            return None
+        with open(ref_path, 'r', encoding='ascii') as f:
+            return f.read().strip()
+
+    def iter_pages(self, resolve: bool = True) -> Iterator[Tuple[str, Dict]]:
+        """Stream (page_hash, record) for every stored page."""
+        pages_dir = os.path.join(self.root, 'pages')
+        if not os.path.isdir(pages_dir):
+            return
+        for prefix in sorted(os.listdir(pages_dir)):
+            prefix_dir = os.path.join(pages_dir, prefix)
+            for filename in sorted(os.listdir(prefix_dir)):
+                if filename.endswith('.json'):
+                    page_hash = filename[:-len('.json')]
+                    yield page_hash, self.get_page(page_hash, resolve)
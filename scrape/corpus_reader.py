@@ -0,0 +1,154 @@
+"""
+Memory-Mapped Corpus Reader (corpus_reader.py)
+=============================================
+
+Purpose:
+--------
+Read access to the JSONL shard corpus for bulk reprocessing (re-analysis,
+re-extraction, exports) without opening and fully parsing every record
+into a Python dict. Shards are memory-mapped and records are located
+through their .idx offset index, so the OS page cache, not the Python heap,
+holds the corpus.
+
+Key Components:
+--------------
+1. Random Access
+   - get(record_id) looks the ID up in the offset index and decodes just
+     that record's bytes (newest write of an ID wins)
+
+2. Projected Iteration
+   - iter_records(fields=[...]) walks each shard's index in file order and
+     decodes only the requested top-level fields
+   - With msgspec installed, a generated Struct type makes the decoder skip
+     unrequested fields without building Python objects for them;
+     otherwise the record is decoded and projected
+   - Records are sliced straight out of the mapping (memoryview, no copy)
+     and discarded after each yield, so memory stays flat however many
+     records are scanned
+
+3. Compressed Shards
+   - .jsonl.gz / .jsonl.zst shards store one frame per record; each frame
+     is decompressed on its own, so random access still touches one record
+
+Usage:
+------
+with CorpusReader('output_json') as corpus:
+    record = corpus.get('some-page_20241022_162715')
+    for record in corpus.iter_records(fields=['id', 'url', 'content']):
+        ...
+"""
+
+import os
+import mmap
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from compression import codec_for_path, decompress_frame
+from json_codec import loads
+from shard_writer import list_shards, load_offset_index, _index_path
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class CorpusReader:
+    """Memory-mapped, index-driven reader over JSONL shards."""
+
+    def __init__(self, output_dir: str = 'output_json'):
+        self.output_dir = output_dir
+        self._maps = {}
+        self._index = None
+        self._decoders = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def index(self) -> Dict[str, Tuple[str, int, int]]:
+        """Record ID -> (shard, offset, length), loaded on first use."""
+        if self._index is None:
+            self._index = load_offset_index(self.output_dir)
+        return self._index
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _map(self, shard: str, end: int) -> mmap.mmap:
+        """Mapping of a shard that covers at least `end` bytes."""
+        mapped = self._maps.get(shard)
+        if mapped is None or len(mapped) < end:
+            # The writer only appends; remap to see records added since
+            if mapped is not None:
+                mapped.close()
+            with open(os.path.join(self.output_dir, shard), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[shard] = mapped
+        return mapped
+
+    def _decoder(self, fields: Sequence[str]):
+        key = tuple(fields)
+        if key not in self._decoders:
+            struct = msgspec.defstruct('Projection', [(name, object, None) for name in key])
+            self._decoders[key] = msgspec.json.Decoder(struct)
+        return self._decoders[key]
+
+    def _decode(self, shard: str, offset: int, length: int,
+                fields: Optional[Sequence[str]]) -> Dict:
+        view = memoryview(self._map(shard, offset + length))[offset:offset + length]
+        try:
+            data = decompress_frame(view, codec_for_path(shard))
+            if fields is None:
+                return loads(data)
+            if msgspec is not None:
+                projected = self._decoder(fields).decode(data)
+                return {name: getattr(projected, name) for name in fields}
+            record = loads(data)
+            return {name: record.get(name) for name in fields}
+        finally:
+            view.release()
+
+    def get(self, record_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
+        """Latest stored version of a record (or just the given fields)."""
+        entry = self.index.get(record_id)
+        if entry is None:
+            return None
+        return self._decode(*entry, fields)
+
+    def iter_entries(self) -> Iterator[Tuple[str, str, int, int]]:
+        """Stream (record_id, shard, offset, length) from each shard's index."""
+        for shard in list_shards(self.output_dir):
+            index_path = _index_path(os.path.join(self.output_dir, shard))
+            if not os.path.exists(index_path):
+                continue
+            with open(index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record_id, offset, length = line.rstrip('\n').split('\t')
+                    yield record_id, shard, int(offset), int(length)
+
+    def iter_records(self, fields: Optional[Sequence[str]] = None,
+                     latest_only: bool = False) -> Iterator[Dict]:
+        """
+        Stream records in storage order, optionally projected to fields.
+
+        latest_only skips superseded versions of re-written IDs; it needs
+        the full ID index in memory, so it is off by default.
+        """
+        for record_id, shard, offset, length in self.iter_entries():
+            if latest_only and self.index.get(record_id) != (shard, offset, length):
+                continue
+            yield self._decode(shard, offset, length, fields)
+
+    def ids(self) -> List[str]:
+        return list(self.index)
+
+    def close(self):
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps = {}
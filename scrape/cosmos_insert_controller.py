@@ -31,17 +31,25 @@ Key Components:
 
 Flow:
 -----
-1. Scans output_json directory for scraped content
-2. For each JSON file:
+1. Selects records still pending Cosmos insertion, or failed fewer than
+   KG_MANIFEST_MAX_ATTEMPTS times, from the output manifest
+   (output_json/manifest.sqlite). A missing manifest is created and
+   backfilled from the records already in output_json; with
+   use_manifest=False, streams every JSON file and JSONL shard record
+2. For each record:
    - Validates content
    - Inserts into Cosmos DB
    - Verifies insertion
+   - Marks the record inserted/failed in the manifest
    - Updates statistics
 3. Generates processing summary
 
 Configuration:
 -------------
 - input_dir: Location of JSON files (default: './output_json')
+- use_manifest: Select pending work from the manifest (default: True)
+- backfill: Register stored records missing from an existing manifest
+  before selecting work (--backfill)
 - Uses existing Cosmos DB configuration from web_scrape_cosmos_insert_wrx.py
 - Implements processing delays between insertions
 
@@ -53,7 +61,7 @@ Dependencies:
 
 Usage:
 ------
-python cosmos_insert_controller.py
+python cosmos_insert_controller.py [--backfill]
 
 Outputs:
 1. Console progress updates
@@ -80,13 +88,21 @@ Statistics Tracked:
 import os
 import time
 import logging
+import argparse
 from datetime import datetime
-from web_scrape_cosmos_insert_wrx import insert_data_into_cosmosdb, query_data_from_cosmosdb, read_json
+from web_scrape_cosmos_insert_wrx import insert_data_into_cosmosdb, query_data_from_cosmosdb
+from shard_writer import iter_output_records
+from manifest import OutputManifest
 
 class CosmosInsertController:
-    def __init__(self, input_dir: str = './output_json'):
+    def __init__(self, input_dir: str = './output_json', use_manifest: bool = True, backfill: bool = False):
         self.input_dir = input_dir
         self._setup_logging()
+        # A new manifest is backfilled from the records already stored in input_dir
+        self.manifest = OutputManifest(os.path.join(input_dir, 'manifest.sqlite')) if use_manifest else None
+        if self.manifest and backfill:
+            added = self.manifest.backfill(input_dir)
+            self.logger.info(f"Backfilled {added} records into the manifest")
         
     def _setup_logging(self):
         logging.basicConfig(
@@ -97,7 +113,7 @@ class CosmosInsertController:
         self.logger = logging.getLogger('CosmosInsertController')
 
     def process_files(self):
-        """Process all JSON files in the input directory."""
+        """Process all JSON files and JSONL shard records in the input directory."""
         results = {
             'total': 0,
             'successful': 0,
@@ -106,12 +122,11 @@ class CosmosInsertController:
         }
 
         try:
-            files = [f for f in os.listdir(self.input_dir) if f.endswith('.json')]
-            self.logger.info(f"Found {len(files)} JSON files to process")
-            
-            for filename in files:
-                filepath = os.path.join(self.input_dir, filename)
-                result = self._process_single_file(filepath)
+            for filename, record_id, data in self._iter_pending():
+                result = self._process_record(filename, data)
+                if self.manifest:
+                    self.manifest.mark('cosmos', record_id, 'inserted' if result['success'] else 'failed',
+                                       external_id=result.get('cosmos_id'), error=result.get('error'))
                 
                 results['total'] += 1
                 if result['success']:
@@ -121,6 +136,7 @@ class CosmosInsertController:
                     
                 results['processed_files'].append({
                     'filename': filename,
+                    'record_id': record_id,
                     'success': result['success'],
                     'cosmos_id': result.get('cosmos_id'),
                     'error': result.get('error')
@@ -135,15 +151,32 @@ class CosmosInsertController:
         self._print_summary(results)
         return results
 
-    def _process_single_file(self, filepath: str) -> dict:
-        """Process a single JSON file."""
+    def _iter_pending(self):
+        """Yield (source, record_id, record) for every record awaiting insertion."""
+        if self.manifest:
+            pending = list(self.manifest.pending('cosmos'))
+            self.logger.info(f"Manifest lists {len(pending)} records pending or retrying Cosmos insertion")
+            for row in pending:
+                try:
+                    data = self.manifest.load_record(row)
+                except Exception as e:
+                    self.logger.error(f"Error reading {row['location']}: {str(e)}")
+                    data = None
+                yield row['location'], row['id'], data
+            return
+        
+        self.logger.info(f"Streaming records from {self.input_dir}")
+        # Records are streamed one at a time, never loaded as a whole
+        for filename, data in iter_output_records(self.input_dir):
+            yield filename, data.get('id') if data else None, data
+
+    def _process_record(self, source: str, data: dict) -> dict:
+        """Process a single record from a JSON file or shard."""
         try:
-            self.logger.info(f"Processing file: {os.path.basename(filepath)}")
+            self.logger.info(f"Processing record from: {source}")
             
-            # Read JSON file
-            data = read_json(filepath)
             if not data:
-                return {'success': False, 'error': 'Failed to read JSON file'}
+                return {'success': False, 'error': 'Failed to read record'}
             
             # Insert into Cosmos DB
             cosmos_id = insert_data_into_cosmosdb(data)
@@ -177,7 +210,12 @@ class CosmosInsertController:
         self.logger.info("="*50)
 
 def main():
-    controller = CosmosInsertController()
+    parser = argparse.ArgumentParser(description="Insert scraped records into Cosmos DB")
+    parser.add_argument('input_dir', nargs='?', default='./output_json')
+    parser.add_argument('--backfill', action='store_true',
+                        help="Register stored records missing from the manifest before inserting")
+    args = parser.parse_args()
+    controller = CosmosInsertController(args.input_dir, backfill=args.backfill)
     results = controller.process_files()
     
     # Optional: Archive or move processed files
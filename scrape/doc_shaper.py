@@ -0,0 +1,189 @@
+"""
+Document Shaper (doc_shaper.py)
+==============================
+
+Purpose:
+--------
+Fits scraped page records into Cosmos DB without truncating them. Estimates
+the serialised size of a record and, when it is over budget, moves its
+largest text and array fields (content, header, navigation, footer, links,
+images, ...) into separate chunk documents linked by ID. Small pages are
+stored as a single document exactly as before.
+
+Key Components:
+--------------
+1. Size Estimation
+   - Compact UTF-8 JSON length, i.e. what Cosmos actually stores and bills
+   - Parent documents are kept under target_bytes (default 512 KB), well
+     below the 2 MB item limit
+
+2. Chunking
+   - Largest fields are chunked first until the parent fits
+   - Text is split on character boundaries, arrays on item boundaries;
+     each chunk value stays under chunk_bytes (default 256 KB)
+   - The field is replaced by {"$chunks": [chunk ids], "type": "str"|"list"}
+   - Chunk IDs are deterministic (<parent id>__<field>__<n>) so re-inserts
+     overwrite rather than accumulate
+
+3. Lazy Re-assembly
+   - LazyDocument wraps a parent and fetches a chunked field's chunks only
+     when that field is read
+   - assemble_document() rebuilds the full record eagerly
+
+Nothing is dropped: a record whose unchunkable fields alone exceed the
+budget raises ValueError instead of being silently cut.
+
+Usage:
+------
+documents = shape_document(record)     # chunks first, parent last
+for document in documents:
+    container.upsert_item(document)
+
+page = LazyDocument(parent, fetch_chunk)
+page['content']                         # chunks fetched here
+"""
+
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List
+
+from json_codec import dumpb
+
+MAX_DOCUMENT_BYTES = 2 * 1024 * 1024
+DEFAULT_TARGET_BYTES = 512 * 1024
+DEFAULT_CHUNK_BYTES = 256 * 1024
+CHUNK_REF_KEY = '$chunks'
+PROTECTED_FIELDS = ('id', 'url')
+
+
+def estimate_size(obj: Any) -> int:
+    """Serialised size of obj in bytes (compact JSON)."""
+    return len(dumpb(obj, pretty=False))
+
+
+def is_chunk_ref(value: Any) -> bool:
+    return isinstance(value, dict) and CHUNK_REF_KEY in value
+
+
+def chunk_id(parent_id: str, field: str, index: int) -> str:
+    return f"{parent_id}__{field}__{index}"
+
+
+def _split_text(text: str, chunk_bytes: int) -> List[str]:
+    pieces, pos = [], 0
+    while pos < len(text):
+        count = chunk_bytes
+        piece = text[pos:pos + count]
+        size = estimate_size(piece)
+        # Shrink proportionally until the escaped, encoded piece fits
+        while size > chunk_bytes and count > 1:
+            count = max(1, count * chunk_bytes // size - 1)
+            piece = text[pos:pos + count]
+            size = estimate_size(piece)
+        pieces.append(piece)
+        pos += len(piece)
+    return pieces
+
+
+def _split_list(items: List, chunk_bytes: int) -> List[List]:
+    pieces, current, current_size = [], [], 2
+    for item in items:
+        item_size = estimate_size(item) + 1
+        if current and current_size + item_size > chunk_bytes:
+            pieces.append(current)
+            current, current_size = [], 2
+        current.append(item)
+        current_size += item_size
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def shape_document(record: Dict, target_bytes: int = DEFAULT_TARGET_BYTES,
+                   chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> List[Dict]:
+    """
+    Split a record into a parent document and chunk documents.
+
+    Returns the chunk documents followed by the parent, so writing them in
+    order never exposes a parent whose chunks are missing. A record within
+    target_bytes is returned unchanged as the only document.
+    """
+    if estimate_size(record) <= target_bytes:
+        return [record]
+
+    parent = dict(record)
+    parent_id = parent['id']
+    chunks = []
+    sizes = {
+        field: estimate_size(value) for field, value in parent.items()
+        if field not in PROTECTED_FIELDS and isinstance(value, (str, list)) and value
+    }
+
+    for field in sorted(sizes, key=sizes.get, reverse=True):
+        if estimate_size(parent) <= target_bytes:
+            break
+        value = parent[field]
+        pieces = _split_text(value, chunk_bytes) if isinstance(value, str) else _split_list(value, chunk_bytes)
+        ids = []
+        for index, piece in enumerate(pieces):
+            ids.append(chunk_id(parent_id, field, index))
+            chunks.append({
+                'id': ids[-1],
+                'parent_id': parent_id,
+                'doc_type': 'chunk',
+                'field': field,
+                'index': index,
+                'value': piece
+            })
+        parent[field] = {CHUNK_REF_KEY: ids, 'type': 'str' if isinstance(value, str) else 'list'}
+
+    parent_size = estimate_size(parent)
+    if parent_size > MAX_DOCUMENT_BYTES:
+        raise ValueError(f"Document {parent_id} is {parent_size} bytes after chunking "
+                         f"(limit {MAX_DOCUMENT_BYTES})")
+    return chunks + [parent]
+
+
+def join_chunks(ref: Dict, chunk_docs: List[Dict]) -> Any:
+    """Rebuild a field value from its chunk documents."""
+    ordered = sorted(chunk_docs, key=lambda doc: doc['index'])
+    if len(ordered) != len(ref[CHUNK_REF_KEY]):
+        raise ValueError(f"Expected {len(ref[CHUNK_REF_KEY])} chunks, found {len(ordered)}")
+    if ref['type'] == 'str':
+        return ''.join(doc['value'] for doc in ordered)
+    return [item for doc in ordered for item in doc['value']]
+
+
+class LazyDocument(Mapping):
+    """Read-only view of a shaped parent that fetches chunked fields on access."""
+
+    def __init__(self, parent: Dict, fetch_chunk: Callable[[str], Dict]):
+        self.parent = parent
+        self.fetch_chunk = fetch_chunk
+        self._resolved = {}
+
+    def __getitem__(self, field: str) -> Any:
+        value = self.parent[field]
+        if not is_chunk_ref(value):
+            return value
+        if field not in self._resolved:
+            chunk_docs = [self.fetch_chunk(doc_id) for doc_id in value[CHUNK_REF_KEY]]
+            self._resolved[field] = join_chunks(value, chunk_docs)
+        return self._resolved[field]
+
+    def __iter__(self):
+        return iter(self.parent)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    @property
+    def chunked_fields(self) -> List[str]:
+        return [field for field, value in self.parent.items() if is_chunk_ref(value)]
+
+    def to_dict(self) -> Dict:
+        return {field: self[field] for field in self}
+
+
+def assemble_document(parent: Dict, fetch_chunk: Callable[[str], Dict]) -> Dict:
+    """Eagerly rebuild the full record from a shaped parent."""
+    return LazyDocument(parent, fetch_chunk).to_dict()
@@ -0,0 +1,218 @@
+"""
+Hashed Document Vectors (doc_vectors.py)
+=======================================
+
+Purpose:
+--------
+Builds fixed-width document vectors with the hashing trick so related pages
+can be found for SIMILAR_TO knowledge graph edges, fully offline and without
+any pretrained model.
+
+Key Components:
+--------------
+1. Feature Hashing
+   - Content tokens and named entities hashed into DEFAULT_DIM buckets
+   - Signed hashing to keep collisions unbiased
+   - Sublinear (1 + log tf) weighting, L2-normalised float32 output
+
+2. Vector Store
+   - Vectors appended to a raw float32 file next to the JSON output
+   - Document IDs kept in a parallel line-per-row file
+   - Matrix opened as a read-only numpy memmap for queries
+
+3. Similarity
+   - Batched cosine top-k (dot products of normalised rows)
+   - similar_to_edges() emits SIMILAR_TO edges for the graph builder
+
+Files (in the output directory):
+-------------------------------
+- doc_vectors.f32: row-major float32 matrix, DEFAULT_DIM columns
+- doc_vectors.ids: one document ID per row
+
+Usage:
+------
+store = DocumentVectorStore('output_json')
+store.add(record['id'], vectorize_record(record, stop_words))
+edges = store.similar_to_edges(k=5, min_score=0.3)
+"""
+
+import os
+import re
+import math
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DIM = 4096  # Must be a power of two
+ENTITY_WEIGHT = 2.0
+VECTORS_FILENAME = 'doc_vectors.f32'
+IDS_FILENAME = 'doc_vectors.ids'
+
+_TOKEN_RE = re.compile(r"[^\W\d_]{2,}")
+
+
+def tokenize(text: str, stop_words: Optional[set] = None) -> List[str]:
+    """Lower-case word tokens with stopwords removed."""
+    tokens = _TOKEN_RE.findall(text.lower()) if text else []
+    if stop_words:
+        tokens = [token for token in tokens if token not in stop_words]
+    return tokens
+
+
+def vectorize_document(tokens: Iterable[str], entities: Optional[Dict] = None,
+                       dim: int = DEFAULT_DIM) -> np.ndarray:
+    """Hash tokens and entities into an L2-normalised float32 vector."""
+    features = Counter(tokens)
+    weights = {feature: 1.0 + math.log(count) for feature, count in features.items()}
+
+    for label, values in (entities or {}).items():
+        for value in values:
+            feature = f"ent:{label}:{value.lower()}"
+            weights[feature] = weights.get(feature, 0.0) + ENTITY_WEIGHT
+
+    vector = np.zeros(dim, dtype=np.float32)
+    mask = dim - 1
+    for feature, weight in weights.items():
+        h = zlib.crc32(feature.encode('utf-8'))
+        # Low bits pick the bucket, the top bit picks the sign
+        vector[h & mask] += weight if h & 0x80000000 else -weight
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def vectorize_record(record: Dict, stop_words: Optional[set] = None,
+                     dim: int = DEFAULT_DIM) -> np.ndarray:
+    """Vectorise a scraped page record from its content and entities."""
+    return vectorize_document(
+        tokenize(record.get('content', ''), stop_words),
+        record.get('entities'),
+        dim
+    )
+
+
+class DocumentVectorStore:
+    """Append-only float32 vector matrix with a parallel ID list."""
+
+    def __init__(self, output_dir: str = 'output_json', dim: int = DEFAULT_DIM):
+        if dim & (dim - 1):
+            raise ValueError(f"dim must be a power of two, got {dim}")
+        self.dim = dim
+        self.vectors_path = os.path.join(output_dir, VECTORS_FILENAME)
+        self.ids_path = os.path.join(output_dir, IDS_FILENAME)
+        os.makedirs(output_dir, exist_ok=True)
+        self._repair()
+
+    def _repair(self):
+        """Drop orphan vector rows left by a crash between the two appends."""
+        if not os.path.exists(self.vectors_path):
+            return
+        ids_count = 0
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, 'r', encoding='utf-8') as f:
+                ids_count = sum(1 for _ in f)
+        expected_size = ids_count * self.dim * 4
+        if os.path.getsize(self.vectors_path) > expected_size:
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(expected_size)
+
+    def add(self, doc_id: str, vector: np.ndarray):
+        """Append one document vector."""
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Expected vector of shape ({self.dim},), got {vector.shape}")
+        # Vector first, then ID: a crash in between leaves an orphan row that
+        # _repair() trims on the next start, never an ID without a vector
+        with open(self.vectors_path, 'ab') as f:
+            f.write(vector.astype(np.float32, copy=False).tobytes())
+        with open(self.ids_path, 'a', encoding='utf-8') as f:
+            f.write(f"{doc_id}\n")
+
+    def load(self) -> Tuple[List[str], np.ndarray]:
+        """Return (ids, matrix) with the matrix memory-mapped read-only."""
+        if not os.path.exists(self.ids_path) or not os.path.exists(self.vectors_path):
+            return [], np.zeros((0, self.dim), dtype=np.float32)
+
+        with open(self.ids_path, 'r', encoding='utf-8') as f:
+            ids = f.read().splitlines()
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        count = min(len(ids), rows)
+        if count == 0:
+            return [], np.zeros((0, self.dim), dtype=np.float32)
+
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(count, self.dim))
+        return ids[:count], matrix
+
+    def top_k(self, queries: np.ndarray, k: int = 5,
+              batch_size: int = 1024) -> List[List[Tuple[str, float]]]:
+        """
+        Batched cosine top-k over the stored matrix.
+
+        Args:
+            queries: (n, dim) array of normalised query vectors, or one vector
+            k: Neighbours to return per query
+            batch_size: Queries scored per matrix multiplication
+
+        Returns:
+            One list of (doc_id, score) per query, best first
+        """
+        ids, matrix = self.load()
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        return _top_k(ids, matrix, queries, k, batch_size)
+
+    def similar_to_edges(self, k: int = 5, min_score: float = 0.3,
+                         batch_size: int = 1024) -> List[Dict]:
+        """SIMILAR_TO edges from every stored document to its top-k neighbours."""
+        ids, matrix = self.load()
+        edges = []
+        for start in range(0, len(ids), batch_size):
+            queries = np.asarray(matrix[start:start + batch_size])
+            neighbours = _top_k(ids, matrix, queries, k, batch_size, self_offset=start)
+            for offset, row in enumerate(neighbours):
+                source = ids[start + offset]
+                for target, score in row:
+                    if score >= min_score:
+                        edges.append({
+                            'label': 'SIMILAR_TO',
+                            'from': source,
+                            'to': target,
+                            'score': round(score, 4)
+                        })
+        return edges
+
+
+def _top_k(ids: List[str], matrix: np.ndarray, queries: np.ndarray, k: int,
+           batch_size: int, self_offset: Optional[int] = None) -> List[List[Tuple[str, float]]]:
+    """
+    Score queries against matrix in batches and keep the k best per query.
+
+    When self_offset is given, queries[i] is matrix row self_offset + i and
+    that self-match is excluded.
+    """
+    if self_offset is not None:
+        k = min(k, len(ids) - 1)
+    else:
+        k = min(k, len(ids))
+    if k <= 0:
+        return [[] for _ in range(len(queries))]
+
+    results = []
+    for start in range(0, len(queries), batch_size):
+        scores = queries[start:start + batch_size] @ matrix.T
+        if self_offset is not None:
+            rows = np.arange(len(scores))
+            scores[rows, rows + self_offset + start] = -np.inf
+
+        # argpartition finds the k best in O(n); only those k get sorted
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        for row_ids, row_scores in zip(top, top_scores):
+            results.append([(ids[i], float(score)) for i, score in zip(row_ids, row_scores)])
+    return results
@@ -0,0 +1,183 @@
+"""
+Language Detection Gate (language_gate.py)
+=========================================
+
+Purpose:
+--------
+Identifies the language of scraped content before any NLP runs, so each page
+is processed with a matching spaCy model and stopword list, or skips NLP
+entirely when the language is not supported.
+
+Key Components:
+--------------
+1. Language Identification
+   - Stopword-profile scoring over a sample of the text
+   - No model downloads; a few microseconds per page
+
+2. Model Pool
+   - spaCy models and NLTK stopword lists loaded lazily on first use
+   - Loaded models cached for the life of the process
+   - Missing models mark the language unsupported instead of failing
+
+3. Throughput Counters
+   - Documents, characters and NLP seconds per language
+   - Skipped documents counted separately
+
+Usage:
+------
+from language_gate import detect_language, LanguageModelPool
+
+language, confidence = detect_language(content_text)
+nlp = pool.get_nlp(language)   # None if unsupported
+"""
+
+import re
+import logging
+from typing import Dict, Optional, Tuple
+
+UNDETERMINED = 'und'
+
+# ISO 639-1 code -> (spaCy model, NLTK stopwords corpus name)
+SUPPORTED_LANGUAGES = {
+    'en': ('en_core_web_sm', 'english'),
+    'es': ('es_core_news_sm', 'spanish'),
+    'fr': ('fr_core_news_sm', 'french'),
+    'de': ('de_core_news_sm', 'german'),
+    'it': ('it_core_news_sm', 'italian'),
+    'pt': ('pt_core_news_sm', 'portuguese'),
+    'nl': ('nl_core_news_sm', 'dutch')
+}
+
+# Highly frequent, mostly language-exclusive function words per language
+STOPWORD_PROFILES = {
+    'en': {'the', 'and', 'of', 'to', 'in', 'is', 'that', 'for', 'it', 'with',
+           'was', 'on', 'as', 'are', 'this', 'by', 'be', 'at', 'from', 'have'},
+    'es': {'el', 'la', 'de', 'que', 'y', 'en', 'los', 'del', 'se', 'las',
+           'por', 'un', 'para', 'con', 'una', 'su', 'al', 'es', 'lo', 'como'},
+    'fr': {'le', 'la', 'les', 'de', 'des', 'et', 'est', 'du', 'une', 'un',
+           'en', 'que', 'qui', 'dans', 'pour', 'pas', 'sur', 'au', 'avec', 'il'},
+    'de': {'der', 'die', 'und', 'den', 'das', 'ist', 'nicht', 'von', 'zu', 'mit',
+           'sich', 'des', 'auf', 'ein', 'eine', 'dem', 'auch', 'es', 'im', 'für'},
+    'it': {'il', 'di', 'che', 'la', 'e', 'per', 'un', 'del', 'della', 'non',
+           'una', 'sono', 'con', 'gli', 'le', 'si', 'al', 'da', 'nel', 'è'},
+    'pt': {'de', 'que', 'o', 'a', 'e', 'do', 'da', 'em', 'um', 'para',
+           'com', 'não', 'uma', 'os', 'no', 'se', 'na', 'por', 'mais', 'as'},
+    'nl': {'de', 'het', 'een', 'en', 'van', 'is', 'dat', 'op', 'te', 'zijn',
+           'niet', 'met', 'voor', 'ook', 'maar', 'om', 'aan', 'er', 'wordt', 'bij'}
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+DEFAULT_SAMPLE_CHARS = 4000
+MIN_PROFILE_HITS = 5
+MIN_CONFIDENCE = 0.08
+
+
+def detect_language(text: str, sample_chars: int = DEFAULT_SAMPLE_CHARS) -> Tuple[str, float]:
+    """
+    Guess the language of text from stopword frequencies.
+
+    Returns (language_code, confidence); language_code is 'und' when no
+    profile scores well enough to trust.
+    """
+    if not text:
+        return UNDETERMINED, 0.0
+
+    words = _WORD_RE.findall(text[:sample_chars].lower())
+    if not words:
+        return UNDETERMINED, 0.0
+
+    hits = {language: 0 for language in STOPWORD_PROFILES}
+    for word in words:
+        for language, profile in STOPWORD_PROFILES.items():
+            if word in profile:
+                hits[language] += 1
+
+    best = max(hits, key=hits.get)
+    confidence = hits[best] / len(words)
+    if hits[best] < MIN_PROFILE_HITS or confidence < MIN_CONFIDENCE:
+        return UNDETERMINED, round(confidence, 3)
+    return best, round(confidence, 3)
+
+
+class LanguageModelPool:
+    """Lazily loaded, cached spaCy models and stopword lists per language."""
+
+    def __init__(self, languages: Optional[Dict] = None):
+        self.languages = languages or SUPPORTED_LANGUAGES
+        self._models = {}
+        self._stopwords = {}
+        self.counters = {}
+        self.logger = logging.getLogger('LanguageModelPool')
+        self._spacy_missing = False
+
+    def is_supported(self, language: str) -> bool:
+        """True if the language is configured and its model can be loaded."""
+        return self.get_nlp(language) is not None
+
+    def get_nlp(self, language: str):
+        """Return the spaCy pipeline for a language, loading it on first use."""
+        if language not in self.languages:
+            return None
+        if language not in self._models:
+            model_name = self.languages[language][0]
+            try:
+                import spacy
+                self._models[language] = spacy.load(model_name)
+            except ImportError as e:
+                # Remember failures so we neither retry nor warn again on every page
+                if not self._spacy_missing:
+                    self.logger.warning(f"spaCy is not available ({str(e)}); NLP is skipped for all languages")
+                    self._spacy_missing = True
+                self._models[language] = None
+            except OSError as e:
+                self.logger.warning(f"Could not load spaCy model {model_name} for '{language}' ({str(e)}); "
+                                    f"NLP is skipped for this language. Install it with: "
+                                    f"python -m spacy download {model_name}")
+                self._models[language] = None
+        return self._models[language]
+
+    def get_stopwords(self, language: str) -> set:
+        """Return the NLTK stopword set for a language, loading it on first use."""
+        if language not in self._stopwords:
+            corpus_name = self.get_nltk_language(language)
+            try:
+                from nltk.corpus import stopwords
+                self._stopwords[language] = set(stopwords.words(corpus_name))
+            except (ImportError, LookupError, OSError):
+                self._stopwords[language] = STOPWORD_PROFILES.get(language, set())
+        return self._stopwords[language]
+
+    def get_nltk_language(self, language: str) -> str:
+        """NLTK corpus/tokeniser name for a language code (English fallback)."""
+        return self.languages.get(language, SUPPORTED_LANGUAGES['en'])[1]
+
+    def record(self, language: str, chars: int, seconds: float, skipped: bool = False):
+        """Update per-language throughput counters."""
+        counter = self.counters.setdefault(language, {
+            'documents': 0,
+            'skipped': 0,
+            'chars': 0,
+            'nlp_chars': 0,
+            'nlp_seconds': 0.0
+        })
+        counter['documents'] += 1
+        counter['chars'] += chars
+        if skipped:
+            counter['skipped'] += 1
+        else:
+            counter['nlp_chars'] += chars
+            counter['nlp_seconds'] += seconds
+
+    def get_throughput_stats(self) -> Dict:
+        """Per-language counters plus documents/sec and chars/sec over the documents NLP ran on."""
+        stats = {}
+        for language, counter in self.counters.items():
+            seconds = counter['nlp_seconds']
+            stats[language] = dict(
+                counter,
+                docs_per_second=round((counter['documents'] - counter['skipped']) / seconds, 2) if seconds else 0.0,
+                chars_per_second=round(counter['nlp_chars'] / seconds, 2) if seconds else 0.0
+            )
+        return stats
+
@@ -0,0 +1,260 @@
+"""
+Output Manifest (manifest.py)
+============================
+
+Purpose:
+--------
+Local SQLite index of every scraped output: where it is stored, which URL
+it came from, its content hash, size and schema version, and whether it has
+already been inserted into Cosmos DB or loaded into the Gremlin graph.
+Consumers select pending work from the manifest in O(pending) instead of
+listing and parsing the whole output directory.
+
+Key Components:
+--------------
+1. outputs table
+   - One row per saved record, keyed by record ID; latest_rows() selects
+     the newest row per URL
+   - Location columns cover all output modes: file path, shard + offset +
+     length, or content-addressed page path
+   - Per-target state columns (cosmos_state, gremlin_state):
+     pending -> inserted | failed, with an attempt counter per target
+   - Failed rows stay eligible for retry until they have failed
+     max_attempts times (KG_MANIFEST_MAX_ATTEMPTS, default 3)
+
+2. Indexes
+   - url, content_hash
+   - Partial indexes over pending and failed rows per target, so "what is
+     left to do" never scans completed work
+
+3. Transactions
+   - record_output() and mark() each commit atomically; a crash leaves the
+     manifest either before or after a change, never half-way
+
+4. Backfill
+   - A newly created manifest registers every record already stored next
+     to it (shards, content-addressed pages, per-page files) as pending,
+     so outputs written before the manifest existed are not lost to
+     consumers; backfill() repeats this for an existing manifest
+
+Usage:
+------
+manifest = OutputManifest('output_json/manifest.sqlite')
+manifest.record_output(record, 'file', location=filepath, size=n)
+for row in manifest.pending('cosmos'):   # includes failed rows below max_attempts
+    record = manifest.load_record(row)
+    ...
+    manifest.mark('cosmos', row['id'], 'inserted', external_id=cosmos_id)
+"""
+
+import os
+import sqlite3
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from compression import open_stream
+from json_codec import load, DECODE_ERRORS
+from shard_writer import read_record, load_offset_index
+from content_store import ContentStore
+
+TARGETS = ('cosmos', 'gremlin')
+STATES = ('pending', 'inserted', 'failed')
+DEFAULT_MAX_ATTEMPTS = int(os.getenv('KG_MANIFEST_MAX_ATTEMPTS', '3'))
+
+
+def content_hash(record: Dict) -> str:
+    """SHA-256 of the page's main content text."""
+    return hashlib.sha256((record.get('content') or '').encode('utf-8')).hexdigest()
+
+
+class OutputManifest:
+    """SQLite manifest of scraped outputs and their downstream insert state."""
+
+    def __init__(self, path: str = os.path.join('output_json', 'manifest.sqlite'), backfill: bool = True):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        created = not os.path.exists(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outputs (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                location TEXT NOT NULL,
+                shard_offset INTEGER,
+                shard_length INTEGER,
+                size INTEGER NOT NULL,
+                schema_version INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                cosmos_state TEXT NOT NULL DEFAULT 'pending',
+                cosmos_id TEXT,
+                cosmos_error TEXT,
+                cosmos_attempts INTEGER NOT NULL DEFAULT 0,
+                gremlin_state TEXT NOT NULL DEFAULT 'pending',
+                gremlin_id TEXT,
+                gremlin_error TEXT,
+                gremlin_attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT NOT NULL
+            );
+        """)
+        self._add_missing_columns()
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_outputs_url ON outputs (url);
+            CREATE INDEX IF NOT EXISTS idx_outputs_content_hash ON outputs (content_hash);
+            DROP INDEX IF EXISTS idx_outputs_cosmos_pending;
+            DROP INDEX IF EXISTS idx_outputs_gremlin_pending;
+            CREATE INDEX IF NOT EXISTS idx_outputs_cosmos_todo
+                ON outputs (created_at) WHERE cosmos_state IN ('pending', 'failed');
+            CREATE INDEX IF NOT EXISTS idx_outputs_gremlin_todo
+                ON outputs (created_at) WHERE gremlin_state IN ('pending', 'failed');
+        """)
+        if created and backfill:
+            self.backfill(directory or '.')
+
+    def _add_missing_columns(self):
+        """Upgrade manifests created before retry counting."""
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(outputs)")}
+        for target in TARGETS:
+            if f"{target}_attempts" not in columns:
+                self.conn.execute(f"ALTER TABLE outputs ADD COLUMN {target}_attempts INTEGER NOT NULL DEFAULT 0")
+
+    def record_output(self, record: Dict, mode: str, location: str, size: int,
+                      schema_version: int = 1, shard_offset: Optional[int] = None,
+                      shard_length: Optional[int] = None):
+        """Register (or re-register) a saved record as pending for every target."""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO outputs (id, url, content_hash, mode, location, shard_offset, shard_length,
+                                     size, schema_version, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    url = excluded.url, content_hash = excluded.content_hash, mode = excluded.mode,
+                    location = excluded.location, shard_offset = excluded.shard_offset,
+                    shard_length = excluded.shard_length, size = excluded.size,
+                    schema_version = excluded.schema_version, updated_at = excluded.updated_at,
+                    cosmos_state = 'pending', gremlin_state = 'pending',
+                    cosmos_attempts = 0, gremlin_attempts = 0
+            """, (record['id'], record.get('url', ''), content_hash(record), mode, location,
+                  shard_offset, shard_length, size, schema_version, now, now))
+
+    def backfill(self, output_dir: str) -> int:
+        """Register stored records missing from the manifest as pending; returns how many were added."""
+        added = 0
+        with self.conn:
+            for record, mode, location, size, shard_offset, shard_length in _iter_stored(output_dir):
+                if record is None or not record.get('id'):
+                    continue
+                now = datetime.now().isoformat()
+                cursor = self.conn.execute("""
+                    INSERT OR IGNORE INTO outputs (id, url, content_hash, mode, location, shard_offset,
+                                                   shard_length, size, schema_version, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (record['id'], record.get('url', ''), content_hash(record), mode, location,
+                      shard_offset, shard_length, size, record.get('schema_version', 1), now, now))
+                added += cursor.rowcount
+        return added
+
+    def pending(self, target: str, limit: Optional[int] = None,
+                max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Iterator[sqlite3.Row]:
+        """Rows still to do for a target (pending, or failed fewer than max_attempts times), oldest first."""
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target: {target}")
+        query = (f"SELECT * FROM outputs WHERE {target}_state IN ('pending', 'failed') "
+                 f"AND {target}_attempts < ? ORDER BY created_at")
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        # Materialise so callers can mark() rows while iterating
+        return iter(self.conn.execute(query, (max_attempts,)).fetchall())
+
+    def mark(self, target: str, record_id: str, state: str,
+             external_id: Optional[str] = None, error: Optional[str] = None):
+        """Record the outcome of inserting a record into a target."""
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target: {target}")
+        if state not in STATES:
+            raise ValueError(f"Invalid state: {state}")
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE outputs SET {target}_state = ?, {target}_id = COALESCE(?, {target}_id), "
+                f"{target}_error = ?, {target}_attempts = {target}_attempts + ?, updated_at = ? WHERE id = ?",
+                (state, external_id, error, int(state == 'failed'), datetime.now().isoformat(), record_id)
+            )
+
+    def rows(self) -> Iterator[sqlite3.Row]:
+        """Stream every output row, oldest first."""
+        return self.conn.execute("SELECT * FROM outputs ORDER BY created_at")
+
+    def latest_rows(self) -> Iterator[sqlite3.Row]:
+        """Stream the newest output row for each URL, oldest first."""
+        return self.conn.execute("""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY url ORDER BY created_at DESC, id DESC) AS url_rank
+                FROM outputs
+            ) WHERE url_rank = 1 ORDER BY created_at
+        """)
+
+    def find_by_url(self, url: str) -> list:
+        return self.conn.execute("SELECT * FROM outputs WHERE url = ? ORDER BY created_at", (url,)).fetchall()
+
+    def find_by_hash(self, digest: str) -> list:
+        return self.conn.execute("SELECT * FROM outputs WHERE content_hash = ?", (digest,)).fetchall()
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of outputs per state for each target."""
+        result = {}
+        for target in TARGETS:
+            rows = self.conn.execute(
+                f"SELECT {target}_state, COUNT(*) FROM outputs GROUP BY {target}_state"
+            ).fetchall()
+            result[target] = {state: count for state, count in rows}
+        return result
+
+    def load_record(self, row: sqlite3.Row) -> Optional[Dict]:
+        """Read the stored record a manifest row points at."""
+        if row['mode'] == 'jsonl':
+            return read_record(os.path.dirname(row['location']), os.path.basename(row['location']),
+                               row['shard_offset'], row['shard_length'])
+        if row['mode'] == 'cas':
+            pages_dir = os.path.dirname(os.path.dirname(row['location']))
+            store = ContentStore(os.path.dirname(pages_dir))
+            record = store.get_page(os.path.basename(row['location'])[:-len('.json')])
+            # Deduplicated pages carry the ID of their first scrape
+            record['id'] = row['id']
+            return record
+        with open_stream(row['location']) as f:
+            return load(f)
+
+    def close(self):
+        self.conn.close()
+
+
+def _iter_stored(output_dir: str) -> Iterator[Tuple[Optional[Dict], str, str, int, Optional[int], Optional[int]]]:
+    """Yield (record, mode, location, size, shard_offset, shard_length) for every stored record."""
+    for record_id, (shard, offset, length) in load_offset_index(output_dir).items():
+        yield (read_record(output_dir, shard, offset, length), 'jsonl',
+               os.path.join(output_dir, shard), length, offset, length)
+
+    store = ContentStore(os.path.join(output_dir, 'cas'))
+    for page_hash, record in store.iter_pages():
+        page_path = store.page_path(page_hash)
+        yield record, 'cas', page_path, os.path.getsize(page_path), None, None
+
+    if not os.path.isdir(output_dir):
+        return
+    for filename in sorted(os.listdir(output_dir)):
+        if not filename.endswith(('.json', '.json.gz', '.json.zst')):
+            continue
+        filepath = os.path.join(output_dir, filename)
+        try:
+            with open_stream(filepath) as f:
+                record = load(f)
+        except (OSError, EOFError) + DECODE_ERRORS:
+            record = None
+        yield record, 'file', filepath, os.path.getsize(filepath), None, None
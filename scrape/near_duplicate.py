@@ -0,0 +1,207 @@
+"""
+Near-Duplicate Index (near_duplicate.py)
+=======================================
+
+Purpose:
+--------
+Detects near-duplicate pages (syndicated wire stories, mirrors) right after
+text extraction so copies skip NLP, JSON output and Cosmos insertion. Each
+duplicate is linked to the canonical page of its cluster.
+
+Checking and indexing are separate steps: check() runs before processing
+and records nothing, add() indexes the page once it has been saved (or
+handled as a duplicate). A page whose save fails never becomes the
+canonical page of a cluster, so its copies are not skipped later; callers
+discard() it, and at most MAX_PENDING_CHECKS checked pages are held.
+
+Key Components:
+--------------
+1. SimHash Fingerprints
+   - 64-bit SimHash over overlapping word shingles
+   - Robust to small edits, boilerplate differences and re-ordering
+
+2. LSH Banding
+   - Fingerprint split into BANDS bands of equal width
+   - With max_distance < BANDS, any two fingerprints within max_distance
+     bits share at least one identical band (pigeonhole), so candidate
+     lookup is a handful of dict probes instead of a full scan
+
+3. Persistence
+   - Append-only JSONL file, one line per indexed page
+   - Replayed on start-up so detection works across runs
+
+Usage:
+------
+index = NearDuplicateIndex('output_json/near_duplicates.jsonl')
+match = index.check(url, content_text)
+if match:
+    # match['canonical_id'] is the cluster's first-seen page
+...
+index.add(page_id, url)     # after the page is saved
+index.discard(url)          # or once it is given up on
+"""
+
+import os
+import re
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+DEFAULT_MAX_DISTANCE = 3
+SHINGLE_SIZE = 3
+MIN_WORDS = 50  # Shorter pages (nav stubs, error pages) are too easy to confuse
+MAX_PENDING_CHECKS = 1000  # Checked pages awaiting add(); the oldest are dropped beyond this
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[int]:
+    """64-bit SimHash of text over word shingles, or None if text is too short."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for i in range(len(words) - shingle_size + 1):
+        h = _hash64(' '.join(words[i:i + shingle_size]))
+        for bit in range(FINGERPRINT_BITS):
+            if h >> bit & 1:
+                weights[bit] += 1
+            else:
+                weights[bit] -= 1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """Persistent SimHash index with LSH band buckets."""
+
+    def __init__(self, path: str, max_distance: int = DEFAULT_MAX_DISTANCE):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookup to be exact")
+        self.path = path
+        self.max_distance = max_distance
+        self.entries = {}   # doc_id -> {'url', 'simhash', 'cluster'}
+        self.urls = {}      # url -> doc_id
+        self.buckets = {}   # (band, band_value) -> [doc_id]
+        self._checked = OrderedDict()  # url -> (fingerprint, cluster) from check(), awaiting add()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash; everything before it is valid
+                    continue
+                self._index(entry['id'], entry['url'], entry['simhash'], entry['cluster'])
+
+    def _index(self, doc_id: str, url: str, fingerprint: int, cluster: str):
+        self.entries[doc_id] = {'url': url, 'simhash': fingerprint, 'cluster': cluster}
+        self.urls[url] = doc_id
+        for band in range(BANDS):
+            key = (band, fingerprint >> (band * BAND_BITS) & BAND_MASK)
+            self.buckets.setdefault(key, []).append(doc_id)
+
+    def find(self, fingerprint: int, exclude_url: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        """Closest indexed page within max_distance, as (doc_id, distance)."""
+        best = None
+        seen = set()
+        for band in range(BANDS):
+            key = (band, fingerprint >> (band * BAND_BITS) & BAND_MASK)
+            for doc_id in self.buckets.get(key, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                entry = self.entries[doc_id]
+                if entry['url'] == exclude_url:
+                    continue
+                distance = hamming_distance(fingerprint, entry['simhash'])
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (doc_id, distance)
+        return best
+
+    def _record(self, doc_id: str, url: str, fingerprint: int, cluster: Optional[str] = None):
+        """Index a page and append it to the persisted log."""
+        cluster = cluster or doc_id
+        self._index(doc_id, url, fingerprint, cluster)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'id': doc_id, 'url': url, 'simhash': fingerprint, 'cluster': cluster}) + '\n')
+
+    def check(self, url: str, text: str) -> Optional[Dict]:
+        """
+        Check text against the index without recording it.
+
+        Returns None for new content, or a dict describing the cluster the
+        page duplicates. Re-scrapes of an already indexed URL are never
+        reported as their own duplicates. The fingerprint is kept for add().
+        """
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return None
+
+        known_id = self.urls.get(url)
+        if known_id is not None and self.entries[known_id]['cluster'] == known_id:
+            # Canonical pages stay canonical when re-scraped
+            return None
+
+        match = self.find(fingerprint, exclude_url=url)
+        if match is None:
+            # Becomes a cluster's canonical page once added
+            self._remember(url, fingerprint, None)
+            return None
+
+        match_id, distance = match
+        entry = self.entries[match_id]
+        self._remember(url, fingerprint, entry['cluster'])
+        canonical = self.entries.get(entry['cluster'], entry)
+        return {
+            'canonical_id': entry['cluster'],
+            'canonical_url': canonical['url'],
+            'matched_id': match_id,
+            'distance': distance
+        }
+
+    def _remember(self, url: str, fingerprint: int, cluster: Optional[str]):
+        self._checked.pop(url, None)
+        self._checked[url] = (fingerprint, cluster)
+        if len(self._checked) > MAX_PENDING_CHECKS:
+            self._checked.popitem(last=False)
+
+    def discard(self, url: str):
+        """Forget the page last checked under url, e.g. when it could not be saved."""
+        self._checked.pop(url, None)
+
+    def add(self, doc_id: str, url: str):
+        """Index the page last checked under url, e.g. once it has been saved; no-op if already indexed."""
+        checked = self._checked.pop(url, None)
+        if checked is None or url in self.urls:
+            return
+        fingerprint, cluster = checked
+        self._record(doc_id, url, fingerprint, cluster)
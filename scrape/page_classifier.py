@@ -0,0 +1,110 @@
+"""
+Page Type Classifier (page_classifier.py)
+========================================
+
+Purpose:
+--------
+Labels each scraped page as article, index, product or other from cheap
+signals the scraper already has, and maps the label to an extraction plan so
+homepages and category pages get link harvesting only while NLP time goes
+to real content.
+
+Features Used:
+-------------
+- Link density: share of main-content text that sits inside <a> tags
+- og:type OpenGraph tag
+- article:published_time meta tag
+- Word count of the main content
+- JSON-LD @type values (including @graph members)
+
+Extraction Plans:
+----------------
+article  - full NLP, links, images, readability
+index    - links only
+product  - links and images, no NLP
+other    - full NLP (unknown pages are not penalised)
+
+Usage:
+------
+features = extract_page_features(soup, main_content, content_text, structured_data)
+page_type = classify_page(features)
+plan = EXTRACTION_PLANS[page_type]
+"""
+
+from typing import Dict, List
+
+ARTICLE_TYPES = {'Article', 'NewsArticle', 'BlogPosting', 'Report', 'ScholarlyArticle',
+                 'TechArticle', 'AnalysisNewsArticle', 'OpinionNewsArticle', 'ReportageNewsArticle'}
+# Only page-level types: site-wide blocks (WebSite, SiteNavigationElement) are
+# embedded on articles and product pages alike and say nothing about this page
+INDEX_TYPES = {'CollectionPage', 'ItemList', 'SearchResultsPage'}
+PRODUCT_TYPES = {'Product', 'Offer', 'AggregateOffer', 'IndividualProduct', 'ProductGroup'}
+
+INDEX_LINK_DENSITY = 0.5
+ARTICLE_MAX_LINK_DENSITY = 0.35
+ARTICLE_MIN_WORDS = 150
+
+EXTRACTION_PLANS = {
+    'article': {'nlp': True, 'links': True, 'images': True, 'readability': True},
+    'index': {'nlp': False, 'links': True, 'images': False, 'readability': False},
+    'product': {'nlp': False, 'links': True, 'images': True, 'readability': False},
+    'other': {'nlp': True, 'links': True, 'images': True, 'readability': True}
+}
+
+
+def _json_ld_types(structured_data: List) -> set:
+    """Collect every @type value from JSON-LD blocks, following @graph."""
+    types = set()
+    stack = list(structured_data)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            value = item.get('@type')
+            if isinstance(value, str):
+                types.add(value)
+            elif isinstance(value, list):
+                types.update(v for v in value if isinstance(v, str))
+            if '@graph' in item:
+                stack.append(item['@graph'])
+    return types
+
+
+def extract_page_features(soup, main_content, content_text: str, structured_data: List) -> Dict:
+    """Gather the cheap classification features for a parsed page."""
+    link_chars = 0
+    if main_content is not None:
+        link_chars = sum(len(a.get_text(strip=True)) for a in main_content.find_all('a'))
+    text_chars = len(content_text)
+
+    og_type = soup.find('meta', property='og:type')
+    published = soup.find('meta', property='article:published_time')
+
+    return {
+        'link_density': round(min(link_chars / text_chars, 1.0), 3) if text_chars else 1.0,
+        'og_type': (og_type.get('content', '') if og_type else '').lower(),
+        'has_published_time': bool(published and published.get('content')),
+        'word_count': len(content_text.split()),
+        'json_ld_types': sorted(_json_ld_types(structured_data))
+    }
+
+
+def classify_page(features: Dict) -> str:
+    """Return 'article', 'index', 'product' or 'other' for a feature dict."""
+    types = set(features['json_ld_types'])
+    og_type = features['og_type']
+    link_density = features['link_density']
+
+    if types & PRODUCT_TYPES or og_type.startswith('product'):
+        return 'product'
+
+    article_signal = bool(types & ARTICLE_TYPES) or og_type == 'article' or features['has_published_time']
+    if (article_signal and link_density <= ARTICLE_MAX_LINK_DENSITY
+            and features['word_count'] >= ARTICLE_MIN_WORDS):
+        return 'article'
+
+    if link_density >= INDEX_LINK_DENSITY or (types & INDEX_TYPES and not article_signal):
+        return 'index'
+
+    return 'other'
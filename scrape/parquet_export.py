@@ -0,0 +1,218 @@
+"""
+Columnar Corpus Export (parquet_export.py)
+=========================================
+
+Purpose:
+--------
+Streams the scraped corpus (per-page JSON files, JSONL shards or the
+content-addressed store) into partitioned Parquet or Arrow IPC tables so
+corpus-wide analytics (word counts, readability, domains, entity
+frequencies) run vectorised instead of in Python loops over JSON files.
+
+Tables:
+-------
+pages     one row per page: id, url, canonical_url, domain, title, language,
+          page_type, word_count, readability_score, published_time,
+          keyword list
+links     page_id, page_domain, text, url, canonical_url, link_domain
+images    page_id, url, alt
+entities  page_id, label, text
+
+canonical_url (url_canonical.py) is the join key for page/link graphs;
+it is recomputed on export for records saved before it was stored.
+
+Layout:
+-------
+<output_dir>/<table>/scrape_date=YYYY-MM-DD/part-00000.parquet
+
+Partitions are hive-style, so pyarrow.dataset / DuckDB / Spark can prune on
+scrape_date. Rows are buffered per table and partition and flushed as a row
+group every row_group_size rows, keeping memory bounded regardless of corpus
+size.
+
+Dependencies:
+------------
+- pyarrow (optional for the rest of the scraper; required here)
+
+Usage:
+------
+python parquet_export.py [input_dir] [output_dir] [--format parquet|ipc]
+"""
+
+import os
+import re
+import argparse
+from urllib.parse import urlparse, urljoin
+from typing import Dict, List
+
+from shard_writer import iter_output_records
+from url_canonical import canonicalize_url
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+DEFAULT_ROW_GROUP_SIZE = 50000
+_DATE_RE = re.compile(r'_(\d{4})(\d{2})(\d{2})_\d{6}$')
+
+
+def _schemas() -> Dict:
+    return {
+        'pages': pa.schema([
+            ('id', pa.string()), ('url', pa.string()), ('canonical_url', pa.string()), ('domain', pa.string()),
+            ('title', pa.string()), ('language', pa.string()), ('page_type', pa.string()),
+            ('word_count', pa.int64()), ('readability_score', pa.float64()),
+            ('published_time', pa.string()), ('keywords', pa.list_(pa.string()))
+        ]),
+        'links': pa.schema([
+            ('page_id', pa.string()), ('page_domain', pa.string()), ('text', pa.string()),
+            ('url', pa.string()), ('canonical_url', pa.string()), ('link_domain', pa.string())
+        ]),
+        'images': pa.schema([
+            ('page_id', pa.string()), ('url', pa.string()), ('alt', pa.string())
+        ]),
+        'entities': pa.schema([
+            ('page_id', pa.string()), ('label', pa.string()), ('text', pa.string())
+        ])
+    }
+
+
+def scrape_date(record: Dict) -> str:
+    """Partition key from the timestamp in the record ID."""
+    match = _DATE_RE.search(record.get('id', ''))
+    return '-'.join(match.groups()) if match else 'unknown'
+
+
+def record_rows(record: Dict) -> Dict[str, List[Dict]]:
+    """Flatten one page record into rows for each table."""
+    page_id = record.get('id', '')
+    domain = urlparse(record.get('url', '')).netloc
+    metadata = record.get('metadata') or {}
+    rows = {
+        'pages': [{
+            'id': page_id,
+            'url': record.get('url', ''),
+            'canonical_url': canonicalize_url(urljoin(record.get('url', ''), metadata.get('canonical_url') or '')),
+            'domain': domain,
+            'title': metadata.get('title', ''),
+            'language': record.get('language', ''),
+            'page_type': record.get('page_type', ''),
+            'word_count': record.get('word_count') or 0,
+            'readability_score': float(record.get('readability_score') or 0),
+            'published_time': metadata.get('published_time', ''),
+            'keywords': list(record.get('keywords') or [])
+        }],
+        'links': [
+            {'page_id': page_id, 'page_domain': domain, 'text': link.get('text', ''),
+             'url': link.get('url', ''),
+             'canonical_url': link.get('canonical_url') or canonicalize_url(link.get('url', '')),
+             'link_domain': urlparse(link.get('url', '')).netloc}
+            for link in record.get('links') or []
+        ],
+        'images': [
+            {'page_id': page_id, 'url': image.get('url', ''), 'alt': image.get('alt', '')}
+            for image in record.get('images') or []
+        ],
+        'entities': [
+            {'page_id': page_id, 'label': label, 'text': text}
+            for label, values in (record.get('entities') or {}).items()
+            for text in values
+        ]
+    }
+    return rows
+
+
+class CorpusExporter:
+    """Buffers rows per (table, partition) and writes bounded row groups."""
+
+    def __init__(self, output_dir: str, file_format: str = 'parquet',
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        if pa is None:
+            raise RuntimeError("Parquet/Arrow export requires the 'pyarrow' package")
+        if file_format not in ('parquet', 'ipc'):
+            raise ValueError(f"Unknown format: {file_format}")
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.schemas = _schemas()
+        self.buffers = {}
+        self.writers = {}
+        self.row_counts = {table: 0 for table in self.schemas}
+
+    def add(self, record: Dict):
+        partition = scrape_date(record)
+        for table, rows in record_rows(record).items():
+            if not rows:
+                continue
+            buffer = self.buffers.setdefault((table, partition), [])
+            buffer.extend(rows)
+            if len(buffer) >= self.row_group_size:
+                self._flush(table, partition)
+
+    def _writer(self, table: str, partition: str):
+        key = (table, partition)
+        if key not in self.writers:
+            directory = os.path.join(self.output_dir, table, f"scrape_date={partition}")
+            os.makedirs(directory, exist_ok=True)
+            extension = 'parquet' if self.file_format == 'parquet' else 'arrow'
+            path = os.path.join(directory, f"part-00000.{extension}")
+            schema = self.schemas[table]
+            if self.file_format == 'parquet':
+                self.writers[key] = pq.ParquetWriter(path, schema, compression='zstd')
+            else:
+                self.writers[key] = ipc.new_file(path, schema)
+        return self.writers[key]
+
+    def _flush(self, table: str, partition: str):
+        rows = self.buffers.pop((table, partition), [])
+        if not rows:
+            return
+        batch = pa.Table.from_pylist(rows, schema=self.schemas[table])
+        writer = self._writer(table, partition)
+        if self.file_format == 'parquet':
+            writer.write_table(batch, row_group_size=self.row_group_size)
+        else:
+            writer.write_table(batch)
+        self.row_counts[table] += len(rows)
+
+    def close(self) -> Dict[str, int]:
+        """Flush remaining buffers, close writers and return rows per table."""
+        for table, partition in list(self.buffers):
+            self._flush(table, partition)
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+        return self.row_counts
+
+
+def export_corpus(input_dir: str, output_dir: str, file_format: str = 'parquet',
+                  row_group_size: int = DEFAULT_ROW_GROUP_SIZE) -> Dict[str, int]:
+    """Stream the latest version of every record in input_dir into partitioned columnar tables."""
+    exporter = CorpusExporter(output_dir, file_format, row_group_size)
+    try:
+        for _, record in iter_output_records(input_dir, latest=True):
+            if record and not record.get('near_duplicate_of'):
+                exporter.add(record)
+    finally:
+        counts = exporter.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export scraped corpus to Parquet/Arrow tables")
+    parser.add_argument('input_dir', nargs='?', default='output_json')
+    parser.add_argument('output_dir', nargs='?', default='output_parquet')
+    parser.add_argument('--format', choices=['parquet', 'ipc'], default='parquet')
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    args = parser.parse_args()
+
+    counts = export_corpus(args.input_dir, args.output_dir, args.format, args.row_group_size)
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    main()
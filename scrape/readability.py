@@ -0,0 +1,149 @@
+"""
+Readability Metrics Engine (readability.py)
+==========================================
+
+Purpose:
+--------
+Computes readability statistics for scraped content in a single tokenisation
+pass, replacing the hard-coded readability_score in the scrape pipeline and
+the multi-pass regex + textstat approach in the Azure Function.
+
+Key Components:
+--------------
+1. Single-Pass Tokeniser
+   - One regex scan yields words and sentence terminators together
+   - Sentence, word, syllable and polysyllable counts gathered as it goes
+
+2. Memoised Syllable Lookup
+   - Vowel-group heuristic with common English adjustments
+   - Cached per lower-cased word, so repeated vocabulary is free
+
+3. Metrics
+   - Flesch Reading Ease (clamped to 0-100, as the Function did)
+   - Flesch-Kincaid Grade Level
+   - Sentence/word/syllable counts and per-word averages
+
+4. Batch Processing
+   - compute_readability_batch() scores many documents and shares the
+     syllable cache across them
+
+Usage:
+------
+from readability import compute_readability
+
+metrics = compute_readability(content_text)
+metrics['flesch_reading_ease']
+
+Benchmark against textstat: python benchmarks/readability_benchmark.py
+
+Note: A copy of this module lives in AzureFunction/ so the Function can be
+deployed on its own; keep the two in sync.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+# Words (with internal apostrophes), numbers, or runs of sentence terminators
+_TOKEN_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*|[0-9]+(?:[.,][0-9]+)*|[.!?]+")
+_VOWEL_GROUP_RE = re.compile(r"[aeiouy]+")
+
+SYLLABLE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=SYLLABLE_CACHE_SIZE)
+def count_syllables(word: str) -> int:
+    """Estimate the number of syllables in a lower-cased word."""
+    if not word:
+        return 0
+    if word[0].isdigit():
+        # Numbers are read aloud; one syllable per digit group is close enough
+        return 1
+    word = word.replace("'", "")
+    if len(word) <= 3:
+        return 1
+
+    count = len(_VOWEL_GROUP_RE.findall(word))
+
+    # Silent trailing 'e' (make, note) but not 'le' after a consonant (table)
+    if word.endswith('e') and not (word.endswith('le') and word[-3] not in 'aeiouy'):
+        count -= 1
+    # Silent 'es'/'ed' endings (makes, jumped) unless preceded by t/d/s sounds
+    elif word.endswith(('es', 'ed')) and word[-3] not in 'aeiouytdsxzhc':
+        count -= 1
+
+    return max(count, 1)
+
+
+def _empty_metrics() -> Dict:
+    return {
+        'flesch_reading_ease': 0.0,
+        'flesch_kincaid_grade': 0.0,
+        'sentence_count': 0,
+        'word_count': 0,
+        'syllable_count': 0,
+        'polysyllable_count': 0,
+        'avg_words_per_sentence': 0.0,
+        'avg_syllables_per_word': 0.0
+    }
+
+
+def compute_readability(text: str) -> Dict:
+    """Compute all readability metrics for text in one tokenisation pass."""
+    if not text or not isinstance(text, str):
+        return _empty_metrics()
+
+    sentences = 0
+    words = 0
+    syllables = 0
+    polysyllables = 0
+    words_in_sentence = 0
+
+    for match in _TOKEN_RE.finditer(text):
+        token = match.group()
+        first = token[0]
+        if first in '.!?':
+            if words_in_sentence:
+                sentences += 1
+                words_in_sentence = 0
+            continue
+
+        word_syllables = count_syllables(token.lower())
+        words += 1
+        words_in_sentence += 1
+        syllables += word_syllables
+        if word_syllables >= 3:
+            polysyllables += 1
+
+    # Text that does not end with a terminator still has a final sentence
+    if words_in_sentence:
+        sentences += 1
+
+    if not words:
+        return _empty_metrics()
+
+    words_per_sentence = words / sentences
+    syllables_per_word = syllables / words
+    reading_ease = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+    grade = 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59
+
+    return {
+        'flesch_reading_ease': round(max(0.0, min(reading_ease, 100.0)), 2),
+        'flesch_kincaid_grade': round(max(0.0, grade), 2),
+        'sentence_count': sentences,
+        'word_count': words,
+        'syllable_count': syllables,
+        'polysyllable_count': polysyllables,
+        'avg_words_per_sentence': round(words_per_sentence, 2),
+        'avg_syllables_per_word': round(syllables_per_word, 2)
+    }
+
+
+def compute_readability_batch(texts: Iterable[str]) -> List[Dict]:
+    """Compute readability metrics for many documents."""
+    return [compute_readability(text) for text in texts]
+
+
+def flesch_reading_ease_score(text: str) -> float:
+    """Convenience wrapper returning only the clamped Flesch Reading Ease."""
+    return compute_readability(text)['flesch_reading_ease']
@@ -0,0 +1,166 @@
+"""
+Selective Re-extraction (reextract.py)
+=====================================
+
+Purpose:
+--------
+Refreshes only the fields produced by extractors whose version has been
+bumped since a record was saved, without fetching or fully reprocessing
+the page. Each record stores the extractor versions that produced it
+('extractor_versions') and the content-store hash of its raw HTML
+('html_blob'); stale fields are recomputed from that archived HTML.
+
+Flow:
+-----
+1. Select the latest version of every page: the newest manifest row per
+   URL when a manifest is present (records that fail to load are logged
+   and skipped), otherwise by streaming the output directory
+2. Compare each record's extractor versions with EXTRACTOR_VERSIONS in
+   web_scraper_wrx.py; a stale extractor also makes its dependents stale
+   (e.g. page_type -> links, images, readability)
+3. Re-parse the archived HTML and rerun just the stale extractors, in
+   parallel across cores (ProcessPoolExecutor); HTML parsing dominates
+4. Save the updated record through save_to_json, which re-marks it
+   pending in the manifest so downstream inserts pick it up
+
+HTML archiving is off by default; records saved without it (the scraper
+enables it with KG_ARCHIVE_HTML=1) have no 'html_blob' and are reported as
+needing a re-scrape. NLP fields (keywords, entities) are not covered:
+they are refreshed on re-scrape via the block cache.
+
+Usage:
+------
+python reextract.py [output_dir] [--only links images] [--workers N] [--dry-run]
+"""
+
+import os
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from content_store import ContentStore
+from manifest import OutputManifest
+from shard_writer import iter_output_records
+import web_scraper_wrx
+from web_scraper_wrx import EXTRACTOR_VERSIONS, EXTRACTOR_DEPENDENTS, print_status
+
+DEFAULT_BATCH_SIZE = 256
+
+
+def stale_extractors(record: Dict, only: Optional[Iterable[str]] = None) -> List[str]:
+    """Extractors whose stored version is older than the current one, plus dependents."""
+    stored = record.get('extractor_versions') or {}
+    candidates = set(only) if only else set(EXTRACTOR_VERSIONS)
+    stale = {name for name in candidates if stored.get(name, 0) < EXTRACTOR_VERSIONS[name]}
+    for name in EXTRACTOR_VERSIONS:
+        if name in stale:
+            stale.update(EXTRACTOR_DEPENDENTS.get(name, ()))
+    return [name for name in EXTRACTOR_VERSIONS if name in stale]
+
+
+def iter_latest_records(output_dir: str) -> Iterator[Tuple[Dict, Optional[str]]]:
+    """Yield (record, mode) for the latest stored record of each URL."""
+    manifest_path = os.path.join(output_dir, 'manifest.sqlite')
+    if os.path.exists(manifest_path):
+        manifest = OutputManifest(manifest_path)
+        try:
+            for row in manifest.latest_rows():
+                try:
+                    record = manifest.load_record(row)
+                except Exception as e:
+                    print_status(f"ERROR loading {row['id']} from {row['location']}: {str(e)}")
+                    continue
+                if record:
+                    yield record, row['mode']
+        finally:
+            manifest.close()
+        return
+    for _, record in iter_output_records(output_dir, latest=True):
+        if record and not record.get('near_duplicate_of'):
+            yield record, None
+
+
+def _reextract(job: Tuple[Dict, List[str], str]) -> Tuple[str, Optional[Dict], Optional[str]]:
+    """Worker: recompute stale fields for one record from its archived HTML."""
+    record, extractors, cas_root = job
+    try:
+        html = ContentStore(cas_root).get_blob(record['html_blob'])
+        return record['id'], web_scraper_wrx.reextract_fields(record, html, extractors), None
+    except Exception as e:
+        return record['id'], None, str(e)
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def reextract(output_dir: str = 'output_json', only: Optional[Iterable[str]] = None,
+              workers: Optional[int] = None, dry_run: bool = False,
+              batch_size: int = DEFAULT_BATCH_SIZE) -> Dict:
+    """Re-extract stale fields across the stored corpus; returns run statistics."""
+    cas_root = os.path.join(output_dir, 'cas')
+    stats = {'records': 0, 'up_to_date': 0, 'missing_html': 0, 'reextracted': 0,
+             'failed': 0, 'stale_extractors': Counter()}
+
+    def jobs():
+        for record, mode in iter_latest_records(output_dir):
+            stats['records'] += 1
+            extractors = stale_extractors(record, only)
+            if not extractors:
+                stats['up_to_date'] += 1
+                continue
+            stats['stale_extractors'].update(extractors)
+            if not record.get('html_blob'):
+                stats['missing_html'] += 1
+                continue
+            yield (record, extractors, cas_root), mode
+
+    if dry_run:
+        for _ in jobs():
+            pass
+        return stats
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in _batches(jobs(), batch_size):
+            results = executor.map(_reextract, [job for job, _ in batch], chunksize=8)
+            for ((record, extractors, _), mode), (record_id, updates, error) in zip(batch, results):
+                if error:
+                    print_status(f"ERROR re-extracting {record_id}: {error}")
+                    stats['failed'] += 1
+                    continue
+                record.update(updates)
+                if web_scraper_wrx.save_to_json(record, output_dir, mode):
+                    stats['reextracted'] += 1
+                    print_status(f"Re-extracted {', '.join(extractors)} for {record_id}")
+                else:
+                    stats['failed'] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute fields produced by outdated extractors")
+    parser.add_argument('output_dir', nargs='?', default='output_json')
+    parser.add_argument('--only', nargs='+', choices=list(EXTRACTOR_VERSIONS),
+                        help="Limit to these extractors (dependents are still included)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--dry-run', action='store_true', help="Report stale records without changing them")
+    args = parser.parse_args()
+
+    stats = reextract(args.output_dir, args.only, args.workers, args.dry_run)
+    print_status(f"Records: {stats['records']}, up to date: {stats['up_to_date']}, "
+                 f"re-extracted: {stats['reextracted']}, failed: {stats['failed']}, "
+                 f"missing archived HTML: {stats['missing_html']}")
+    for name, count in stats['stale_extractors'].most_common():
+        print_status(f"  {name}: {count} stale")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,11 @@ Key Components:
 1. URL Queue Integration
    - Pulls URLs from queue manager in configurable batch sizes
    - Updates URL status (processing, completed, failed)
-   - Maintains queue synchronization
+   - Claims URLs under a lease and heartbeats it while the batch runs, so
+     several controller processes can share one SQLite-backed queue and a
+     crashed controller's URLs return to pending
+   - Reports each page's rel=canonical URL back to the queue, so other
+     variants of the page are recognised as duplicates
 
 2. Scraping Orchestration
    - Controls web_scraper_wrx.py execution
@@ -44,6 +48,8 @@ Configuration:
 - batch_size: Number of URLs to process in each batch (default: 5)
 - max_retries: Maximum retry attempts per URL (default: 3)
 - delay: Time between batch processing (default: 60 seconds)
+- output_dir: Where pages, the near-duplicate index and the block cache
+  are stored (default: output_json)
 
 Dependencies:
 ------------
@@ -62,9 +68,10 @@ The controller can run in two modes:
 Integration:
 -----------
 Part of the Knowledge Graph Web Scraper system:
-1. Reads from: URL queue (queue-list.json)
+1. Reads from: URL queue (queue-list.json, journal or queue.sqlite)
 2. Uses: web_scraper_wrx.py for scraping
 3. Produces: Scraped content JSONs in output_json/
+4. Produces: Hashed document vectors (doc_vectors.f32/.ids) in output_json/
 """
 
 
@@ -80,13 +87,17 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from search.url_queue import URLQueueManager
 
 # Import your existing scraper
-from web_scraper_wrx import scrape_webpage, save_to_json
+from web_scraper_wrx import scrape_webpage, save_to_json, model_pool, get_near_duplicate_index
+from doc_vectors import DocumentVectorStore, vectorize_record
 
 class ScraperController:
-    def __init__(self, batch_size: int = 5, max_retries: int = 3):
+    def __init__(self, batch_size: int = 5, max_retries: int = 3, output_dir: str = 'output_json'):
         self.queue_manager = URLQueueManager()
         self.batch_size = batch_size
         self.max_retries = max_retries
+        self.output_dir = output_dir
+        self.near_duplicate_index = get_near_duplicate_index(output_dir)
+        self.vector_store = DocumentVectorStore()
         self._setup_logging()
 
     def _setup_logging(self):
@@ -115,9 +126,12 @@ class ScraperController:
 
         self.logger.info(f"Processing batch of {len(urls)} URLs")
         
-        for url in urls:
+        for i, url in enumerate(urls):
             self._process_single_url(url)
-            
+            # Keep the leases on the rest of the batch alive
+            self.queue_manager.heartbeat(urls[i + 1:])
+        
+        self._log_language_throughput()
         return True
 
     def _process_single_url(self, url: str):
@@ -127,25 +141,57 @@ class ScraperController:
                 self.logger.info(f"Processing URL: {url} (Attempt {attempt + 1}/{self.max_retries})")
                 
                 # Use your existing scraper function
-                scraped_data = scrape_webpage(url)
+                scraped_data = scrape_webpage(url, self.output_dir)
+                
+                if scraped_data and scraped_data.get('near_duplicate_of'):
+                    self.logger.info(f"Near-duplicate of {scraped_data['near_duplicate_url']}, not saved: {url}")
+                    self.near_duplicate_index.add(scraped_data['id'], url)
+                    self.queue_manager.mark_url_status(url, "completed")
+                    return
                 
                 if scraped_data:
                     # Save using your existing function
-                    filepath = save_to_json(scraped_data)
+                    filepath = save_to_json(scraped_data, self.output_dir)
                     
                     if filepath:
                         self.logger.info(f"Successfully scraped and saved: {url}")
+                        # Only saved pages become canonical pages for near-duplicate detection
+                        self.near_duplicate_index.add(scraped_data['id'], url)
+                        self._store_vector(scraped_data)
                         self.queue_manager.mark_url_status(url, "completed")
+                        # rel=canonical feedback: the declared URL and future variants are not fetched
+                        self.queue_manager.record_canonical(url, scraped_data['metadata'].get('canonical_url'))
                         return
                 
                 self.logger.error(f"Failed to scrape URL: {url}")
-                time.sleep(2 ** attempt)  # Exponential backoff
                 
             except Exception as e:
                 self.logger.error(f"Error processing {url}: {str(e)}")
-                if attempt == self.max_retries - 1:
-                    self.queue_manager.mark_url_status(url, "failed")
-                time.sleep(2 ** attempt)
+            
+            if attempt < self.max_retries - 1:
+                time.sleep(2 ** attempt)  # Exponential backoff
+        
+        # Unsaved pages must not linger as near-duplicate candidates
+        self.near_duplicate_index.discard(url)
+        # Release the lease; otherwise the URL would be reclaimed and retried forever
+        self.queue_manager.mark_url_status(url, "failed")
+
+    def _store_vector(self, scraped_data: dict):
+        """Append the page's hashed vector for SIMILAR_TO edge building."""
+        try:
+            stop_words = model_pool.get_stopwords(scraped_data.get('language', 'en'))
+            self.vector_store.add(scraped_data['id'], vectorize_record(scraped_data, stop_words))
+        except Exception as e:
+            self.logger.error(f"Failed to store vector for {scraped_data.get('url')}: {str(e)}")
+
+    def _log_language_throughput(self):
+        """Log per-language NLP throughput counters."""
+        for language, stats in model_pool.get_throughput_stats().items():
+            self.logger.info(
+                f"Language {language}: {stats['documents']} docs "
+                f"({stats['skipped']} skipped), {stats['chars']} chars, "
+                f"{stats['docs_per_second']} docs/s, {stats['chars_per_second']} chars/s"
+            )
 
     def run(self, continuous: bool = False, delay: int = 60):
         """
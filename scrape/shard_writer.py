@@ -0,0 +1,322 @@
+"""
+Sharded JSONL Output (shard_writer.py)
+=====================================
+
+Purpose:
+--------
+Alternative output mode to one-pretty-JSON-file-per-page. Records are
+appended as compact JSON lines to size- or time-rotated shard files with a
+per-shard offset index, which avoids inode pressure and directory scans at
+100k+ pages and lets every consumer stream records instead of re-opening
+thousands of files.
+
+Key Components:
+--------------
+1. ShardedJSONLWriter
+   - Appends one compact JSON line per record
+   - Rotates to a new shard when max_shard_bytes or max_shard_age is hit
+   - Writes "id<TAB>offset<TAB>length" to the shard's .idx file
+   - Trims a torn trailing line left by a crash before resuming a shard
+   - Several processes may append to one directory: recovery, rotation,
+     the record and its index entry are done under an exclusive lock on
+     .shards.lock (fcntl; single-process where fcntl is unavailable), and
+     every writer follows the newest shard, so offsets never collide
+
+2. Optional Compression (see compression.py)
+   - compression='gzip' or 'zstd' writes shard-NNNNNN.jsonl.gz / .jsonl.zst
+   - Every record is its own compressed frame; the index points at frames
+
+3. Readers
+   - iter_shard_records(): streams every record, shard by shard, with
+     streaming decompression
+   - iter_latest_shard_records(): streams only the newest version of each
+     record ID, in shard order, via the offset index
+   - iter_output_records(): streams shards, content-addressed pages and
+     legacy per-page .json files from the same directory, so consumers work
+     in any output mode (latest=True skips superseded shard records)
+   - load_offset_index() / read_record(): random access by record ID
+     (the newest entry for an ID wins)
+
+Layout (in the output directory):
+--------------------------------
+shard-000001.jsonl      shard-000001.idx
+shard-000002.jsonl.zst  shard-000002.idx
+...
+
+Usage:
+------
+writer = ShardedJSONLWriter('output_json')
+writer.write(record)
+
+for source, record in iter_output_records('output_json'):
+    ...
+"""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer process per output directory
+    fcntl = None
+
+from compression import (SUFFIXES, codec_for_path, compress_frame, decompress_frame,
+                         open_stream, validate_codec)
+from content_store import ContentStore
+from json_codec import dumpb, loads, load, DECODE_ERRORS
+
+SHARD_PREFIX = 'shard-'
+SHARD_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx'
+LOCK_NAME = '.shards.lock'
+DEFAULT_MAX_SHARD_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_SHARD_AGE = 3600  # seconds
+
+_SHARD_RE = re.compile(r'^shard-(\d{6})\.jsonl(\.gz|\.zst)?$')
+
+
+def list_shards(output_dir: str) -> list:
+    """Shard file names in the directory, oldest first."""
+    if not os.path.isdir(output_dir):
+        return []
+    return sorted(name for name in os.listdir(output_dir) if _SHARD_RE.match(name))
+
+
+def _index_path(shard_path: str) -> str:
+    return shard_path[:shard_path.rindex(SHARD_SUFFIX)] + INDEX_SUFFIX
+
+
+class ShardedJSONLWriter:
+    """Append-only, rotated JSONL shard writer with an offset index."""
+
+    def __init__(self, output_dir: str = 'output_json',
+                 max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES,
+                 max_shard_age: float = DEFAULT_MAX_SHARD_AGE,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None):
+        validate_codec(compression)
+        self.output_dir = output_dir
+        self.max_shard_bytes = max_shard_bytes
+        self.max_shard_age = max_shard_age
+        self.compression = compression
+        self.compression_level = compression_level
+        self._shard_file = None
+        self._index_file = None
+        self._lock_file = None
+        self.shard_path = None
+        self._opened_at = 0.0
+        os.makedirs(output_dir, exist_ok=True)
+
+        with self._locked():
+            shards = list_shards(output_dir)
+            if shards:
+                last = os.path.join(output_dir, shards[-1])
+                self._recover(last)
+                # Only resume a shard written with the same codec
+                if codec_for_path(last) == compression and os.path.getsize(last) < max_shard_bytes:
+                    self._open(last)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock shared by every writer of this output directory."""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = open(os.path.join(self.output_dir, LOCK_NAME), 'ab')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _recover(self, shard_path: str):
+        """Trim a torn final record and any index entries pointing past it."""
+        index_path = _index_path(shard_path)
+        lines = []
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines(keepends=True)
+
+        with open(shard_path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if codec_for_path(shard_path) is not None:
+                # Frames have no delimiter; the index says where the last one ends
+                valid_size = 0
+                for line in lines:
+                    parts = line.rstrip('\n').split('\t')
+                    if len(parts) == 3 and line.endswith('\n'):
+                        valid_size = max(valid_size, int(parts[1]) + int(parts[2]))
+                valid_size = min(valid_size, size)
+            elif size == 0:
+                valid_size = 0
+            else:
+                f.seek(size - 1)
+                if f.read(1) == b'\n':
+                    valid_size = size
+                else:
+                    # Walk back to the last complete line
+                    f.seek(0)
+                    valid_size = f.read().rfind(b'\n') + 1
+            if valid_size < size:
+                f.truncate(valid_size)
+
+        kept = []
+        for line in lines:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) == 3 and line.endswith('\n') and int(parts[1]) + int(parts[2]) <= valid_size:
+                kept.append(line)
+        if len(kept) != len(lines):
+            with open(index_path, 'w', encoding='utf-8') as f:
+                f.writelines(kept)
+
+    def _open(self, shard_path: str):
+        self._close_shard()
+        self.shard_path = shard_path
+        self._shard_file = open(shard_path, 'ab')
+        self._index_file = open(_index_path(shard_path), 'a', encoding='utf-8')
+        self._opened_at = time.time()
+
+    def _rotate(self):
+        shards = list_shards(self.output_dir)
+        next_number = int(_SHARD_RE.match(shards[-1]).group(1)) + 1 if shards else 1
+        suffix = SHARD_SUFFIX + SUFFIXES[self.compression]
+        self._open(os.path.join(self.output_dir, f"{SHARD_PREFIX}{next_number:06d}{suffix}"))
+
+    def _newer_shard(self) -> Optional[str]:
+        """Newest shard opened by another writer after ours, if any (shard numbers only grow by one)."""
+        newest = None
+        number = int(_SHARD_RE.match(os.path.basename(self.shard_path)).group(1))
+        while True:
+            number += 1
+            for suffix in SUFFIXES.values():
+                path = os.path.join(self.output_dir, f"{SHARD_PREFIX}{number:06d}{SHARD_SUFFIX}{suffix}")
+                if os.path.exists(path):
+                    newest = path
+                    break
+            else:
+                return newest
+
+    def _follow_rotation(self):
+        """Switch to a shard another writer rotated to, or drop ours if that shard uses another codec."""
+        if self._shard_file is None:
+            return
+        newest = self._newer_shard()
+        if newest is None:
+            return
+        if codec_for_path(newest) == self.compression:
+            self._open(newest)
+        else:
+            self._close_shard()
+
+    def _needs_rotation(self) -> bool:
+        if self._shard_file is None:
+            return True
+        # Other writers append too, so the file size rather than our position
+        return (os.fstat(self._shard_file.fileno()).st_size >= self.max_shard_bytes
+                or time.time() - self._opened_at >= self.max_shard_age)
+
+    def write(self, record: Dict) -> Tuple[str, int, int]:
+        """Append a record; returns (shard_path, offset, length)."""
+        line = dumpb(record, pretty=False) + b'\n'
+        line = compress_frame(line, self.compression, self.compression_level)
+
+        with self._locked():
+            self._follow_rotation()
+            if self._needs_rotation():
+                self._rotate()
+            offset = os.fstat(self._shard_file.fileno()).st_size
+            self._shard_file.write(line)
+            self._shard_file.flush()
+            # Index after the data, so an index entry never points at missing bytes
+            self._index_file.write(f"{record['id']}\t{offset}\t{len(line)}\n")
+            self._index_file.flush()
+        return self.shard_path, offset, len(line)
+
+    def _close_shard(self):
+        for f in (self._shard_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._shard_file = None
+        self._index_file = None
+
+    def close(self):
+        self._close_shard()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def iter_shard_records(output_dir: str) -> Iterator[Tuple[str, Dict]]:
+    """Stream (shard_name, record) pairs from every shard, oldest first."""
+    for shard in list_shards(output_dir):
+        with open_stream(os.path.join(output_dir, shard)) as f:
+            for line in f:
+                if line.endswith(b'\n'):
+                    yield shard, loads(line)
+
+
+def iter_latest_shard_records(output_dir: str) -> Iterator[Tuple[str, Dict]]:
+    """Stream (shard_name, record) for the newest version of each record ID, in shard order."""
+    current, f = None, None
+    try:
+        for shard, offset, length in sorted(load_offset_index(output_dir).values()):
+            if shard != current:
+                if f is not None:
+                    f.close()
+                current, f = shard, open(os.path.join(output_dir, shard), 'rb')
+            f.seek(offset)
+            yield shard, loads(decompress_frame(f.read(length), codec_for_path(shard)))
+    finally:
+        if f is not None:
+            f.close()
+
+
+def iter_output_records(input_dir: str, latest: bool = False) -> Iterator[Tuple[str, Dict]]:
+    """
+    Stream (source, record) pairs from shards and legacy per-page JSON files.
+
+    Source is the shard name for shard records, the page hash for
+    content-addressed pages (input_dir/cas) and the file name for
+    one-file-per-page output (.json, .json.gz or .json.zst). Unreadable
+    legacy files yield (name, None). With latest=True, shard records
+    superseded by a later write of the same ID are skipped.
+    """
+    yield from (iter_latest_shard_records if latest else iter_shard_records)(input_dir)
+    yield from ContentStore(os.path.join(input_dir, 'cas')).iter_pages()
+
+    if not os.path.isdir(input_dir):
+        return
+    for filename in os.listdir(input_dir):
+        if not filename.endswith(('.json', '.json.gz', '.json.zst')):
+            continue
+        try:
+            with open_stream(os.path.join(input_dir, filename)) as f:
+                yield filename, load(f)
+        except (OSError, EOFError) + DECODE_ERRORS:
+            yield filename, None
+
+
+def load_offset_index(output_dir: str) -> Dict[str, Tuple[str, int, int]]:
+    """Map record ID -> (shard_name, offset, length); newer writes win."""
+    index = {}
+    for shard in list_shards(output_dir):
+        index_path = _index_path(os.path.join(output_dir, shard))
+        if not os.path.exists(index_path):
+            continue
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record_id, offset, length = line.rstrip('\n').split('\t')
+                index[record_id] = (shard, int(offset), int(length))
+    return index
+
+
+def read_record(output_dir: str, shard: str, offset: int, length: int) -> Optional[Dict]:
+    """Read one record at a known offset."""
+    with open(os.path.join(output_dir, shard), 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    return loads(decompress_frame(data, codec_for_path(shard))) if data else None
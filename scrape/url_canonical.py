@@ -0,0 +1,218 @@
+"""
+URL Canonicalisation (url_canonical.py)
+======================================
+
+Purpose:
+--------
+One canonical form per page, shared by the URL queue (duplicate checks),
+extract_links and the exported link/page tables, so that http/https,
+www., trailing-slash, tracking-parameter, fragment and AMP variants of an
+article are recognised as the same URL before anything is fetched.
+
+The canonical form is a key, not a fetch target: the queue still fetches
+the URL as it was discovered.
+
+Key Components:
+--------------
+1. Rule-based normalisation (normalize)
+   - Scheme and host lower-cased; http -> https; default ports, trailing
+     dots and userinfo dropped; IDN hosts encoded to punycode
+   - Host prefixes 'www.', 'amp.' (and optionally 'm.') removed
+   - Path: duplicate slashes collapsed, trailing slash and index files
+     (index.html, default.aspx, ...) removed
+   - AMP variants: AMP cache URLs (*.cdn.ampproject.org/c/s/...), /amp
+     path segments, .amp suffixes and amp / outputType=amp parameters
+     (other outputType values select different content and are kept)
+   - Query: tracking parameters removed (utm_*, fbclid, gclid, ...; extend
+     with KG_URL_STRIP_PARAMS=a,b,prefix_*), remaining pairs sorted
+   - Fragment removed
+
+2. rel=canonical feedback (learn / canonicalize)
+   - When a scraped page declares <link rel="canonical">, learn() maps the
+     fetched URL's key to the declared one; canonicalize() follows these
+     aliases, so later variants resolve to the page's own canonical URL
+   - Aliases are appended to a JSONL file and replayed on start-up; each
+     line keeps the fetched and declared URLs as seen, next to their keys,
+     so the file can be audited
+
+Usage:
+------
+canonicalize_url('http://www.Example.com/a/?utm_source=x#top')
+    -> 'https://example.com/a'
+
+canonicalizer = URLCanonicalizer('queue/canonical_aliases.jsonl')
+key = canonicalizer.canonicalize(url)
+canonicalizer.learn(url, declared_canonical_url)
+"""
+
+import os
+import re
+import json
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Iterable, Optional
+
+# Exact parameter names and name prefixes (ending in '*') dropped from queries
+DEFAULT_STRIP_PARAMS = (
+    'utm_*', 'fbclid', 'gclid', 'gclsrc', 'dclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', 'ref_src', 'ref_url', 'cmpid', 'ocid',
+    'ncid', 'smid', 'amp'
+)
+# Parameters dropped only with one of these (case-insensitive) values
+DEFAULT_STRIP_PARAM_VALUES = {'outputtype': ('amp',)}
+HOST_PREFIXES = ('www.', 'amp.')
+INDEX_FILES = ('index.html', 'index.htm', 'index.php', 'default.aspx', 'default.asp')
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+AMP_CACHE_SUFFIX = '.cdn.ampproject.org'
+MAX_ALIAS_HOPS = 8
+
+_SLASHES_RE = re.compile(r'/{2,}')
+
+
+def _env_params() -> tuple:
+    extra = os.getenv('KG_URL_STRIP_PARAMS', '')
+    return tuple(name.strip().lower() for name in extra.split(',') if name.strip())
+
+
+class URLCanonicalizer:
+    """Rule-based URL canonicaliser with learned rel=canonical aliases."""
+
+    def __init__(self, aliases_path: Optional[str] = None,
+                 strip_params: Iterable[str] = DEFAULT_STRIP_PARAMS,
+                 strip_mobile: bool = False):
+        params = [name.lower() for name in strip_params] + list(_env_params())
+        self.strip_names = {name for name in params if not name.endswith('*')}
+        self.strip_prefixes = tuple(name[:-1] for name in params if name.endswith('*'))
+        self.strip_values = DEFAULT_STRIP_PARAM_VALUES
+        self.host_prefixes = HOST_PREFIXES + (('m.',) if strip_mobile else ())
+        self.aliases_path = aliases_path
+        self.aliases = {}   # canonical key -> declared canonical key
+        self._load()
+
+    def _load(self):
+        if not self.aliases_path or not os.path.exists(self.aliases_path):
+            return
+        with open(self.aliases_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from a crash; everything before it is valid
+                    continue
+                self.aliases[entry['url']] = entry['canonical']
+
+    def _strip_param(self, name: str, value: str) -> bool:
+        name = name.lower()
+        return (name in self.strip_names or name.startswith(self.strip_prefixes)
+                or value.lower() in self.strip_values.get(name, ()))
+
+    def _normalize_host(self, host: str) -> str:
+        host = host.lower().rstrip('.')
+        try:
+            host = host.encode('idna').decode('ascii')
+        except UnicodeError:
+            pass
+        for prefix in self.host_prefixes:
+            if host.startswith(prefix) and host.count('.') > 1:
+                host = host[len(prefix):]
+        return host
+
+    def _normalize_path(self, path: str) -> str:
+        path = _SLASHES_RE.sub('/', path)
+        segments = path.split('/')
+        # AMP variants: /amp/story, /story/amp, /story.amp, /story.amp.html
+        if len(segments) > 2 and segments[1].lower() == 'amp':
+            del segments[1]
+        if len(segments) > 2 and segments[-1].lower() == 'amp':
+            segments.pop()
+        elif len(segments) > 2 and not segments[-1] and segments[-2].lower() == 'amp':
+            del segments[-2:]
+        last = segments[-1]
+        if last.lower().endswith('.amp'):
+            last = last[:-4]
+        elif last.lower().endswith('.amp.html'):
+            last = last[:-9] + '.html'
+        if last.lower() in INDEX_FILES:
+            last = ''
+        segments[-1] = last
+        path = '/'.join(segments).rstrip('/')
+        return path or '/'
+
+    def normalize(self, url: str) -> str:
+        """Canonical form of url by rules alone; non-HTTP(S) URLs are returned stripped."""
+        url = url.strip()
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS or not parts.hostname:
+            return url
+
+        host = parts.hostname
+        path = parts.path
+        # AMP cache: https://example-com.cdn.ampproject.org/c/s/example.com/story
+        if host.lower().endswith(AMP_CACHE_SUFFIX):
+            match = re.match(r'^/[a-z]/(?:s/)?([^/]+)(/.*)?$', path)
+            if match:
+                host, path = match.group(1), match.group(2) or '/'
+                port = None
+
+        host = self._normalize_host(host)
+        if ':' in host:
+            host = f"[{host}]"  # IPv6 literal
+        if port and port != DEFAULT_PORTS[scheme]:
+            host = f"{host}:{port}"
+        query = sorted(
+            (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not self._strip_param(name, value)
+        )
+        return urlunsplit(('https', host, self._normalize_path(path), urlencode(query), ''))
+
+    def canonicalize(self, url: str) -> str:
+        """normalize(url), then any learned rel=canonical aliases."""
+        key = self.normalize(url)
+        for _ in range(MAX_ALIAS_HOPS):
+            target = self.aliases.get(key)
+            if target is None:
+                break
+            key = target
+        return key
+
+    def learn(self, url: str, declared: Optional[str]) -> Optional[str]:
+        """
+        Record that the page fetched from url declares `declared` as canonical.
+
+        Returns the declared page's canonical key, or None if there was
+        nothing new to learn (no or non-HTTP declaration, same page, or an
+        alias that would form a cycle).
+        """
+        if not declared:
+            return None
+        key = self.normalize(url)
+        if key in self.aliases:
+            # First declaration wins; an unaliased key also rules out cycles below
+            return None
+        target = self.canonicalize(declared)
+        if target == key or not target.startswith('https://'):
+            return None
+        self.aliases[key] = target
+        if self.aliases_path:
+            directory = os.path.dirname(self.aliases_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.aliases_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'url': key, 'canonical': target,
+                                    'source_url': url, 'declared_url': declared}) + '\n')
+        return target
+
+
+_default = URLCanonicalizer()
+
+
+def canonicalize_url(url: str) -> str:
+    """Rule-based canonical form of url (no learned aliases)."""
+    return _default.normalize(url)
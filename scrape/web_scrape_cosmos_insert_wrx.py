@@ -10,8 +10,8 @@ insertion of pre-processed web content stored in JSON format.
 
 Library Dependencies:
 -------------------
-json
-    - Handles reading and parsing of JSON files
+json_codec (local module)
+    - Handles reading and parsing of JSON files (orjson/msgspec when installed)
     - Maintains data structure integrity
     - Ensures proper encoding/decoding of web content
 
@@ -20,6 +20,11 @@ random
     - Ensures database record uniqueness
     - Prevents ID collisions
 
+doc_shaper (local module)
+    - Splits records over the size budget into a parent and chunk documents
+    - Keeps every document under the Cosmos DB item size limit
+    - Re-assembles chunked fields lazily on read
+
 azure.cosmos
     - Azure Cosmos DB SDK
     - Manages database connections and operations
@@ -64,6 +69,7 @@ Workflow:
 2. Database Operations
    - Connects to Cosmos DB
    - Generates unique IDs
+   - Shapes large records into chunk documents linked by ID
    - Handles data insertion
    - Verifies successful storage
 
@@ -90,8 +96,9 @@ Note: This script is designed to work with the web scraper output format,
 maintaining data consistency and enabling knowledge graph construction.
 """
 
-import json
 import random
+from json_codec import load
+from doc_shaper import shape_document, LazyDocument
 from azure.cosmos import CosmosClient
 from datetime import datetime
 
@@ -111,8 +118,8 @@ def print_status(message: str):
 def read_json(file_path):
     print_status(f"Reading JSON file: {file_path}")
     try:
-        with open(file_path, 'r', encoding='utf-8') as json_file:
-            data = json.load(json_file)
+        with open(file_path, 'rb') as json_file:
+            data = load(json_file)
             print_status(f"Successfully read JSON file")
             return data
     except Exception as e:
@@ -129,8 +136,11 @@ def insert_data_into_cosmosdb(data):
         # Generate random ID
         data["id"] = str(random.randint(100000, 999999))
         
-        print_status("Inserting data into Cosmos DB...")
-        container.upsert_item(data)
+        # Chunks are written before the parent that references them
+        documents = shape_document(data)
+        print_status(f"Inserting data into Cosmos DB ({len(documents)} document(s))...")
+        for document in documents:
+            container.upsert_item(document)
         print_status(f"SUCCESS: Data inserted with ID: {data['id']}")
         return data["id"]
     
@@ -159,6 +169,22 @@ def query_data_from_cosmosdb(doc_id):
         print_status(f"ERROR: Failed to query data: {str(e)}")
         return False
 
+def fetch_document_from_cosmosdb(doc_id):
+    """Read a document; chunked fields are fetched when first accessed."""
+    client = CosmosClient(COSMOS_DB_ENDPOINT, credential=COSMOS_DB_KEY)
+    database = client.get_database_client(DATABASE_NAME)
+    container = database.get_container_client(CONTAINER_NAME)
+    
+    def read(item_id):
+        query = "SELECT * FROM c WHERE c.id = @id"
+        items = list(container.query_items(query=query, parameters=[{"name": "@id", "value": item_id}],
+                                           enable_cross_partition_query=True))
+        if not items:
+            raise KeyError(f"Document not found: {item_id}")
+        return items[0]
+    
+    return LazyDocument(read(doc_id), read)
+
 if __name__ == "__main__":
     print_status("Starting Cosmos DB insertion process")
     
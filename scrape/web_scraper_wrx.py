@@ -93,6 +93,10 @@ urlparse, urljoin (from urllib.parse)
     - Combines relative URLs with base URLs
     - Handles URL components and construction
 
+url_canonical (local module)
+    - Canonical URL keys for links and metadata.canonical_url
+    - Shared with the URL queue's duplicate checks
+
 spacy
     - Natural Language Processing (NLP) library
     - Performs entity recognition
@@ -128,6 +132,11 @@ random
     - Rotates through User-Agents
     - Adds variation to requests
 
+readability (local module)
+    - Single-pass Flesch / Flesch-Kincaid metrics
+    - Memoised syllable counting
+    - Shared with the Azure Function
+
 These libraries together provide a robust toolkit for:
 - Web scraping and content extraction
 - Text processing and analysis
@@ -144,13 +153,23 @@ import json
 import os
 import re
 from urllib.parse import urlparse, urljoin
-import spacy
+import time
 from datetime import datetime
 import nltk
 from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
 from collections import Counter
 import random
+from readability import compute_readability
+from language_gate import detect_language, LanguageModelPool, UNDETERMINED
+from near_duplicate import NearDuplicateIndex
+from block_cache import BlockResultStore, segment_blocks, analyse_blocks
+from page_classifier import extract_page_features, classify_page, EXTRACTION_PLANS
+from shard_writer import ShardedJSONLWriter
+from compression import SUFFIXES, compress_frame
+from content_store import ContentStore
+from json_codec import dumpb, PRETTY_JSON
+from manifest import OutputManifest
+from url_canonical import canonicalize_url
 
 # Add these at the top of your existing web_scraper.py file
 USER_AGENTS = [
@@ -187,8 +206,43 @@ print_status("Downloading NLTK data...")
 nltk.download('punkt', quiet=False)
 nltk.download('stopwords', quiet=False)
 
-print_status("Loading spaCy model...")
-nlp = spacy.load('en_core_web_sm')
+# spaCy models are loaded lazily per detected language
+model_pool = LanguageModelPool()
+
+# Output mode: 'file' (one pretty JSON file per page), 'jsonl' (rotated shards)
+# or 'cas' (content-addressed blobs + page records)
+OUTPUT_MODE = os.getenv('KG_OUTPUT_MODE', 'file')
+# Optional output compression: 'gzip' or 'zstd' (unset = uncompressed)
+OUTPUT_COMPRESSION = os.getenv('KG_OUTPUT_COMPRESSION') or None
+# Bump when the record layout changes; stored per record and in the manifest
+SCHEMA_VERSION = 1
+# Bump an extractor's version whenever its output changes; records store the
+# versions that produced them and reextract.py refreshes only stale fields.
+# Listed in dependency order.
+EXTRACTOR_VERSIONS = {
+    'structured_data': 1,
+    'processed_json_ld': 1,
+    'page_type': 2,
+    'social_media_metadata': 1,
+    'links': 2,
+    'images': 1,
+    'readability': 1
+}
+# Extractors whose output depends on another extractor's result
+EXTRACTOR_DEPENDENTS = {
+    'structured_data': ('processed_json_ld', 'page_type'),
+    'page_type': ('links', 'images', 'readability')
+}
+# Opt-in: keep the raw HTML of every scraped page as a content-store blob for
+# re-extraction (reextract.py), compressed with KG_ARCHIVE_COMPRESSION (default gzip)
+ARCHIVE_HTML = os.getenv('KG_ARCHIVE_HTML', '0').lower() in ('1', 'true', 'yes')
+ARCHIVE_COMPRESSION = os.getenv('KG_ARCHIVE_COMPRESSION', 'gzip') or None
+_shard_writers = {}
+_content_stores = {}
+_archive_stores = {}
+_manifests = {}
+_near_duplicate_indexes = {}
+_block_stores = {}
 
 def generate_file_id(url: str) -> str:
     """Generate a SEO-friendly filename with timestamp."""
@@ -228,28 +282,27 @@ def clean_text(text: str) -> str:
     cleaned = re.sub(r'\s+', ' ', text.strip())
     return cleaned
 
-def extract_keywords(text: str, num_keywords: int = 10) -> list:
-    """Extract main keywords from text."""
-    print_status("Extracting keywords from content...")
-    words = word_tokenize(text.lower())
-    stop_words = set(stopwords.words('english'))
-    words = [word for word in words if word.isalnum() and word not in stop_words]
-    keywords = [word for word, _ in Counter(words).most_common(num_keywords)]
-    print_status(f"Found {len(keywords)} keywords")
-    return keywords
-
-def extract_entities(text: str) -> dict:
-    """Extract named entities from text."""
-    print_status("Extracting named entities...")
-    doc = nlp(text)
-    entities = {}
-    for ent in doc.ents:
-        if ent.label_ not in entities:
-            entities[ent.label_] = []
-        if ent.text not in entities[ent.label_]:
-            entities[ent.label_].append(ent.text)
-    print_status(f"Found entities in {len(entities)} categories")
-    return entities
+def count_keywords(text: str, language: str = 'en') -> Counter:
+    """Count candidate keywords (non-stopword alphanumeric tokens) in text."""
+    words = word_tokenize(text.lower(), language=model_pool.get_nltk_language(language))
+    stop_words = model_pool.get_stopwords(language)
+    return Counter(word for word in words if word.isalnum() and word not in stop_words)
+
+def extract_entities_batch(texts: list, language: str = 'en') -> list:
+    """Extract named entities from several texts in one spaCy pipe."""
+    nlp = model_pool.get_nlp(language)
+    if nlp is None:
+        return [{} for _ in texts]
+    results = []
+    for doc in nlp.pipe(texts):
+        entities = {}
+        for ent in doc.ents:
+            if ent.label_ not in entities:
+                entities[ent.label_] = []
+            if ent.text not in entities[ent.label_]:
+                entities[ent.label_].append(ent.text)
+        results.append(entities)
+    return results
 
 def extract_social_metadata(soup: BeautifulSoup) -> dict:
     """Extract social media metadata."""
@@ -272,6 +325,34 @@ def extract_social_metadata(soup: BeautifulSoup) -> dict:
         'twitter': twitter_data
     }
 
+def extract_json_ld(soup: BeautifulSoup) -> list:
+    """Extract JSON-LD structured data blocks."""
+    print_status("Extracting JSON-LD structured data...")
+    structured_data = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            structured_data.append(json.loads(script.string or ''))
+        except json.JSONDecodeError as e:
+            print_status(f"Skipping invalid JSON-LD block: {str(e)}")
+    print_status(f"Found {len(structured_data)} JSON-LD blocks")
+    return structured_data
+
+def process_json_ld(structured_data: list) -> list:
+    """Summarise Article JSON-LD blocks."""
+    processed = []
+    for item in structured_data:
+        if isinstance(item, dict) and item.get('@type') in ('Article', 'NewsArticle', 'BlogPosting'):
+            author = item.get('author', {})
+            if isinstance(author, list):
+                author = author[0] if author else {}
+            processed.append({
+                'type': item.get('@type'),
+                'headline': item.get('headline'),
+                'datePublished': item.get('datePublished'),
+                'author': author.get('name') if isinstance(author, dict) else author
+            })
+    return processed
+
 def extract_images(soup: BeautifulSoup, base_url: str) -> list:
     """Extract image information from the page."""
     print_status("Extracting images...")
@@ -289,21 +370,65 @@ def extract_images(soup: BeautifulSoup, base_url: str) -> list:
     return images
 
 def extract_links(soup: BeautifulSoup, base_url: str) -> list:
-    """Extract links from the page."""
+    """Extract links from the page, one per canonical URL (first occurrence wins)."""
     print_status("Extracting links...")
     links = []
+    seen = set()
     for link in soup.find_all('a', href=True):
         href = link['href']
         if href:
+            absolute_url = urljoin(base_url, href)
+            canonical_url = canonicalize_url(absolute_url)
+            if canonical_url in seen:
+                continue
+            seen.add(canonical_url)
             links.append({
                 'text': clean_text(link.text),
-                'url': urljoin(base_url, href)
+                'url': absolute_url,
+                'canonical_url': canonical_url
             })
     print_status(f"Found {len(links)} links")
     return links
 
-def scrape_webpage(url: str) -> dict:
-    """Main function to scrape webpage and format data."""
+def run_extractors(soup: BeautifulSoup, url: str, main_content, content_text: str,
+                   extractors, previous: dict = None) -> dict:
+    """Run the named versioned extractors; missing inputs come from the previous record."""
+    previous = previous or {}
+    results = {}
+    if 'structured_data' in extractors:
+        results['structured_data'] = extract_json_ld(soup)
+    structured_data = results.get('structured_data', previous.get('structured_data') or [])
+    if 'processed_json_ld' in extractors:
+        results['processed_json_ld'] = process_json_ld(structured_data)
+    if 'page_type' in extractors:
+        results['page_features'] = extract_page_features(soup, main_content, content_text, structured_data)
+        results['page_type'] = classify_page(results['page_features'])
+    # Records from before page classification were fully extracted
+    plan = EXTRACTION_PLANS[results.get('page_type', previous.get('page_type', 'article'))]
+    if 'social_media_metadata' in extractors:
+        results['social_media_metadata'] = extract_social_metadata(soup)
+    if 'links' in extractors:
+        results['links'] = extract_links(soup, url) if plan['links'] else []
+    if 'images' in extractors:
+        results['images'] = extract_images(soup, url) if plan['images'] else []
+    if 'readability' in extractors:
+        readability = compute_readability(content_text if plan['readability'] else '')
+        results['readability'] = readability
+        results['readability_score'] = readability['flesch_reading_ease']
+    return results
+
+def reextract_fields(record: dict, html: str, extractors) -> dict:
+    """Recompute the given extractors' fields for a stored record from its archived HTML."""
+    soup = BeautifulSoup(html, 'html.parser')
+    main_content = soup.find('main') or soup.find('article') or soup.find('body')
+    updates = run_extractors(soup, record['url'], main_content, record.get('content', ''), extractors, record)
+    versions = dict(record.get('extractor_versions') or {})
+    versions.update({name: EXTRACTOR_VERSIONS[name] for name in extractors})
+    updates['extractor_versions'] = versions
+    return updates
+
+def scrape_webpage(url: str, output_dir: str = 'output_json') -> dict:
+    """Main function to scrape webpage and format data; raw HTML is archived under output_dir."""
     print_status(f"Starting to scrape URL: {url}")
     try:
         # Setup session with enhanced headers
@@ -346,11 +471,39 @@ def scrape_webpage(url: str) -> dict:
         content_text = clean_text(main_content.get_text()) if main_content else ""
         print_status(f"Extracted {len(content_text)} characters of main content")
         
+        # Skip everything downstream for copies of already scraped content
+        file_id = generate_file_id(url)
+        # Indexed only once the page is saved (or handled as a duplicate), see main()
+        duplicate = get_near_duplicate_index(output_dir).check(url, content_text)
+        if duplicate:
+            print_status(f"Near-duplicate of {duplicate['canonical_url']} (distance {duplicate['distance']}), skipping processing")
+            return {
+                'id': file_id,
+                'url': url,
+                'near_duplicate_of': duplicate['canonical_id'],
+                'near_duplicate_url': duplicate['canonical_url'],
+                'near_duplicate_distance': duplicate['distance']
+            }
+        
+        # Versioned extractors; page classification lets index/product pages skip NLP
+        extracted = run_extractors(soup, url, main_content, content_text, EXTRACTOR_VERSIONS)
+        page_features = extracted['page_features']
+        page_type = extracted['page_type']
+        plan = EXTRACTION_PLANS[page_type]
+        print_status(f"Classified page as '{page_type}' (link density {page_features['link_density']}, "
+                     f"{page_features['word_count']} words)")
+        
+        # Identify language before any NLP work
+        language, confidence = detect_language(content_text)
+        run_nlp = plan['nlp'] and language != UNDETERMINED and model_pool.is_supported(language)
+        print_status(f"Detected language: {language} (confidence {confidence}, NLP {'enabled' if run_nlp else 'skipped'})")
+        
         # Build structured data
         print_status("Building structured data...")
         webpage_data = {
-            'id': generate_file_id(url),
+            'id': file_id,
             'url': url,
+            'schema_version': SCHEMA_VERSION,
             'description': clean_text(soup.find('meta', {'name': 'description'})['content']) if soup.find('meta', {'name': 'description'}) else '',
             'header': clean_text(soup.find('header').get_text()) if soup.find('header') else '',
             'navigation': clean_text(soup.find('nav').get_text()) if soup.find('nav') else '',
@@ -360,7 +513,7 @@ def scrape_webpage(url: str) -> dict:
                 'title': clean_text(soup.title.string) if soup.title else '',
                 'description': clean_text(soup.find('meta', {'name': 'description'})['content']) if soup.find('meta', {'name': 'description'}) else '',
                 'keywords': clean_text(soup.find('meta', {'name': 'keywords'})['content']) if soup.find('meta', {'name': 'keywords'}) else '',
-                'canonical_url': soup.find('link', {'rel': 'canonical'})['href'] if soup.find('link', {'rel': 'canonical'}) else url,
+                'canonical_url': canonicalize_url(urljoin(url, soup.find('link', {'rel': 'canonical'})['href']) if soup.find('link', {'rel': 'canonical'}) else url),
                 'author': clean_text(soup.find('meta', {'name': 'author'})['content']) if soup.find('meta', {'name': 'author'}) else '',
                 'published_time': soup.find('meta', {'property': 'article:published_time'})['content'] if soup.find('meta', {'property': 'article:published_time'}) else '',
                 'modified_time': soup.find('meta', {'property': 'article:modified_time'})['content'] if soup.find('meta', {'property': 'article:modified_time'}) else '',
@@ -368,16 +521,33 @@ def scrape_webpage(url: str) -> dict:
         }
         
         print_status("Extracting additional components...")
+        nlp_start = time.perf_counter()
+        keywords, entities, blocks = [], {}, []
+        if run_nlp:
+            blocks = segment_blocks(main_content)
+            keywords, entities, block_stats = analyse_blocks(
+                url, blocks, language, get_block_store(output_dir), count_keywords, extract_entities_batch
+            )
+            print_status(f"NLP ran on {block_stats['nlp_blocks']} of {block_stats['blocks']} blocks "
+                         f"({block_stats['changed_since_last_scrape']} changed since last scrape)")
+        model_pool.record(language, len(content_text), time.perf_counter() - nlp_start, skipped=not run_nlp)
         webpage_data.update({
-            'social_media_metadata': extract_social_metadata(soup),
+            'social_media_metadata': extracted['social_media_metadata'],
             'word_count': len(content_text.split()),
-            'keywords': extract_keywords(content_text),
-            'links': extract_links(soup, url),
-            'readability_score': 0,
-            'entities': extract_entities(content_text),
-            'structured_data': [],
-            'images': extract_images(soup, url),
-            'processed_json_ld': []
+            'language': language,
+            'page_type': page_type,
+            'page_features': page_features,
+            'keywords': keywords,
+            'links': extracted['links'],
+            'readability_score': extracted['readability_score'],
+            'readability': extracted['readability'],
+            'entities': entities,
+            'content_blocks': [block_hash for block_hash, _ in blocks],
+            'structured_data': extracted['structured_data'],
+            'images': extracted['images'],
+            'processed_json_ld': extracted['processed_json_ld'],
+            'extractor_versions': dict(EXTRACTOR_VERSIONS),
+            'html_blob': get_archive_store(output_dir).put_blob(response.text) if ARCHIVE_HTML else None
         })
         
         print_status("Data extraction completed successfully")
@@ -388,23 +558,77 @@ def scrape_webpage(url: str) -> dict:
         return None
     
 
-def save_to_json(data: dict, output_dir: str = 'output_json'):
-    """Save scraped data to JSON file."""
-    print_status(f"Preparing to save data to {output_dir}")
+def get_shard_writer(output_dir: str = 'output_json') -> ShardedJSONLWriter:
+    """Return the process-wide shard writer for an output directory."""
+    if output_dir not in _shard_writers:
+        _shard_writers[output_dir] = ShardedJSONLWriter(output_dir, compression=OUTPUT_COMPRESSION)
+    return _shard_writers[output_dir]
+
+def get_content_store(output_dir: str = 'output_json') -> ContentStore:
+    """Return the process-wide content-addressed store for an output directory."""
+    if output_dir not in _content_stores:
+        _content_stores[output_dir] = ContentStore(os.path.join(output_dir, 'cas'), compression=OUTPUT_COMPRESSION)
+    return _content_stores[output_dir]
+
+def get_archive_store(output_dir: str = 'output_json') -> ContentStore:
+    """Return the content store that archives raw HTML for an output directory."""
+    if output_dir not in _archive_stores:
+        _archive_stores[output_dir] = ContentStore(os.path.join(output_dir, 'cas'), compression=ARCHIVE_COMPRESSION)
+    return _archive_stores[output_dir]
+
+def get_manifest(output_dir: str = 'output_json') -> OutputManifest:
+    """Return the output manifest for a directory, opening it on first use."""
+    if output_dir not in _manifests:
+        _manifests[output_dir] = OutputManifest(os.path.join(output_dir, 'manifest.sqlite'))
+    return _manifests[output_dir]
+
+def get_near_duplicate_index(output_dir: str = 'output_json') -> NearDuplicateIndex:
+    """Return the persisted SimHash index for a directory, shared across runs."""
+    if output_dir not in _near_duplicate_indexes:
+        _near_duplicate_indexes[output_dir] = NearDuplicateIndex(os.path.join(output_dir, 'near_duplicates.jsonl'))
+    return _near_duplicate_indexes[output_dir]
+
+def get_block_store(output_dir: str = 'output_json') -> BlockResultStore:
+    """Return the per-paragraph NLP cache for a directory, so re-scrapes only analyse changed blocks."""
+    if output_dir not in _block_stores:
+        _block_stores[output_dir] = BlockResultStore(os.path.join(output_dir, 'block_cache.sqlite'))
+    return _block_stores[output_dir]
+
+def save_to_json(data: dict, output_dir: str = 'output_json', mode: str = None):
+    """Save scraped data to a JSON file, or append it to a JSONL shard, and record it in the manifest."""
+    mode = mode or OUTPUT_MODE
+    print_status(f"Preparing to save data to {output_dir} (mode: {mode})")
     try:
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
             print_status(f"Creating output directory: {output_dir}")
             os.makedirs(output_dir)
         
+        if mode == 'jsonl':
+            shard_path, offset, length = get_shard_writer(output_dir).write(data)
+            print_status(f"Appended {length} bytes to {shard_path} at offset {offset}")
+            get_manifest(output_dir).record_output(data, mode, shard_path, length, SCHEMA_VERSION,
+                                                   shard_offset=offset, shard_length=length)
+            return shard_path
+        
+        if mode == 'cas':
+            store = get_content_store(output_dir)
+            page_hash, written = store.put_page(data)
+            print_status(f"{'Stored' if written else 'Unchanged content, reused'} page {page_hash}")
+            page_path = store.page_path(page_hash)
+            get_manifest(output_dir).record_output(data, mode, page_path, os.path.getsize(page_path), SCHEMA_VERSION)
+            return page_path
+        
         # Generate filename
-        filename = f"{data['id']}.json"
+        filename = f"{data['id']}.json{SUFFIXES[OUTPUT_COMPRESSION]}"
         filepath = os.path.join(output_dir, filename)
         print_status(f"Saving to file: {filepath}")
         
-        # Save file with proper encoding
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Encode once as UTF-8 (pretty unless KG_JSON_PRETTY=0), then compress if enabled
+        encoded = compress_frame(dumpb(data, pretty=PRETTY_JSON), OUTPUT_COMPRESSION)
+        with open(filepath, 'wb') as f:
+            f.write(encoded)
+        get_manifest(output_dir).record_output(data, mode, filepath, len(encoded), SCHEMA_VERSION)
             
         print_status(f"Successfully saved data to {filepath}")
         return filepath
@@ -413,18 +637,25 @@ def save_to_json(data: dict, output_dir: str = 'output_json'):
         print_status(f"ERROR saving JSON: {str(e)}")
         return None
 
-def main(url: str):
+def main(url: str, output_dir: str = 'output_json'):
     """Main function to coordinate scraping and saving."""
     print_status(f"Starting processing for URL: {url}")
     
     # Scrape webpage
-    data = scrape_webpage(url)
+    data = scrape_webpage(url, output_dir)
+    near_duplicate_index = get_near_duplicate_index(output_dir)
+    if data and data.get('near_duplicate_of'):
+        print_status(f"Not saving near-duplicate of {data['near_duplicate_of']}")
+        near_duplicate_index.add(data['id'], url)
+        return None
     if data:
         # Save to JSON
-        filepath = save_to_json(data)
+        filepath = save_to_json(data, output_dir)
         if filepath:
+            near_duplicate_index.add(data['id'], url)
             print_status(f"Successfully processed {url}")
             return filepath
+    near_duplicate_index.discard(url)
     
     print_status("Processing completed")
     return None
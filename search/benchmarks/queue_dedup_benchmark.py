@@ -0,0 +1,134 @@
+"""
+Queue Deduplication Benchmark (queue_dedup_benchmark.py)
+=======================================================
+
+Purpose:
+--------
+Ingests a large synthetic frontier (default 1,000,000 URLs, 10% of them
+repeats) into each queue backend and times duplicate checks,
+mark_url_status lookups, batch claims (get_next_urls) and queue statistics
+(get_queue_stats), to confirm they stay flat as the queue grows.
+
+For scale, the previous linear duplicate check (any() over every queued
+entry) is timed on a small sample and extrapolated to the full size.
+
+Each backend runs in a temporary queue directory; nothing touches
+search/queue.
+
+Usage:
+------
+python benchmarks/queue_dedup_benchmark.py [urls] [backend ...]
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from queue_backends import BACKENDS, create_backend
+
+LOOKUPS = 10000
+CLAIMS = 1000
+CLAIM_BATCH = 5
+STATS_CALLS = 100
+LEGACY_SAMPLE = 5000
+
+
+def make_url(i: int) -> str:
+    return f"https://site{i % 5000}.example.com/articles/{i}/some-article-slug"
+
+
+def make_entry(url: str) -> dict:
+    return {
+        "url": url,
+        "priority_score": 1.0 + (hash(url) % 10) / 10,
+        "source_search": "benchmark",
+        "discovery_date": datetime.now().isoformat(),
+        "status": "pending"
+    }
+
+
+def candidates(count: int):
+    """count URLs with roughly 10% repeats of earlier ones."""
+    for i in range(count):
+        yield make_url(random.randrange(i) if i and random.random() < 0.1 else i)
+
+
+def bench_backend(name: str, count: int, logger):
+    backend = create_backend(name, tempfile.mkdtemp(prefix=f'queue-bench-{name}-'), logger)
+
+    start = time.perf_counter()
+    added = 0
+    with backend.transaction():
+        for url in candidates(count):
+            added += backend.add_url(make_entry(url))
+    ingest = time.perf_counter() - start
+
+    probes = [make_url(random.randrange(count * 2)) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    for url in probes:
+        backend.contains(url)
+    contains_us = (time.perf_counter() - start) / LOOKUPS * 1e6
+
+    targets = [make_url(random.randrange(count)) for _ in range(LOOKUPS)]
+    start = time.perf_counter()
+    with backend.transaction():
+        for url in targets:
+            backend.set_status(url, "completed")
+    status_us = (time.perf_counter() - start) / LOOKUPS * 1e6
+
+    start = time.perf_counter()
+    with backend.transaction():
+        for _ in range(CLAIMS):
+            backend.claim_next(CLAIM_BATCH, 'benchmark')
+    claim_us = (time.perf_counter() - start) / CLAIMS * 1e6
+
+    start = time.perf_counter()
+    for _ in range(STATS_CALLS):
+        backend.get_metadata()
+        backend.priority_stats()
+        backend.priority_histogram()
+    stats_us = (time.perf_counter() - start) / STATS_CALLS * 1e6
+
+    backend.close()
+    print(f"{name:<10}{count:>10}{added:>10}{ingest:>12.1f}{count / ingest:>12.0f}"
+          f"{contains_us:>14.2f}{status_us:>14.2f}{claim_us:>12.1f}{stats_us:>12.1f}")
+
+
+def bench_legacy(count: int):
+    """Time the old any() scan on a sample and extrapolate to count URLs."""
+    urls = []
+    start = time.perf_counter()
+    for url in candidates(LEGACY_SAMPLE):
+        if not any(item["url"] == url for item in urls):
+            urls.append({"url": url})
+    elapsed = time.perf_counter() - start
+    # Cost grows with the square of the queue size
+    projected = elapsed * (count / LEGACY_SAMPLE) ** 2
+    print(f"Legacy linear scan: {LEGACY_SAMPLE} URLs in {elapsed:.1f}s; "
+          f"projected {projected / 3600:.1f} hours for {count}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    names = sys.argv[2:] or list(BACKENDS)
+    logger = logging.getLogger('QueueDedupBenchmark')
+    random.seed(42)
+
+    print("=" * 106)
+    print(f"{'backend':<10}{'urls':>10}{'added':>10}{'ingest s':>12}{'urls/s':>12}"
+          f"{'contains us':>14}{'status us':>14}{'claim us':>12}{'stats us':>12}")
+    print("-" * 106)
+    for name in names:
+        bench_backend(name, count, logger)
+    print("-" * 106)
+    bench_legacy(count)
+    print("=" * 106)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1108 @@
+"""
+URL Queue Storage Backends (queue_backends.py)
+=============================================
+
+Purpose:
+--------
+Storage layer behind URLQueueManager. The manager keeps its public API
+(read_search_results, get_next_urls, mark_url_status, cleanup_queue,
+get_queue_stats) and delegates persistence to one of these backends.
+
+Backends:
+---------
+1. JSONQueueBackend ('json', default)
+   - The original queue/queue-list.json layout, held in memory and
+     rewritten after every committed change
+   - url -> entry and canonical_url -> entry dicts, rebuilt on load, make
+     duplicate checks and status lookups O(1)
+   - Pending URLs sit in per-host max-heaps with lazy deletion: claiming k
+     URLs is O(k log N) and a priority change pushes a fresh heap entry,
+     leaving the outdated one to be skipped when it surfaces
+   - Human-readable; suited to small queues
+   - Written via temporary file + rename; an unreadable file raises
+     QueueLoadError instead of silently starting an empty queue
+
+2. JournalQueueBackend ('journal')
+   - Same in-memory structures; each commit appends its transitions
+     (add, status, priority, remove) as one compact JSON line to
+     queue-journal.NNNNNN.jsonl and fsyncs, so a status change costs one
+     small append instead of a full rewrite. A commit of several
+     transitions is a single {"op": "batch", "ops": [...]} record, so it
+     is replayed whole or not at all
+   - A background thread compacts the journal into queue-list.json once
+     compact_every transitions have accumulated; the snapshot records the
+     last segment it covers and older segments are deleted
+   - Startup loads the snapshot and replays newer segments; a torn final
+     record (crash mid-append, i.e. an uncommitted transaction) is
+     truncated from its segment, any other corruption raises
+
+3. SQLiteQueueBackend ('sqlite')
+   - queue/queue.sqlite with url as primary key (the persistent URL
+     index used for lookups), a unique index on canonical_url (duplicate
+     checks) and an index on (host, status, priority_score), so claims
+     read the top of one host's ordered index and status/priority updates
+     touch only the affected rows
+   - A hosts table (pending and in-flight counts, scheduling pass) is kept
+     current by triggers on urls
+   - Claims and updates run in BEGIN IMMEDIATE transactions
+
+Select with KG_QUEUE_BACKEND=json|journal|sqlite or URLQueueManager(backend=...).
+
+Leases:
+-------
+claim_next() hands each URL to a worker ID with a lease expiry
+(lease_owner, lease_expires as a Unix timestamp). Every claim first
+returns URLs whose lease has expired to pending, so a crashed controller's
+batch is picked up again. heartbeat() extends a worker's leases, and
+set_status() refuses to change a URL leased by a different worker. Only
+the SQLite backend is safe for several controller processes draining one
+queue; the JSON and journal backends are single-process.
+
+Host fairness:
+--------------
+The frontier is partitioned by host (of the canonical URL) and claims
+round-robin across hosts using stride scheduling: every host has a pass
+value, the host with the lowest pass gives up its best pending URL, and
+its pass then advances by 1 / priority_score of that URL. Hosts with
+higher-priority URLs get proportionally more turns, but one host with many
+high-scoring results can no longer fill every batch. A host that gains
+pending URLs after running dry starts at the current virtual time, so it
+neither bursts nor starves. With max_per_host set (KG_QUEUE_HOST_CONCURRENCY),
+hosts already holding that many leased URLs are skipped, so parallel
+workers spread across domains.
+
+Statistics:
+-----------
+Per-status counts (pending, processing, completed, failed), the total,
+the priority sum and a priority histogram (PRIORITY_BUCKET_WIDTH-wide
+buckets, the last open-ended) are updated on every transition: in memory
+for the JSON and journal backends, by triggers into queue_stats for
+SQLite. get_metadata(), priority_stats() and priority_histogram() never
+scan the queue.
+
+Transactions:
+------------
+Every mutating call commits on its own. Wrap several calls in
+`with backend.transaction():` to commit them once (e.g. all URLs from a
+batch of search result files).
+
+Ingested files:
+---------------
+Each backend also records which search result files have been ingested
+(name, mtime, size), so read_search_results() only parses new or changed
+files.
+
+Canonical keys:
+---------------
+Duplicates are detected on canonical_url (see scrape/url_canonical.py),
+so http/https, www., tracking-parameter and AMP variants of a page are
+queued once; url stays the address that is actually fetched. Entries
+without canonical_url (queues written before it existed) use their url.
+
+Queue entry fields:
+------------------
+url, canonical_url, priority_score, source_search, discovery_date, status,
+last_updated, lease_owner, lease_expires
+"""
+
+import os
+import re
+import heapq
+import itertools
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Shared JSON codec lives with the scraper modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scrape')))
+from json_codec import dumpb, load, loads, PRETTY_JSON, DECODE_ERRORS
+from content_store import atomic_write
+
+VALID_STATUSES = ("pending", "processing", "completed", "failed")
+
+JOURNAL_PREFIX = 'queue-journal.'
+JOURNAL_SUFFIX = '.jsonl'
+_JOURNAL_RE = re.compile(r'^queue-journal\.(\d{6})\.jsonl$')
+DEFAULT_COMPACT_EVERY = 10000      # journal records before a snapshot is due
+DEFAULT_COMPACT_INTERVAL = 30.0    # seconds between compaction checks
+DEFAULT_LEASE_SECONDS = 900
+MIN_PRIORITY = 0.001               # floor for stride scheduling weights
+PRIORITY_BUCKET_WIDTH = 0.25
+PRIORITY_BUCKETS = 9               # [0, 0.25), ..., [1.75, 2.0), 2.0+
+
+
+def _canonical_key(entry: Dict) -> str:
+    """Duplicate-check key of a queue entry."""
+    return entry.get("canonical_url") or entry["url"]
+
+
+def _host_key(entry: Dict) -> str:
+    """Frontier partition of a queue entry: the host of its canonical URL."""
+    return entry.get("host") or urlsplit(_canonical_key(entry)).hostname or ""
+
+
+def _priority_bucket(priority_score: float) -> int:
+    """Histogram bucket of a score (same arithmetic as the SQLite triggers)."""
+    return min(max(int(priority_score / PRIORITY_BUCKET_WIDTH), 0), PRIORITY_BUCKETS - 1)
+
+
+def _bucket_label(bucket: int) -> str:
+    low = bucket * PRIORITY_BUCKET_WIDTH
+    if bucket == PRIORITY_BUCKETS - 1:
+        return f"{low:.2f}+"
+    return f"{low:.2f}-{low + PRIORITY_BUCKET_WIDTH:.2f}"
+
+
+def _stride(priority_score: float) -> float:
+    """Scheduling pass a host advances by when one of its URLs is claimed."""
+    return 1.0 / max(priority_score, MIN_PRIORITY)
+
+
+class QueueBackend:
+    """Interface shared by queue storage backends."""
+
+    def __init__(self, logger):
+        self.logger = logger
+        self._depth = 0
+        # Serialises transactions against background work (journal compaction)
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self):
+        """Group several operations into one commit."""
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self._begin()
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._rollback()
+                raise
+            self._depth -= 1
+            if outermost:
+                self._commit()
+
+    def _begin(self):
+        pass
+
+    def _commit(self):
+        pass
+
+    def _rollback(self):
+        pass
+
+    def contains(self, canonical_url: str) -> bool:
+        """Whether a URL with this canonical key is already queued (any status)."""
+        raise NotImplementedError
+
+    def add_url(self, entry: Dict) -> bool:
+        """Insert a queue entry; returns False if its URL or canonical key is already queued."""
+        raise NotImplementedError
+
+    def claim_next(self, batch_size: int, worker_id: str,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, max_per_host: int = 0) -> List[str]:
+        """
+        Reclaim expired leases, then lease up to batch_size pending URLs to worker_id.
+
+        Hosts take turns by stride scheduling (see Host fairness); each turn
+        yields the host's highest-priority URL. max_per_host > 0 skips hosts
+        already holding that many leased URLs.
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, urls: List[str], worker_id: str,
+                  lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        """Extend worker_id's leases on urls; returns the URLs still held."""
+        raise NotImplementedError
+
+    def reclaim_expired(self) -> int:
+        """Return processing URLs with expired leases to pending; returns the count."""
+        raise NotImplementedError
+
+    def set_status(self, url: str, status: str, worker_id: Optional[str] = None) -> bool:
+        """
+        Update a URL's status and release its lease.
+
+        Returns False if the URL is unknown or, when worker_id is given,
+        currently leased to another worker.
+        """
+        raise NotImplementedError
+
+    def update_priority(self, url: str, priority_score: float) -> bool:
+        """Change a URL's priority; returns False if the URL is unknown."""
+        raise NotImplementedError
+
+    def remove_completed(self, cutoff: datetime) -> int:
+        """Delete completed URLs last updated at or before cutoff; returns the count."""
+        raise NotImplementedError
+
+    def is_ingested(self, name: str, mtime: float, size: int) -> bool:
+        """Whether this exact version of a search result file was already ingested."""
+        raise NotImplementedError
+
+    def mark_ingested(self, name: str, mtime: float, size: int):
+        """Record a search result file as ingested."""
+        raise NotImplementedError
+
+    def get_metadata(self) -> Dict:
+        """last_updated, total_urls and per-status counts."""
+        raise NotImplementedError
+
+    def priority_stats(self) -> Dict:
+        """min/max/avg priority_score over all URLs."""
+        raise NotImplementedError
+
+    def priority_histogram(self) -> Dict[str, int]:
+        """Number of URLs per priority_score bucket, e.g. {'1.00-1.25': 120, ..., '2.00+': 8}."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class QueueLoadError(RuntimeError):
+    """Raised when persisted queue state cannot be read; never replaced by an empty queue."""
+
+
+class JSONQueueBackend(QueueBackend):
+    """Whole queue in memory, persisted to queue-list.json on each commit."""
+
+    def __init__(self, queue_dir: str, logger):
+        super().__init__(logger)
+        self.queue_dir = queue_dir
+        self.queue_file = os.path.join(queue_dir, 'queue-list.json')
+        self._dirty = False     # a transition was recorded since the last commit
+        self._recover()
+
+    def _recover(self):
+        """Load persisted state and rebuild in-memory indexes."""
+        self.queue_data = self._load_queue()
+        self._build_indexes()
+
+    def _build_indexes(self):
+        """Build the url and canonical key indexes and the per-host pending heaps over the loaded queue."""
+        self.url_index = {url_data["url"]: url_data for url_data in self.queue_data["urls"]}
+        self.canonical_index = {_canonical_key(url_data): url_data for url_data in self.queue_data["urls"]}
+        self._sequence = itertools.count()
+        # host -> heap of (-priority_score, insertion order, url): highest priority first, ties FIFO
+        self._host_heaps = {}
+        self._heap_size = 0
+        # Hosts with pending URLs: host -> pass, and a (pass, order, host) heap, lowest pass first
+        self._host_pass = {}
+        self._host_queue = []
+        self._virtual_time = 0.0
+        # Processing URLs per host
+        self._in_flight = Counter()
+        # Incrementally maintained statistics
+        self._status_counts = Counter()
+        self._score_counts = Counter()
+        self._histogram = [0] * PRIORITY_BUCKETS
+        self._score_sum = 0.0
+        self._score_bounds = None   # (min, max), recomputed lazily when an extreme goes away
+        for url_data in self.queue_data["urls"]:
+            self._status_counts[url_data["status"]] += 1
+            self._track_score(url_data["priority_score"], 1)
+            if url_data["status"] == "pending":
+                self._host_heaps.setdefault(_host_key(url_data), []).append(
+                    (-url_data["priority_score"], next(self._sequence), url_data["url"]))
+                self._heap_size += 1
+            elif url_data["status"] == "processing":
+                self._in_flight[_host_key(url_data)] += 1
+        for host, heap in self._host_heaps.items():
+            heapq.heapify(heap)
+            self._activate_host(host)
+        # (lease_expires, url) for processing URLs; entries without a lease expire at once
+        self._lease_heap = [
+            (url_data.get("lease_expires") or 0, url_data["url"])
+            for url_data in self.queue_data["urls"] if url_data["status"] == "processing"
+        ]
+        heapq.heapify(self._lease_heap)
+
+    def _track_score(self, priority_score: float, delta: int):
+        """Add (delta=1) or remove (delta=-1) one score from the priority statistics."""
+        self._score_counts[priority_score] += delta
+        self._score_sum += priority_score * delta
+        self._histogram[_priority_bucket(priority_score)] += delta
+        if self._score_counts[priority_score] <= 0:
+            del self._score_counts[priority_score]
+            if self._score_bounds and priority_score in self._score_bounds:
+                self._score_bounds = None
+        elif delta > 0 and self._score_bounds:
+            low, high = self._score_bounds
+            self._score_bounds = (min(low, priority_score), max(high, priority_score))
+
+    def _set_status(self, url_data: Dict, status: str):
+        self._status_counts[url_data["status"]] -= 1
+        self._status_counts[status] += 1
+        url_data["status"] = status
+
+    def _activate_host(self, host: str):
+        """Put a host with pending URLs in the rotation, starting at the current virtual time."""
+        if host not in self._host_pass:
+            self._host_pass[host] = self._virtual_time
+            heapq.heappush(self._host_queue, (self._virtual_time, next(self._sequence), host))
+
+    def _push_pending(self, url_data: Dict):
+        host = _host_key(url_data)
+        heapq.heappush(self._host_heaps.setdefault(host, []),
+                       (-url_data["priority_score"], next(self._sequence), url_data["url"]))
+        self._heap_size += 1
+        self._activate_host(host)
+        # Drop accumulated stale entries once they outnumber live URLs
+        if self._heap_size > 2 * len(self.url_index) + 1024:
+            self._compact_heaps()
+
+    def _compact_heaps(self):
+        """Rebuild the per-host heaps from live entries only; scheduling state is kept."""
+        for host, heap in list(self._host_heaps.items()):
+            live = [heap_entry for heap_entry in heap if self._is_live(heap_entry)]
+            if live:
+                heapq.heapify(live)
+                self._host_heaps[host] = live
+            else:
+                del self._host_heaps[host]
+        self._heap_size = sum(len(heap) for heap in self._host_heaps.values())
+
+    def _next_pending(self, host: str):
+        """Heap entry of the host's best pending URL (left in place), dropping stale entries above it."""
+        heap = self._host_heaps.get(host)
+        while heap:
+            if self._is_live(heap[0]):
+                return heap[0]
+            heapq.heappop(heap)
+            self._heap_size -= 1
+        self._host_heaps.pop(host, None)
+        return None
+
+    def _is_live(self, heap_entry) -> bool:
+        """A heap entry is stale if its URL left pending, was removed or was re-prioritised."""
+        neg_priority, _, url = heap_entry
+        url_data = self.url_index.get(url)
+        return (url_data is not None and url_data["status"] == "pending"
+                and url_data["priority_score"] == -neg_priority)
+
+    def _leased_elsewhere(self, url_data: Dict, worker_id: Optional[str]) -> bool:
+        return (worker_id is not None and url_data["status"] == "processing"
+                and url_data.get("lease_owner") not in (None, worker_id))
+
+    def _load_queue(self) -> Dict:
+        """Load existing queue or create new one."""
+        if os.path.exists(self.queue_file):
+            try:
+                with open(self.queue_file, 'rb') as f:
+                    return load(f)
+            except DECODE_ERRORS as e:
+                # Starting empty would silently drop the whole frontier
+                self.logger.error(f"Error reading queue file: {self.queue_file}")
+                raise QueueLoadError(f"Queue file {self.queue_file} is unreadable: {str(e)}") from e
+        return self._create_new_queue()
+
+    def _create_new_queue(self) -> Dict:
+        """Create new queue structure."""
+        return {
+            "queue_metadata": {
+                "last_updated": datetime.now().isoformat(),
+                "total_urls": 0,
+                "pending": 0,
+                "processing": 0,
+                "completed": 0,
+                "failed": 0
+            },
+            "urls": []
+        }
+
+    def _save_queue(self):
+        """Save current queue to file (temporary file + rename, so a crash never leaves it half-written)."""
+        try:
+            atomic_write(self.queue_file, dumpb(self.queue_data, pretty=PRETTY_JSON))
+            self.logger.info("Queue saved successfully")
+        except Exception as e:
+            self.logger.error(f"Error saving queue: {str(e)}")
+
+    def _update_metadata(self):
+        """Update queue metadata counts from the incremental counters."""
+        self.queue_data["queue_metadata"].update({
+            "last_updated": datetime.now().isoformat(),
+            "total_urls": len(self.url_index),
+            **{status: self._status_counts[status] for status in VALID_STATUSES}
+        })
+
+    def _begin(self):
+        self._dirty = False
+
+    def _commit(self):
+        # Read-only transactions (nothing claimed, no lease held) skip the rewrite
+        if not self._dirty:
+            return
+        self._update_metadata()
+        self._save_queue()
+
+    def _rollback(self):
+        # Discard in-memory changes by reloading the last saved state
+        self._recover()
+
+    def _record(self, op: Dict):
+        """Apply a state transition; subclasses also journal it."""
+        self._apply(op)
+        self._dirty = True
+
+    def _apply(self, op: Dict):
+        """Apply one transition (add, status, priority or remove) to in-memory state."""
+        kind = op["op"]
+        if kind == "add":
+            entry = op["entry"]
+            self.queue_data["urls"].append(entry)
+            self.url_index[entry["url"]] = entry
+            self.canonical_index[_canonical_key(entry)] = entry
+            self._status_counts[entry["status"]] += 1
+            self._track_score(entry["priority_score"], 1)
+            if entry["status"] == "pending":
+                self._push_pending(entry)
+            elif entry["status"] == "processing":
+                self._in_flight[_host_key(entry)] += 1
+                heapq.heappush(self._lease_heap, (entry.get("lease_expires") or 0, entry["url"]))
+        elif kind == "status":
+            url_data = self.url_index[op["url"]]
+            was_pending = url_data["status"] == "pending"
+            self._in_flight[_host_key(url_data)] += (
+                (op["status"] == "processing") - (url_data["status"] == "processing"))
+            self._set_status(url_data, op["status"])
+            url_data["last_updated"] = op["at"]
+            url_data.pop("lease_owner", None)
+            url_data.pop("lease_expires", None)
+            if op["status"] == "pending" and not was_pending:
+                self._push_pending(url_data)
+            elif op["status"] == "processing":
+                # No lease: expires at once, as SQLite reclaims lease_expires IS NULL rows
+                heapq.heappush(self._lease_heap, (0, op["url"]))
+        elif kind == "claim":
+            url_data = self.url_index[op["url"]]
+            if url_data["status"] != "processing":
+                self._in_flight[_host_key(url_data)] += 1
+            self._set_status(url_data, "processing")
+            url_data["last_updated"] = op["at"]
+            url_data["lease_owner"] = op["worker"]
+            url_data["lease_expires"] = op["expires"]
+            heapq.heappush(self._lease_heap, (op["expires"], op["url"]))
+        elif kind == "lease":
+            url_data = self.url_index[op["url"]]
+            url_data["lease_expires"] = op["expires"]
+            heapq.heappush(self._lease_heap, (op["expires"], op["url"]))
+        elif kind == "priority":
+            url_data = self.url_index[op["url"]]
+            self._track_score(url_data["priority_score"], -1)
+            self._track_score(op["priority_score"], 1)
+            url_data["priority_score"] = op["priority_score"]
+            if url_data["status"] == "pending":
+                self._push_pending(url_data)
+        elif kind == "remove":
+            cutoff = datetime.fromisoformat(op["cutoff"])
+            self.queue_data["urls"] = [
+                url_data for url_data in self.queue_data["urls"]
+                if url_data["status"] != "completed"
+                or datetime.fromisoformat(url_data["last_updated"]) > cutoff
+            ]
+            self._build_indexes()
+        elif kind == "ingested":
+            self.queue_data.setdefault("ingested_files", {})[op["name"]] = [op["mtime"], op["size"]]
+        else:
+            raise ValueError(f"Unknown queue operation: {kind}")
+
+    def contains(self, canonical_url: str) -> bool:
+        return canonical_url in self.canonical_index
+
+    def add_url(self, entry: Dict) -> bool:
+        if entry["url"] in self.url_index or _canonical_key(entry) in self.canonical_index:
+            return False
+        with self.transaction():
+            self._record({"op": "add", "entry": entry})
+            return True
+
+    def reclaim_expired(self) -> int:
+        now = time.time()
+        reclaimed = 0
+        with self.transaction():
+            while self._lease_heap and self._lease_heap[0][0] <= now:
+                expires, url = heapq.heappop(self._lease_heap)
+                url_data = self.url_index.get(url)
+                # Stale entry: URL finished, was removed or had its lease extended
+                if (url_data is None or url_data["status"] != "processing"
+                        or (url_data.get("lease_expires") or 0) != expires):
+                    continue
+                self.logger.warning(f"Lease of {url_data.get('lease_owner')} on {url} expired; returning to pending")
+                self._record({"op": "status", "url": url, "status": "pending", "at": datetime.now().isoformat()})
+                reclaimed += 1
+        return reclaimed
+
+    def claim_next(self, batch_size: int, worker_id: str,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, max_per_host: int = 0) -> List[str]:
+        with self.transaction():
+            self.reclaim_expired()
+            batch = []
+            busy_hosts = []
+            now = datetime.now().isoformat()
+            expires = time.time() + lease_seconds
+            while self._host_queue and len(batch) < batch_size:
+                host_pass, _, host = heapq.heappop(self._host_queue)
+                if self._host_pass.get(host) != host_pass:
+                    continue  # stale rotation entry
+                heap_entry = self._next_pending(host)
+                if heap_entry is None:
+                    del self._host_pass[host]
+                    continue
+                if max_per_host and self._in_flight[host] >= max_per_host:
+                    busy_hosts.append((host_pass, host))
+                    continue
+                heapq.heappop(self._host_heaps[host])
+                self._heap_size -= 1
+                self._record({"op": "claim", "url": heap_entry[2], "worker": worker_id,
+                              "expires": expires, "at": now})
+                batch.append(heap_entry[2])
+                # The host's next turn comes sooner the higher the priority it just served
+                self._virtual_time = host_pass
+                self._host_pass[host] = host_pass + _stride(-heap_entry[0])
+                heapq.heappush(self._host_queue, (self._host_pass[host], next(self._sequence), host))
+            for host_pass, host in busy_hosts:
+                heapq.heappush(self._host_queue, (host_pass, next(self._sequence), host))
+            return batch
+
+    def heartbeat(self, urls: List[str], worker_id: str,
+                  lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        if not urls:
+            return []
+        expires = time.time() + lease_seconds
+        held = []
+        with self.transaction():
+            for url in urls:
+                url_data = self.url_index.get(url)
+                if (url_data is not None and url_data["status"] == "processing"
+                        and url_data.get("lease_owner") == worker_id):
+                    self._record({"op": "lease", "url": url, "expires": expires})
+                    held.append(url)
+        return held
+
+    def set_status(self, url: str, status: str, worker_id: Optional[str] = None) -> bool:
+        url_data = self.url_index.get(url)
+        if url_data is None or self._leased_elsewhere(url_data, worker_id):
+            return False
+        with self.transaction():
+            self._record({"op": "status", "url": url, "status": status, "at": datetime.now().isoformat()})
+            return True
+
+    def update_priority(self, url: str, priority_score: float) -> bool:
+        if url not in self.url_index:
+            return False
+        with self.transaction():
+            self._record({"op": "priority", "url": url, "priority_score": priority_score})
+            return True
+
+    def remove_completed(self, cutoff: datetime) -> int:
+        original_count = len(self.queue_data["urls"])
+        removable = sum(
+            1 for url_data in self.queue_data["urls"]
+            if url_data["status"] == "completed"
+            and datetime.fromisoformat(url_data["last_updated"]) <= cutoff
+        )
+        if removable > 0:
+            with self.transaction():
+                self._record({"op": "remove", "cutoff": cutoff.isoformat()})
+        return original_count - len(self.queue_data["urls"])
+
+    def is_ingested(self, name: str, mtime: float, size: int) -> bool:
+        return self.queue_data.get("ingested_files", {}).get(name) == [mtime, size]
+
+    def mark_ingested(self, name: str, mtime: float, size: int):
+        with self.transaction():
+            self._record({"op": "ingested", "name": name, "mtime": mtime, "size": size})
+
+    def get_metadata(self) -> Dict:
+        return dict(self.queue_data["queue_metadata"])
+
+    def priority_stats(self) -> Dict:
+        if not self.url_index:
+            return {"min": 0, "max": 0, "avg": 0}
+        if self._score_bounds is None:
+            # Only after the last URL holding the min or max score changed; distinct scores are few
+            self._score_bounds = (min(self._score_counts), max(self._score_counts))
+        return {
+            "min": self._score_bounds[0],
+            "max": self._score_bounds[1],
+            "avg": self._score_sum / len(self.url_index)
+        }
+
+    def priority_histogram(self) -> Dict[str, int]:
+        return {_bucket_label(bucket): count for bucket, count in enumerate(self._histogram)}
+
+
+class JournalQueueBackend(JSONQueueBackend):
+    """
+    JSON snapshot plus an append-only journal of transitions.
+
+    Each commit appends its transitions to the current journal segment and
+    fsyncs; the snapshot is only rewritten by compaction, which runs on a
+    background thread once enough transitions have accumulated.
+    """
+
+    def __init__(self, queue_dir: str, logger,
+                 compact_every: int = DEFAULT_COMPACT_EVERY,
+                 compact_interval: float = DEFAULT_COMPACT_INTERVAL):
+        self.compact_every = compact_every
+        self.compact_interval = compact_interval
+        self._journal_file = None
+        self._segment = 0
+        self._buffer = []
+        self._ops_since_snapshot = 0
+        self._compact_lock = threading.Lock()
+        self._stop = threading.Event()
+        super().__init__(queue_dir, logger)
+        self._compactor = threading.Thread(target=self._compact_loop, name='queue-journal-compactor', daemon=True)
+        self._compactor.start()
+
+    def _segments(self) -> List[int]:
+        numbers = []
+        for filename in os.listdir(self.queue_dir):
+            match = _JOURNAL_RE.match(filename)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.queue_dir, f"{JOURNAL_PREFIX}{number:06d}{JOURNAL_SUFFIX}")
+
+    def _recover(self):
+        """Load the snapshot, then replay every journal segment written after it."""
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        self.queue_data = self._load_queue()
+        self._build_indexes()
+        snapshot_segment = self.queue_data.get("journal_segment", 0)
+        segments = self._segments()
+        replayed = 0
+        for number in segments:
+            if number <= snapshot_segment:
+                continue
+            replayed += self._replay(self._segment_path(number), is_last=number == segments[-1])
+        self._ops_since_snapshot = replayed
+        if replayed:
+            self._update_metadata()
+            self.logger.info(f"Recovered queue: replayed {replayed} journal records")
+        # Always append to a fresh segment, never after a possibly torn line
+        self._segment = max(segments + [snapshot_segment]) + 1
+        self._journal_file = open(self._segment_path(self._segment), 'ab')
+
+    def _replay(self, path: str, is_last: bool) -> int:
+        with open(path, 'rb') as f:
+            lines = f.read().split(b'\n')
+        replayed = 0
+        offset = 0
+        for number, line in enumerate(lines):
+            if line:
+                try:
+                    op = loads(line)
+                except DECODE_ERRORS as e:
+                    if is_last and number == len(lines) - 1:
+                        # Torn final write from a crash: the transition never committed.
+                        # Cut it off so the segment stays valid once it is no longer the last one.
+                        self.logger.warning(f"Truncating torn journal record at end of {path}")
+                        with open(path, 'r+b') as f:
+                            f.truncate(offset)
+                            f.flush()
+                            os.fsync(f.fileno())
+                        break
+                    raise QueueLoadError(f"Corrupt journal record {number + 1} in {path}: {str(e)}") from e
+                for transition in op["ops"] if op["op"] == "batch" else (op,):
+                    self._apply(transition)
+                    replayed += 1
+            offset += len(line) + 1
+        return replayed
+
+    def _record(self, op: Dict):
+        self._apply(op)
+        self._buffer.append(op)
+
+    def _commit(self):
+        if not self._buffer:
+            return
+        # One line per commit: a torn write loses the whole transaction, never part of it
+        record = self._buffer[0] if len(self._buffer) == 1 else {"op": "batch", "ops": self._buffer}
+        self._journal_file.write(dumpb(record, pretty=False) + b'\n')
+        self._journal_file.flush()
+        os.fsync(self._journal_file.fileno())
+        self._ops_since_snapshot += len(self._buffer)
+        self._buffer = []
+        self._update_metadata()
+
+    def _rollback(self):
+        self._buffer = []
+        self._recover()
+
+    def compact(self):
+        """Write a snapshot of the current state and delete the journal segments it covers."""
+        with self._compact_lock:
+            with self._lock:
+                if self._ops_since_snapshot == 0:
+                    return
+                # Later transitions go to a new segment; the snapshot covers all earlier ones
+                covered = self._segment
+                self._journal_file.close()
+                self._segment += 1
+                self._journal_file = open(self._segment_path(self._segment), 'ab')
+                self._update_metadata()
+                self.queue_data["journal_segment"] = covered
+                data = dumpb(self.queue_data, pretty=PRETTY_JSON)
+                self._ops_since_snapshot = 0
+            atomic_write(self.queue_file, data)
+            for number in self._segments():
+                if number <= covered:
+                    os.remove(self._segment_path(number))
+            self.logger.info(f"Compacted queue journal into snapshot (segments <= {covered})")
+
+    def _compact_loop(self):
+        while not self._stop.wait(self.compact_interval):
+            if self._ops_since_snapshot >= self.compact_every:
+                try:
+                    self.compact()
+                except Exception as e:
+                    self.logger.error(f"Error compacting queue journal: {str(e)}")
+
+    def close(self):
+        self._stop.set()
+        self.compact()
+        with self._lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+                # Nothing was written after the final snapshot
+                if os.path.getsize(self._segment_path(self._segment)) == 0:
+                    os.remove(self._segment_path(self._segment))
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """Indexed SQLite queue; only touched rows are read or written."""
+
+    def __init__(self, queue_dir: str, logger):
+        super().__init__(logger)
+        self.db_path = os.path.join(queue_dir, 'queue.sqlite')
+        # Autocommit mode; transaction() issues BEGIN IMMEDIATE/COMMIT itself
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                canonical_url TEXT,
+                host TEXT,
+                priority_score REAL NOT NULL DEFAULT 1.0,
+                source_search TEXT,
+                discovery_date TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                last_updated TEXT,
+                lease_owner TEXT,
+                lease_expires REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_urls_priority ON urls (priority_score);
+            CREATE TABLE IF NOT EXISTS queue_metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS ingested_files (
+                name TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                ingested_at TEXT NOT NULL
+            );
+        """)
+        self._add_missing_columns()
+
+    def _add_missing_columns(self):
+        """Upgrade queue databases created before leases, canonical keys and host sharding were added."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(urls)")}
+        for name, definition in (("lease_owner", "TEXT"), ("lease_expires", "REAL"),
+                                 ("canonical_url", "TEXT"), ("host", "TEXT")):
+            if name not in columns:
+                self.conn.execute(f"ALTER TABLE urls ADD COLUMN {name} {definition}")
+        if "canonical_url" not in columns:
+            self.conn.execute("UPDATE urls SET canonical_url = url")
+        if "host" not in columns:
+            rows = self.conn.execute("SELECT url, canonical_url FROM urls").fetchall()
+            self.conn.executemany("UPDATE urls SET host = ? WHERE url = ?",
+                                  [(_host_key(dict(row)), row["url"]) for row in rows])
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_status_lease ON urls (status, lease_expires)")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_urls_canonical ON urls (canonical_url)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_host_status_priority "
+                          "ON urls (host, status, priority_score DESC)")
+        # Claims use the per-host index now
+        self.conn.execute("DROP INDEX IF EXISTS idx_urls_status_priority")
+        self._create_host_table()
+        self._create_stats_table()
+
+    def _create_stats_table(self):
+        """Queue counters (statuses, total, priority sum and histogram), kept current by triggers."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'queue_stats'"
+        ).fetchone()
+        bucket = ("'bucket_' || MIN(MAX(CAST({score} / %r AS INTEGER), 0), %d)"
+                  % (PRIORITY_BUCKET_WIDTH, PRIORITY_BUCKETS - 1))
+        new_bucket = bucket.format(score="NEW.priority_score")
+        old_bucket = bucket.format(score="OLD.priority_score")
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS queue_stats (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL DEFAULT 0
+            );
+            CREATE TRIGGER IF NOT EXISTS urls_stats_insert AFTER INSERT ON urls BEGIN
+                UPDATE queue_stats SET value = value + 1 WHERE key IN (NEW.status, 'total', {new_bucket});
+                UPDATE queue_stats SET value = value + NEW.priority_score WHERE key = 'score_sum';
+            END;
+            CREATE TRIGGER IF NOT EXISTS urls_stats_status AFTER UPDATE OF status ON urls
+            WHEN OLD.status != NEW.status BEGIN
+                UPDATE queue_stats SET value = value - 1 WHERE key = OLD.status;
+                UPDATE queue_stats SET value = value + 1 WHERE key = NEW.status;
+            END;
+            CREATE TRIGGER IF NOT EXISTS urls_stats_priority AFTER UPDATE OF priority_score ON urls
+            WHEN OLD.priority_score != NEW.priority_score BEGIN
+                UPDATE queue_stats SET value = value - 1 WHERE key = {old_bucket};
+                UPDATE queue_stats SET value = value + 1 WHERE key = {new_bucket};
+                UPDATE queue_stats SET value = value + NEW.priority_score - OLD.priority_score
+                WHERE key = 'score_sum';
+            END;
+            CREATE TRIGGER IF NOT EXISTS urls_stats_delete AFTER DELETE ON urls BEGIN
+                UPDATE queue_stats SET value = value - 1 WHERE key IN (OLD.status, 'total', {old_bucket});
+                UPDATE queue_stats SET value = value - OLD.priority_score WHERE key = 'score_sum';
+            END;
+        """)
+        if not exists:
+            # Seed from the rows already queued
+            keys = list(VALID_STATUSES) + ['total', 'score_sum'] + [f'bucket_{n}' for n in range(PRIORITY_BUCKETS)]
+            values = dict.fromkeys(keys, 0)
+            for row in self.conn.execute("SELECT status, priority_score FROM urls"):
+                values[row["status"]] = values.get(row["status"], 0) + 1
+                values['total'] += 1
+                values['score_sum'] += row["priority_score"]
+                values[f'bucket_{_priority_bucket(row["priority_score"])}'] += 1
+            self.conn.executemany("INSERT INTO queue_stats (key, value) VALUES (?, ?)", values.items())
+
+    def _create_host_table(self):
+        """Per-host scheduling state, kept in step with urls by triggers."""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hosts'"
+        ).fetchone()
+        # A host that gains pending URLs after running dry resumes at the current virtual time
+        resume_pass = """CASE WHEN pending = 0 AND NEW.status = 'pending'
+                         THEN MAX(pass, COALESCE((SELECT CAST(value AS REAL) FROM queue_metadata
+                                                  WHERE key = 'virtual_time'), 0))
+                         ELSE pass END"""
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS hosts (
+                host TEXT PRIMARY KEY,
+                pending INTEGER NOT NULL DEFAULT 0,
+                in_flight INTEGER NOT NULL DEFAULT 0,
+                pass REAL NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_hosts_ready ON hosts (pass) WHERE pending > 0;
+            CREATE TRIGGER IF NOT EXISTS urls_hosts_insert AFTER INSERT ON urls BEGIN
+                INSERT OR IGNORE INTO hosts (host) VALUES (NEW.host);
+                UPDATE hosts SET pass = {resume_pass},
+                                 pending = pending + (NEW.status = 'pending'),
+                                 in_flight = in_flight + (NEW.status = 'processing')
+                WHERE host = NEW.host;
+            END;
+            CREATE TRIGGER IF NOT EXISTS urls_hosts_update AFTER UPDATE OF status ON urls
+            WHEN OLD.status != NEW.status BEGIN
+                UPDATE hosts SET pass = {resume_pass},
+                                 pending = pending + (NEW.status = 'pending') - (OLD.status = 'pending'),
+                                 in_flight = in_flight + (NEW.status = 'processing') - (OLD.status = 'processing')
+                WHERE host = NEW.host;
+            END;
+            CREATE TRIGGER IF NOT EXISTS urls_hosts_delete AFTER DELETE ON urls BEGIN
+                UPDATE hosts SET pending = pending - (OLD.status = 'pending'),
+                                 in_flight = in_flight - (OLD.status = 'processing')
+                WHERE host = OLD.host;
+            END;
+        """)
+        if not exists:
+            self.conn.execute("""
+                INSERT INTO hosts (host, pending, in_flight)
+                SELECT host, SUM(status = 'pending'), SUM(status = 'processing') FROM urls GROUP BY host
+            """)
+
+    def _begin(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def _commit(self):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO queue_metadata (key, value) VALUES ('last_updated', ?)",
+            (datetime.now().isoformat(),)
+        )
+        self.conn.execute("COMMIT")
+
+    def _rollback(self):
+        self.conn.execute("ROLLBACK")
+
+    def contains(self, canonical_url: str) -> bool:
+        return self.conn.execute(
+            "SELECT 1 FROM urls WHERE canonical_url = ?", (canonical_url,)
+        ).fetchone() is not None
+
+    def add_url(self, entry: Dict) -> bool:
+        # Ignored on a clash with either the url primary key or the unique canonical_url index
+        with self.transaction():
+            cursor = self.conn.execute("""
+                INSERT OR IGNORE INTO urls (url, canonical_url, host, priority_score, source_search,
+                                            discovery_date, status, last_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (entry["url"], _canonical_key(entry), _host_key(entry), entry["priority_score"], entry.get("source_search"),
+                  entry["discovery_date"], entry.get("status", "pending"), entry.get("last_updated")))
+            return cursor.rowcount == 1
+
+    def reclaim_expired(self) -> int:
+        with self.transaction():
+            cursor = self.conn.execute("""
+                UPDATE urls SET status = 'pending', lease_owner = NULL, lease_expires = NULL, last_updated = ?
+                WHERE status = 'processing' AND (lease_expires IS NULL OR lease_expires <= ?)
+            """, (datetime.now().isoformat(), time.time()))
+            if cursor.rowcount:
+                self.logger.warning(f"Returned {cursor.rowcount} URLs with expired leases to pending")
+            return cursor.rowcount
+
+    def claim_next(self, batch_size: int, worker_id: str,
+                   lease_seconds: float = DEFAULT_LEASE_SECONDS, max_per_host: int = 0) -> List[str]:
+        # BEGIN IMMEDIATE takes the write lock first, so concurrent claimers never share URLs
+        with self.transaction():
+            self.reclaim_expired()
+            urls = []
+            now = datetime.now().isoformat()
+            expires = time.time() + lease_seconds
+            virtual_time = None
+            while len(urls) < batch_size:
+                host_row = self.conn.execute("""
+                    SELECT host, pass FROM hosts WHERE pending > 0 AND (? = 0 OR in_flight < ?)
+                    ORDER BY pass LIMIT 1
+                """, (max_per_host, max_per_host)).fetchone()
+                if host_row is None:
+                    break
+                row = self.conn.execute("""
+                    SELECT url, priority_score FROM urls WHERE host = ? AND status = 'pending'
+                    ORDER BY priority_score DESC LIMIT 1
+                """, (host_row["host"],)).fetchone()
+                self.conn.execute("""
+                    UPDATE urls SET status = 'processing', last_updated = ?, lease_owner = ?, lease_expires = ?
+                    WHERE url = ?
+                """, (now, worker_id, expires, row["url"]))
+                # The host's next turn comes sooner the higher the priority it just served
+                self.conn.execute("UPDATE hosts SET pass = pass + ? WHERE host = ?",
+                                  (_stride(row["priority_score"]), host_row["host"]))
+                virtual_time = host_row["pass"]
+                urls.append(row["url"])
+            if virtual_time is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO queue_metadata (key, value) VALUES ('virtual_time', ?)",
+                    (str(virtual_time),)
+                )
+            return urls
+
+    def heartbeat(self, urls: List[str], worker_id: str,
+                  lease_seconds: float = DEFAULT_LEASE_SECONDS) -> List[str]:
+        if not urls:
+            return []
+        expires = time.time() + lease_seconds
+        held = []
+        with self.transaction():
+            for url in urls:
+                cursor = self.conn.execute("""
+                    UPDATE urls SET lease_expires = ?
+                    WHERE url = ? AND status = 'processing' AND lease_owner = ?
+                """, (expires, url, worker_id))
+                if cursor.rowcount:
+                    held.append(url)
+        return held
+
+    def set_status(self, url: str, status: str, worker_id: Optional[str] = None) -> bool:
+        with self.transaction():
+            cursor = self.conn.execute("""
+                UPDATE urls SET status = ?, last_updated = ?, lease_owner = NULL, lease_expires = NULL
+                WHERE url = ? AND NOT (? IS NOT NULL AND status = 'processing'
+                                       AND lease_owner IS NOT NULL AND lease_owner != ?)
+            """, (status, datetime.now().isoformat(), url, worker_id, worker_id))
+            return cursor.rowcount == 1
+
+    def update_priority(self, url: str, priority_score: float) -> bool:
+        with self.transaction():
+            cursor = self.conn.execute(
+                "UPDATE urls SET priority_score = ? WHERE url = ?", (priority_score, url)
+            )
+            return cursor.rowcount == 1
+
+    def remove_completed(self, cutoff: datetime) -> int:
+        with self.transaction():
+            cursor = self.conn.execute(
+                "DELETE FROM urls WHERE status = 'completed' AND last_updated <= ?",
+                (cutoff.isoformat(),)
+            )
+            return cursor.rowcount
+
+    def is_ingested(self, name: str, mtime: float, size: int) -> bool:
+        row = self.conn.execute("SELECT mtime, size FROM ingested_files WHERE name = ?", (name,)).fetchone()
+        return row is not None and row["mtime"] == mtime and row["size"] == size
+
+    def mark_ingested(self, name: str, mtime: float, size: int):
+        with self.transaction():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ingested_files (name, mtime, size, ingested_at) VALUES (?, ?, ?, ?)",
+                (name, mtime, size, datetime.now().isoformat())
+            )
+
+    def _stats(self) -> Dict[str, float]:
+        return dict(self.conn.execute("SELECT key, value FROM queue_stats").fetchall())
+
+    def get_metadata(self) -> Dict:
+        stats = self._stats()
+        row = self.conn.execute("SELECT value FROM queue_metadata WHERE key = 'last_updated'").fetchone()
+        return {
+            "last_updated": row["value"] if row else datetime.now().isoformat(),
+            "total_urls": int(stats["total"]),
+            **{status: int(stats[status]) for status in VALID_STATUSES}
+        }
+
+    def priority_stats(self) -> Dict:
+        stats = self._stats()
+        if not stats["total"]:
+            return {"min": 0, "max": 0, "avg": 0}
+        # MIN/MAX each read one end of idx_urls_priority
+        low = self.conn.execute("SELECT MIN(priority_score) FROM urls").fetchone()[0]
+        high = self.conn.execute("SELECT MAX(priority_score) FROM urls").fetchone()[0]
+        return {"min": low, "max": high, "avg": stats["score_sum"] / stats["total"]}
+
+    def priority_histogram(self) -> Dict[str, int]:
+        stats = self._stats()
+        return {_bucket_label(n): int(stats[f'bucket_{n}']) for n in range(PRIORITY_BUCKETS)}
+
+    def close(self):
+        self.conn.close()
+
+
+BACKENDS = {
+    'json': JSONQueueBackend,
+    'journal': JournalQueueBackend,
+    'sqlite': SQLiteQueueBackend
+}
+
+
+def create_backend(name: Optional[str], queue_dir: str, logger) -> QueueBackend:
+    """Instantiate a backend by name (default from KG_QUEUE_BACKEND, else 'json')."""
+    name = name or os.getenv('KG_QUEUE_BACKEND', 'json')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown queue backend: {name}")
+    return BACKENDS[name](queue_dir, logger)
@@ -1,13 +1,17 @@
 import os
-import json
+import sys
 import time
 from datetime import datetime
 from typing import Dict, List, Optional
 import requests
 from urllib.parse import urlparse
 
+# Shared JSON codec lives with the scraper modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scrape')))
+from json_codec import dumpb, PRETTY_JSON
+
 class SearchManager:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, queue_manager=None):
         self.endpoint = "https://api.bing.microsoft.com/v7.0/search"
         self.api_key = api_key
         self.headers = {
@@ -16,6 +20,8 @@ class SearchManager:
         # Create output directory if it doesn't exist
         self.output_dir = os.path.join(os.path.dirname(__file__), 'output_json')
         os.makedirs(self.output_dir, exist_ok=True)
+        # Optional URLQueueManager; results are pushed to it as soon as they are saved
+        self.queue_manager = queue_manager
 
     def _clean_filename(self, query: str) -> str:
         """Convert search query to valid filename component."""
@@ -111,10 +117,15 @@ class SearchManager:
             filename = self._generate_filename(query)
             filepath = os.path.join(self.output_dir, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            with open(filepath, 'wb') as f:
+                f.write(dumpb(output_data, pretty=PRETTY_JSON))
             
             print(f"✅ Search results saved to: {filename}")
+            
+            # Push straight into the queue; the file is marked ingested so it is not re-read
+            if self.queue_manager is not None:
+                added = self.queue_manager.add_search_results(output_data, source_path=filepath)
+                print(f"✅ Queued {added} new URLs")
             return filepath
             
         except requests.exceptions.RequestException as e:
@@ -1,18 +1,28 @@
 import json
 import os
+import sys
 import time
-from datetime import datetime
+import socket
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urljoin
 import logging
 
+# Shared JSON codec lives with the scraper modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scrape')))
+from json_codec import load
+from url_canonical import URLCanonicalizer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from queue_backends import create_backend, VALID_STATUSES, DEFAULT_LEASE_SECONDS
+
 class URLQueueManager:
-    def __init__(self):
+    def __init__(self, backend: Optional[str] = None, worker_id: Optional[str] = None,
+                 lease_seconds: Optional[float] = None):
         # Set up directories
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.search_results_dir = os.path.join(self.base_dir, 'output_json')
         self.queue_dir = os.path.join(self.base_dir, 'queue')
-        self.queue_file = os.path.join(self.queue_dir, 'queue-list.json')
         
         # Ensure queue directory exists
         os.makedirs(self.queue_dir, exist_ok=True)
@@ -20,8 +30,18 @@ class URLQueueManager:
         # Set up logging
         self._setup_logging()
         
-        # Initialize or load queue
-        self.queue_data = self._load_queue()
+        # Storage backend: 'json' (queue-list.json), 'journal' (snapshot +
+        # append-only journal) or 'sqlite' (queue.sqlite), defaulting to KG_QUEUE_BACKEND
+        self.backend = create_backend(backend, self.queue_dir, self.logger)
+        
+        # Duplicates are checked on canonical URLs, refined by rel=canonical feedback from scraped pages
+        self.canonicalizer = URLCanonicalizer(os.path.join(self.queue_dir, 'canonical_aliases.jsonl'))
+        
+        # Claimed URLs are leased to this worker; unfinished leases expire and return to pending
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds or float(os.getenv('KG_QUEUE_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+        # Hosts take turns in each batch; optionally cap leased URLs per host (0 = no cap)
+        self.max_per_host = int(os.getenv('KG_QUEUE_HOST_CONCURRENCY', '0'))
 
     def _setup_logging(self):
         """Configure logging for the queue manager."""
@@ -35,82 +55,17 @@ class URLQueueManager:
         )
         self.logger = logging.getLogger('URLQueueManager')
 
-    def _load_queue(self) -> Dict:
-        """Load existing queue or create new one."""
-        if os.path.exists(self.queue_file):
-            try:
-                with open(self.queue_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                self.logger.error(f"Error reading queue file: {self.queue_file}")
-                return self._create_new_queue()
-        return self._create_new_queue()
-
-    def _create_new_queue(self) -> Dict:
-        """Create new queue structure."""
-        return {
-            "queue_metadata": {
-                "last_updated": datetime.now().isoformat(),
-                "total_urls": 0,
-                "pending": 0,
-                "processing": 0,
-                "completed": 0
-            },
-            "urls": []
-        }
-
-    def _save_queue(self):
-        """Save current queue to file."""
-        try:
-            with open(self.queue_file, 'w', encoding='utf-8') as f:
-                json.dump(self.queue_data, f, indent=2)
-            self.logger.info("Queue saved successfully")
-        except Exception as e:
-            self.logger.error(f"Error saving queue: {str(e)}")
-
-    def _update_metadata(self):
-        """Update queue metadata counts."""
-        urls = self.queue_data["urls"]
-        self.queue_data["queue_metadata"].update({
-            "last_updated": datetime.now().isoformat(),
-            "total_urls": len(urls),
-            "pending": sum(1 for url in urls if url["status"] == "pending"),
-            "processing": sum(1 for url in urls if url["status"] == "processing"),
-            "completed": sum(1 for url in urls if url["status"] == "completed")
-        })
-
     def read_search_results(self) -> int:
         """
-        Read all search result JSONs and add new URLs to queue.
+        Read new or changed search result JSONs and add their URLs to queue.
+        Files already ingested (same name, mtime and size) are skipped.
         Returns number of new URLs added.
         """
         new_urls_count = 0
         try:
-            for filename in os.listdir(self.search_results_dir):
-                if not filename.endswith('.json'):
-                    continue
-                
-                filepath = os.path.join(self.search_results_dir, filename)
-                self.logger.info(f"Processing search results from: {filename}")
-                
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        search_data = json.load(f)
-                    
-                    # Extract search term from filename
-                    search_term = filename.split('_')[1]  # search_TERM_timestamp.json
-                    
-                    # Process URLs from search results
-                    for url_data in search_data.get("urls", []):
-                        if self._add_url_to_queue(url_data, search_term):
-                            new_urls_count += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing {filename}: {str(e)}")
-                    continue
-            
-            self._update_metadata()
-            self._save_queue()
+            # One commit for every URL found, not one per URL
+            with self.backend.transaction():
+                new_urls_count = self._read_search_files()
             self.logger.info(f"Added {new_urls_count} new URLs to queue")
             return new_urls_count
             
@@ -118,109 +73,154 @@ class URLQueueManager:
             self.logger.error(f"Error reading search results: {str(e)}")
             return 0
 
+    def _read_search_files(self) -> int:
+        """Add URLs from every search result file not yet ingested; returns number added."""
+        new_urls_count = 0
+        for filename in sorted(os.listdir(self.search_results_dir)):
+            if not filename.endswith('.json'):
+                continue
+            
+            filepath = os.path.join(self.search_results_dir, filename)
+            stat = os.stat(filepath)
+            if self.backend.is_ingested(filename, stat.st_mtime, stat.st_size):
+                continue
+            self.logger.info(f"Processing search results from: {filename}")
+            
+            try:
+                with open(filepath, 'rb') as f:
+                    search_data = load(f)
+                new_urls_count += self.add_search_results(search_data, source_path=filepath)
+            except Exception as e:
+                self.logger.error(f"Error processing {filename}: {str(e)}")
+        return new_urls_count
+
+    def add_search_results(self, search_data: Dict, search_term: Optional[str] = None,
+                           source_path: Optional[str] = None) -> int:
+        """
+        Add the URLs of one search result set, e.g. pushed directly by SearchManager.
+        
+        When source_path is given, the search term defaults to the one in its
+        file name and the file is recorded as ingested so later scans skip it.
+        Returns number of new URLs added.
+        """
+        if search_term is None and source_path:
+            search_term = os.path.basename(source_path).split('_')[1]  # search_TERM_timestamp.json
+        
+        new_urls_count = 0
+        with self.backend.transaction():
+            for url_data in search_data.get("urls", []):
+                if self._add_url_to_queue(url_data, search_term):
+                    new_urls_count += 1
+            if source_path:
+                stat = os.stat(source_path)
+                self.backend.mark_ingested(os.path.basename(source_path), stat.st_mtime, stat.st_size)
+        return new_urls_count
+
     def _add_url_to_queue(self, url_data: Dict, search_term: str) -> bool:
         """
         Add a URL to the queue if it's not already present.
-        Returns True if URL was added, False if it was a duplicate.
+        Returns True if URL was added, False if it was a duplicate
+        (same URL or same canonical form).
         """
         url = url_data.get("url")
         if not url:
             return False
             
-        # Check for duplicates
-        if any(item["url"] == url for item in self.queue_data["urls"]):
-            return False
-        
-        # Add new URL to queue
+        # Add new URL to queue (the backend rejects duplicates)
         queue_entry = {
             "url": url,
+            "canonical_url": self.canonicalizer.canonicalize(url),
             "priority_score": url_data.get("priority_score", 1.0),
             "source_search": search_term,
             "discovery_date": datetime.now().isoformat(),
             "status": "pending"
         }
         
-        self.queue_data["urls"].append(queue_entry)
-        return True
+        return self.backend.add_url(queue_entry)
+
+    def record_canonical(self, url: str, declared_url: Optional[str]):
+        """
+        Feed back the rel=canonical URL declared by the page fetched from url.
+        
+        Later variants of url resolve to the declared page, and the declared
+        page itself is queued as completed so it is never fetched again.
+        """
+        if not declared_url:
+            return
+        declared_url = urljoin(url, declared_url)
+        canonical_url = self.canonicalizer.learn(url, declared_url)
+        if canonical_url is None or self.backend.contains(canonical_url):
+            return
+        now = datetime.now().isoformat()
+        self.backend.add_url({
+            "url": declared_url,
+            "canonical_url": canonical_url,
+            "priority_score": 1.0,
+            "source_search": "rel=canonical",
+            "discovery_date": now,
+            "status": "completed",
+            "last_updated": now
+        })
+        self.logger.info(f"{url} declares canonical {canonical_url}")
 
     def get_next_urls(self, batch_size: int = 5) -> List[str]:
         """Get next batch of pending URLs for processing."""
-        pending_urls = [
-            url_data for url_data in self.queue_data["urls"]
-            if url_data["status"] == "pending"
-        ]
-        
-        # Sort by priority score
-        pending_urls.sort(key=lambda x: x["priority_score"], reverse=True)
-        
-        # Get batch and update status
-        batch = pending_urls[:batch_size]
-        for url_data in batch:
-            url_data["status"] = "processing"
-        
-        self._update_metadata()
-        self._save_queue()
-        
-        return [url_data["url"] for url_data in batch]
+        # Round-robin across hosts weighted by priority; claimed URLs move to "processing" under a lease
+        return self.backend.claim_next(batch_size, self.worker_id, self.lease_seconds, self.max_per_host)
+
+    def heartbeat(self, urls: List[str]) -> List[str]:
+        """Extend this worker's leases on URLs still being processed; returns those still held."""
+        if not urls:
+            return []
+        held = self.backend.heartbeat(urls, self.worker_id, self.lease_seconds)
+        for url in set(urls) - set(held):
+            self.logger.warning(f"Lease lost on {url}")
+        return held
 
     def mark_url_status(self, url: str, status: str):
         """Update status of a specific URL."""
-        valid_statuses = {"pending", "processing", "completed", "failed"}
-        if status not in valid_statuses:
+        if status not in VALID_STATUSES:
             self.logger.error(f"Invalid status: {status}")
             return
         
-        for url_data in self.queue_data["urls"]:
-            if url_data["url"] == url:
-                url_data["status"] = status
-                url_data["last_updated"] = datetime.now().isoformat()
-                break
-        
-        self._update_metadata()
-        self._save_queue()
+        if not self.backend.set_status(url, status, self.worker_id):
+            self.logger.warning(f"URL not in queue or leased by another worker: {url}")
+
+    def update_priority(self, url: str, priority_score: float):
+        """Change the priority of a queued URL."""
+        if not self.backend.update_priority(url, priority_score):
+            self.logger.warning(f"URL not in queue: {url}")
 
     def cleanup_queue(self, days_threshold: int = 7):
         """Remove completed URLs older than threshold days."""
-        current_time = datetime.now()
-        
-        def should_keep(url_data):
-            if url_data["status"] != "completed":
-                return True
-                
-            completed_date = datetime.fromisoformat(url_data["last_updated"])
-            days_old = (current_time - completed_date).days
-            return days_old <= days_threshold
-        
-        original_count = len(self.queue_data["urls"])
-        self.queue_data["urls"] = list(filter(should_keep, self.queue_data["urls"]))
-        removed_count = original_count - len(self.queue_data["urls"])
+        # Kept while less than days_threshold + 1 whole days old
+        cutoff = datetime.now() - timedelta(days=days_threshold + 1)
+        removed_count = self.backend.remove_completed(cutoff)
         
         if removed_count > 0:
-            self._update_metadata()
-            self._save_queue()
             self.logger.info(f"Removed {removed_count} old completed URLs")
 
+    def close(self):
+        """Flush and release the storage backend (compacts the journal in journal mode)."""
+        self.backend.close()
+
     def get_queue_stats(self) -> Dict:
         """Get current queue statistics."""
+        metadata = self.backend.get_metadata()
         return {
-            "last_updated": self.queue_data["queue_metadata"]["last_updated"],
-            "total_urls": self.queue_data["queue_metadata"]["total_urls"],
-            "pending": self.queue_data["queue_metadata"]["pending"],
-            "processing": self.queue_data["queue_metadata"]["processing"],
-            "completed": self.queue_data["queue_metadata"]["completed"],
-            "priority_stats": self._calculate_priority_stats()
+            "last_updated": metadata["last_updated"],
+            "total_urls": metadata["total_urls"],
+            "pending": metadata["pending"],
+            "processing": metadata["processing"],
+            "completed": metadata["completed"],
+            "failed": metadata.get("failed", 0),
+            "priority_stats": self._calculate_priority_stats(),
+            "priority_histogram": self.backend.priority_histogram()
         }
 
     def _calculate_priority_stats(self) -> Dict:
         """Calculate priority score statistics."""
-        scores = [url_data["priority_score"] for url_data in self.queue_data["urls"]]
-        if not scores:
-            return {"min": 0, "max": 0, "avg": 0}
-        return {
-            "min": min(scores),
-            "max": max(scores),
-            "avg": sum(scores) / len(scores)
-        }
+        return self.backend.priority_stats()
 
 def main():
     """Example usage of URLQueueManager."""
@@ -249,6 +249,7 @@ def main():
     
     # Clean up old entries
     manager.cleanup_queue()
+    manager.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
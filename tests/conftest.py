@@ -0,0 +1,10 @@
+"""Make the flat scrape/ and search/ modules importable from the tests."""
+
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for directory in ('scrape', 'search'):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,60 @@
+"""Chunking of oversized records and lazy re-assembly."""
+
+import pytest
+
+from doc_shaper import (CHUNK_REF_KEY, LazyDocument, assemble_document, estimate_size,
+                        shape_document)
+
+
+def _record(content_chars, link_count):
+    return {
+        "id": "page-1",
+        "url": "https://example.com/page",
+        "title": "Page",
+        "content": "é€ " * (content_chars // 3),
+        "links": [{"text": f"link {i}", "url": f"https://example.com/{i}"} for i in range(link_count)],
+        "word_count": 42
+    }
+
+
+def test_small_record_is_a_single_unchanged_document():
+    record = _record(300, 5)
+    assert shape_document(record) == [record]
+
+
+def test_large_record_round_trips_through_chunks():
+    record = _record(400000, 20000)
+    documents = shape_document(record, target_bytes=64 * 1024, chunk_bytes=32 * 1024)
+    parent = documents[-1]
+    chunks = {document["id"]: document for document in documents[:-1]}
+
+    assert parent["id"] == "page-1" and parent["url"] == record["url"]
+    assert all(estimate_size(document) <= 64 * 1024 for document in documents)
+    assert set(LazyDocument(parent, chunks.__getitem__).chunked_fields) == {"content", "links"}
+    assert all(chunk_id in chunks for chunk_id in parent["content"][CHUNK_REF_KEY])
+    assert assemble_document(parent, chunks.__getitem__) == record
+
+
+def test_lazy_document_fetches_only_fields_that_are_read():
+    record = _record(400000, 20000)
+    documents = shape_document(record, target_bytes=64 * 1024, chunk_bytes=32 * 1024)
+    chunks = {document["id"]: document for document in documents[:-1]}
+    fetched = []
+
+    def fetch_chunk(chunk_id):
+        fetched.append(chunk_id)
+        return chunks[chunk_id]
+
+    page = LazyDocument(documents[-1], fetch_chunk)
+    assert page["title"] == "Page" and not fetched
+    assert page["content"] == record["content"]
+    assert fetched and all("__content__" in chunk_id for chunk_id in fetched)
+    count = len(fetched)
+    page["content"]
+    assert len(fetched) == count
+
+
+def test_unchunkable_oversized_record_raises():
+    record = {"id": "page-1", "url": "https://example.com/" + "x" * (3 * 1024 * 1024)}
+    with pytest.raises(ValueError):
+        shape_document(record)
@@ -0,0 +1,23 @@
+"""Language model pool: missing models are reported once; throughput counters."""
+
+import logging
+
+from language_gate import LanguageModelPool
+
+
+def test_missing_model_warns_once(caplog):
+    pool = LanguageModelPool({'xx': ('xx_model_that_is_not_installed', 'english')})
+    with caplog.at_level(logging.WARNING, logger='LanguageModelPool'):
+        for _ in range(3):
+            assert not pool.is_supported('xx')
+    assert len(caplog.records) == 1
+    assert 'NLP is skipped' in caplog.records[0].getMessage()
+
+
+def test_throughput_rates_exclude_skipped_documents():
+    pool = LanguageModelPool()
+    pool.record('en', 1000, 2.0)
+    pool.record('en', 5000, 0.5, skipped=True)
+    stats = pool.get_throughput_stats()['en']
+    assert (stats['documents'], stats['skipped'], stats['chars']) == (2, 1, 6000)
+    assert (stats['docs_per_second'], stats['chars_per_second']) == (0.5, 500.0)
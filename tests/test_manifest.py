@@ -0,0 +1,49 @@
+"""Output manifest backfill and retry selection."""
+
+import json
+
+from manifest import OutputManifest
+
+
+def _write_page(directory, record_id, url):
+    with open(directory / f"{record_id}.json", 'w', encoding='utf-8') as f:
+        json.dump({"id": record_id, "url": url, "content": f"text of {url}"}, f)
+
+
+def test_new_manifest_backfills_existing_outputs(tmp_path):
+    _write_page(tmp_path, 'a', 'https://example.com/a')
+    _write_page(tmp_path, 'b', 'https://example.com/b')
+    manifest = OutputManifest(str(tmp_path / 'manifest.sqlite'))
+    assert sorted(row['id'] for row in manifest.pending('cosmos')) == ['a', 'b']
+    assert manifest.load_record(manifest.find_by_url('https://example.com/a')[0])['id'] == 'a'
+    manifest.close()
+
+    # Existing manifests are only backfilled on request, and never reset recorded state
+    _write_page(tmp_path, 'c', 'https://example.com/c')
+    manifest = OutputManifest(str(tmp_path / 'manifest.sqlite'))
+    manifest.mark('cosmos', 'a', 'inserted')
+    assert len(list(manifest.pending('cosmos'))) == 1
+    assert manifest.backfill(str(tmp_path)) == 1
+    assert sorted(row['id'] for row in manifest.pending('cosmos')) == ['b', 'c']
+    manifest.close()
+
+
+def test_failed_rows_are_retried_up_to_max_attempts(tmp_path):
+    _write_page(tmp_path, 'a', 'https://example.com/a')
+    manifest = OutputManifest(str(tmp_path / 'manifest.sqlite'))
+    for _ in range(2):
+        manifest.mark('cosmos', 'a', 'failed', error='timeout')
+        assert [row['id'] for row in manifest.pending('cosmos', max_attempts=3)] == ['a']
+    manifest.mark('cosmos', 'a', 'failed', error='timeout')
+    assert list(manifest.pending('cosmos', max_attempts=3)) == []
+    assert manifest.counts()['cosmos'] == {'failed': 1}
+    manifest.close()
+
+
+def test_latest_rows_keep_newest_scrape_per_url(tmp_path):
+    manifest = OutputManifest(str(tmp_path / 'manifest.sqlite'))
+    for record_id, url in (('a1', 'https://example.com/a'), ('b1', 'https://example.com/b'),
+                           ('a2', 'https://example.com/a')):
+        manifest.record_output({"id": record_id, "url": url}, 'file', location=f"{record_id}.json", size=1)
+    assert [row['id'] for row in manifest.latest_rows()] == ['b1', 'a2']
+    manifest.close()
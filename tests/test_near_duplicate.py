@@ -0,0 +1,45 @@
+"""Near-duplicate detection: pages are indexed only once added."""
+
+import near_duplicate
+from near_duplicate import NearDuplicateIndex
+
+STORY = " ".join(f"word{i}" for i in range(200))
+
+
+def test_unsaved_page_never_becomes_canonical(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / 'near_duplicates.jsonl'))
+    # Checked but never added, e.g. its save failed
+    assert index.check("https://a.example.com/story", STORY) is None
+    assert index.check("https://b.example.com/story", STORY + " extra") is None
+
+
+def test_added_pages_are_matched_and_persisted(tmp_path):
+    path = str(tmp_path / 'near_duplicates.jsonl')
+    index = NearDuplicateIndex(path)
+    assert index.check("https://a.example.com/story", STORY) is None
+    index.add("page-a", "https://a.example.com/story")
+
+    match = index.check("https://b.example.com/story", STORY + " extra")
+    assert match["canonical_id"] == "page-a"
+    assert match["canonical_url"] == "https://a.example.com/story"
+    index.add("page-b", "https://b.example.com/story")
+
+    # Re-scrapes of the canonical page are not its own duplicates
+    assert index.check("https://a.example.com/story", STORY) is None
+
+    reloaded = NearDuplicateIndex(path)
+    assert reloaded.entries["page-b"]["cluster"] == "page-a"
+    assert reloaded.check("https://c.example.com/story", STORY)["canonical_id"] == "page-a"
+
+
+def test_unsaved_checks_do_not_accumulate(tmp_path, monkeypatch):
+    monkeypatch.setattr(near_duplicate, 'MAX_PENDING_CHECKS', 2)
+    index = NearDuplicateIndex(str(tmp_path / 'near_duplicates.jsonl'))
+    index.check("https://a.example.com/story", STORY)
+    index.discard("https://a.example.com/story")
+    index.add("page-a", "https://a.example.com/story")
+    assert index.entries == {}
+
+    for host in "bcd":
+        index.check(f"https://{host}.example.com/story", STORY)
+    assert list(index._checked) == ["https://c.example.com/story", "https://d.example.com/story"]
@@ -0,0 +1,21 @@
+"""Page type classification from cheap features."""
+
+from page_classifier import classify_page
+
+
+def _features(**overrides):
+    features = {'link_density': 0.1, 'og_type': '', 'has_published_time': False,
+                'word_count': 400, 'json_ld_types': []}
+    features.update(overrides)
+    return features
+
+
+def test_site_wide_json_ld_does_not_make_a_page_an_index():
+    assert classify_page(_features(json_ld_types=['Organization', 'SiteNavigationElement', 'WebSite'])) == 'other'
+
+
+def test_page_level_types_decide():
+    assert classify_page(_features(json_ld_types=['CollectionPage', 'WebSite'])) == 'index'
+    assert classify_page(_features(json_ld_types=['NewsArticle', 'WebSite'])) == 'article'
+    assert classify_page(_features(json_ld_types=['Product', 'WebSite'])) == 'product'
+    assert classify_page(_features(link_density=0.7)) == 'index'
@@ -0,0 +1,23 @@
+"""Columnar export: one row per record ID."""
+
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from parquet_export import export_corpus
+from shard_writer import ShardedJSONLWriter
+
+
+def test_rewritten_record_exports_latest_version_once(tmp_path):
+    input_dir, output_dir = str(tmp_path / 'output_json'), str(tmp_path / 'output_parquet')
+    writer = ShardedJSONLWriter(input_dir)
+    record = {"id": "page_20240101_120000", "url": "https://example.com/a",
+              "metadata": {"title": "Old"}, "links": [{"text": "b", "url": "https://example.com/b"}]}
+    writer.write(record)
+    writer.write(dict(record, metadata={"title": "New"}))
+    writer.close()
+
+    counts = export_corpus(input_dir, output_dir)
+    assert (counts['pages'], counts['links']) == (1, 1)
+    pages = pq.read_table(str(tmp_path / 'output_parquet' / 'pages')).to_pylist()
+    assert [page['title'] for page in pages] == ["New"]
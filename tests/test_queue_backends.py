@@ -0,0 +1,104 @@
+"""Behaviour shared by the queue storage backends."""
+
+import logging
+from datetime import datetime
+
+import pytest
+
+from queue_backends import JSONQueueBackend, create_backend
+
+LOGGER = logging.getLogger('test_queue_backends')
+
+
+def _entry(url, priority_score=1.0):
+    return {"url": url, "canonical_url": url, "priority_score": priority_score, "source_search": "test",
+            "discovery_date": datetime.now().isoformat(), "status": "pending"}
+
+
+@pytest.fixture(params=['json', 'journal', 'sqlite'])
+def backend(request, tmp_path):
+    backend = create_backend(request.param, str(tmp_path), LOGGER)
+    yield backend
+    backend.close()
+
+
+def test_heartbeat_without_urls_is_a_no_op(backend):
+    assert backend.heartbeat([], 'worker') == []
+
+
+def test_json_commit_without_transitions_does_not_rewrite(tmp_path, monkeypatch):
+    backend = JSONQueueBackend(str(tmp_path), LOGGER)
+    backend.add_url(_entry("https://example.com/a"))
+    saves = []
+    monkeypatch.setattr(backend, '_save_queue', lambda: saves.append(True))
+
+    assert backend.heartbeat(["https://example.com/a"], 'worker') == []   # not leased
+    assert backend.claim_next(5, 'worker') == ["https://example.com/a"]
+    assert backend.claim_next(5, 'worker') == []
+    assert backend.heartbeat(["https://example.com/a"], 'worker') == ["https://example.com/a"]
+    assert len(saves) == 2   # the claim and the lease extension
+
+
+def _reopen(backend, tmp_path):
+    name = {'JSONQueueBackend': 'json', 'JournalQueueBackend': 'journal',
+            'SQLiteQueueBackend': 'sqlite'}[type(backend).__name__]
+    backend.close()
+    return create_backend(name, str(tmp_path), LOGGER)
+
+
+def test_add_rejects_duplicate_url_and_canonical_key(backend):
+    assert backend.add_url(_entry("https://example.com/a"))
+    assert not backend.add_url(_entry("https://example.com/a"))
+    variant = dict(_entry("http://www.example.com/a/"), canonical_url="https://example.com/a")
+    assert not backend.add_url(variant)
+    assert backend.contains("https://example.com/a")
+    assert not backend.contains("https://example.com/b")
+    assert backend.get_metadata()["total_urls"] == 1
+
+
+def test_claim_orders_by_priority_and_leases_to_worker(backend):
+    for path, priority_score in (("low", 0.5), ("high", 2.0), ("mid", 1.0)):
+        backend.add_url(_entry(f"https://example.com/{path}", priority_score))
+    assert backend.claim_next(2, 'worker-a') == ["https://example.com/high", "https://example.com/mid"]
+    assert backend.claim_next(5, 'worker-b') == ["https://example.com/low"]
+    assert backend.claim_next(5, 'worker-b') == []
+
+    # Leases belong to the claiming worker
+    assert not backend.set_status("https://example.com/high", "completed", 'worker-b')
+    assert backend.set_status("https://example.com/high", "completed", 'worker-a')
+    metadata = backend.get_metadata()
+    assert (metadata["pending"], metadata["processing"], metadata["completed"]) == (0, 2, 1)
+
+
+def test_expired_leases_return_to_pending(backend):
+    backend.add_url(_entry("https://example.com/a"))
+    assert backend.claim_next(1, 'crashed-worker', lease_seconds=0) == ["https://example.com/a"]
+    assert backend.heartbeat(["https://example.com/a"], 'other-worker') == []
+    # Every claim first reclaims expired leases
+    assert backend.claim_next(1, 'worker') == ["https://example.com/a"]
+    assert not backend.set_status("https://example.com/a", "completed", 'crashed-worker')
+    assert backend.set_status("https://example.com/a", "completed", 'worker')
+
+
+def test_state_survives_reopen(backend, tmp_path):
+    for path in ("a", "b", "c"):
+        backend.add_url(_entry(f"https://example.com/{path}"))
+    [claimed] = backend.claim_next(1, 'worker')
+    backend.set_status(claimed, "completed", 'worker')
+    backend.update_priority("https://example.com/c", 5.0)
+
+    reopened = _reopen(backend, tmp_path)
+    metadata = reopened.get_metadata()
+    assert (metadata["total_urls"], metadata["pending"], metadata["completed"]) == (3, 2, 1)
+    assert not reopened.add_url(_entry(claimed))
+    assert reopened.claim_next(1, 'worker') == ["https://example.com/c"]
+    reopened.close()
+
+
+def test_processing_without_lease_is_reclaimed(backend):
+    backend.add_url(_entry("https://example.com/a"))
+    backend.add_url(dict(_entry("https://example.com/b"), status="processing"))
+    assert backend.set_status("https://example.com/a", "processing")
+    assert backend.reclaim_expired() == 2
+    assert backend.get_metadata()["pending"] == 2
+    assert sorted(backend.claim_next(5, 'worker')) == ["https://example.com/a", "https://example.com/b"]
@@ -0,0 +1,95 @@
+"""Crash recovery of the journal queue backend."""
+
+import logging
+from datetime import datetime
+
+import pytest
+
+from queue_backends import JournalQueueBackend, QueueLoadError
+
+LOGGER = logging.getLogger('test_queue_journal')
+
+
+def _entry(url):
+    return {"url": url, "canonical_url": url, "priority_score": 1.0, "source_search": "test",
+            "discovery_date": datetime.now().isoformat(), "status": "pending"}
+
+
+def _open(queue_dir):
+    # No background compaction during the test
+    return JournalQueueBackend(str(queue_dir), LOGGER, compact_interval=3600)
+
+
+def _crash(backend):
+    """Abandon the backend mid-append: a torn record, no compaction, no close."""
+    backend._stop.set()
+    backend._journal_file.write(b'{"op": "add", "entry": {"url": "https://torn')
+    backend._journal_file.flush()
+    backend._journal_file.close()
+    backend._journal_file = None
+
+
+def test_crash_restart_append_crash_restart(tmp_path):
+    backend = _open(tmp_path)
+    for i in range(3):
+        assert backend.add_url(_entry(f"https://example.com/first/{i}"))
+    _crash(backend)
+
+    backend = _open(tmp_path)
+    assert backend.get_metadata()["total_urls"] == 3
+    for i in range(3):
+        assert backend.add_url(_entry(f"https://example.com/second/{i}"))
+    _crash(backend)
+
+    # The first torn tail is now in a segment that is no longer the last one
+    backend = _open(tmp_path)
+    assert backend.get_metadata()["total_urls"] == 6
+    for phase in ("first", "second"):
+        for i in range(3):
+            assert backend.contains(f"https://example.com/{phase}/{i}")
+    backend.close()
+
+    backend = _open(tmp_path)
+    assert backend.get_metadata()["total_urls"] == 6
+    backend.close()
+
+
+def test_corrupt_record_before_the_end_raises(tmp_path):
+    backend = _open(tmp_path)
+    backend.add_url(_entry("https://example.com/a"))
+    backend._stop.set()
+    path = backend._segment_path(backend._segment)
+    backend._journal_file.close()
+    backend._journal_file = None
+    with open(path, 'ab') as f:
+        f.write(b'not json\n')
+        f.write(b'{"op": "ingested", "name": "x", "mtime": 0, "size": 0}\n')
+
+    with pytest.raises(QueueLoadError):
+        _open(tmp_path)
+
+
+def test_torn_multi_op_commit_is_dropped_whole(tmp_path):
+    backend = _open(tmp_path)
+    backend.add_url(_entry("https://example.com/committed"))
+    with backend.transaction():
+        for i in range(3):
+            backend.add_url(_entry(f"https://example.com/batch/{i}"))
+        backend.claim_next(3, 'worker')
+    path = backend._segment_path(backend._segment)
+    backend._stop.set()
+    backend._journal_file.close()
+    backend._journal_file = None
+
+    # Crash partway through writing the transaction: cut its line in the middle
+    with open(path, 'rb') as f:
+        data = f.read()
+    last_line_start = data.rstrip(b'\n').rfind(b'\n') + 1
+    with open(path, 'r+b') as f:
+        f.truncate(last_line_start + (len(data) - last_line_start) // 2)
+
+    backend = _open(tmp_path)
+    metadata = backend.get_metadata()
+    assert (metadata["total_urls"], metadata["pending"], metadata["processing"]) == (1, 1, 0)
+    assert not backend.contains("https://example.com/batch/0")
+    backend.close()
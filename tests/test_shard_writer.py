@@ -0,0 +1,78 @@
+"""Sharded JSONL output: crash recovery and concurrent writers."""
+
+import multiprocessing
+import os
+
+import pytest
+
+from shard_writer import (ShardedJSONLWriter, iter_output_records, iter_shard_records, list_shards,
+                          load_offset_index, read_record)
+
+RECORDS_PER_WRITER = 500
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_torn_tail_is_trimmed_before_resuming(tmp_path, compression):
+    output_dir = str(tmp_path)
+    writer = ShardedJSONLWriter(output_dir, compression=compression)
+    for i in range(3):
+        writer.write({"id": f"r{i}", "content": "text"})
+    shard_path = writer.shard_path
+    writer.close()
+    # Crash mid-append: a partial record and a partial index entry
+    offset = os.path.getsize(shard_path)
+    with open(shard_path, 'ab') as f:
+        f.write(b'{"id": "torn", "cont')
+    with open(shard_path[:shard_path.rindex('.jsonl')] + '.idx', 'a', encoding='utf-8') as f:
+        f.write(f"torn\t{offset}")
+
+    writer = ShardedJSONLWriter(output_dir, compression=compression)
+    assert writer.shard_path == shard_path
+    writer.write({"id": "r3", "content": "text"})
+    writer.close()
+
+    assert [record["id"] for _, record in iter_shard_records(output_dir)] == ["r0", "r1", "r2", "r3"]
+    index = load_offset_index(output_dir)
+    assert sorted(index) == ["r0", "r1", "r2", "r3"]
+    assert read_record(output_dir, *index["r3"])["id"] == "r3"
+
+
+def _write_records(output_dir, writer_number, start):
+    # Small shards, so writers rotate underneath each other
+    writer = ShardedJSONLWriter(output_dir, max_shard_bytes=16384)
+    start.wait()
+    for i in range(RECORDS_PER_WRITER):
+        writer.write({"id": f"w{writer_number}-{i}", "content": "x" * (i % 50)})
+    writer.close()
+
+
+def test_concurrent_writers_never_share_offsets(tmp_path):
+    output_dir = str(tmp_path)
+    start = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=_write_records, args=(output_dir, n, start)) for n in range(4)]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    assert len(list_shards(output_dir)) > 1
+    index = load_offset_index(output_dir)
+    assert len(index) == 4 * RECORDS_PER_WRITER
+    for record_id, (shard, offset, length) in index.items():
+        assert read_record(output_dir, shard, offset, length)["id"] == record_id
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip'])
+def test_latest_skips_superseded_records(tmp_path, compression):
+    output_dir = str(tmp_path)
+    writer = ShardedJSONLWriter(output_dir, compression=compression)
+    writer.write({"id": "a", "version": 1})
+    writer.write({"id": "b", "version": 1})
+    writer.write({"id": "a", "version": 2})
+    writer.close()
+
+    assert len(list(iter_output_records(output_dir))) == 3
+    assert [(record["id"], record["version"]) for _, record in iter_output_records(output_dir, latest=True)] \
+        == [("b", 1), ("a", 2)]
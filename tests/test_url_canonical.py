@@ -0,0 +1,60 @@
+"""URL canonicalisation rules and learned rel=canonical aliases."""
+
+import json
+
+import pytest
+
+from url_canonical import URLCanonicalizer, canonicalize_url
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('http://www.Example.com/a/?utm_source=x#top', 'https://example.com/a'),
+    ('https://example.com:443/a//b/index.html', 'https://example.com/a/b'),
+    ('https://example.com/a?b=2&a=1&fbclid=xyz', 'https://example.com/a?a=1&b=2'),
+    ('https://amp.example.com/amp/story', 'https://example.com/story'),
+    ('https://example.com/story/amp/', 'https://example.com/story'),
+    ('https://example.com/story.amp.html', 'https://example.com/story.html'),
+    ('https://example.com/story?outputType=AMP&id=1', 'https://example.com/story?id=1'),
+    ('https://example.com/feed?outputType=xml', 'https://example.com/feed?outputType=xml'),
+    ('https://example-com.cdn.ampproject.org/c/s/example.com/story', 'https://example.com/story'),
+    ('https://example.com:8080/', 'https://example.com:8080/'),
+    ('https://bücher.example/', 'https://xn--bcher-kva.example/'),
+])
+def test_normalize(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_non_http_urls_are_left_alone():
+    assert canonicalize_url(' mailto:someone@example.com ') == 'mailto:someone@example.com'
+
+
+def test_learned_aliases_are_followed_and_persisted(tmp_path):
+    path = str(tmp_path / 'canonical_aliases.jsonl')
+    canonicalizer = URLCanonicalizer(path)
+    assert canonicalizer.learn('https://example.com/story?id=1', 'https://example.com/news/story') \
+        == 'https://example.com/news/story'
+    assert canonicalizer.canonicalize('http://www.example.com/story?id=1') == 'https://example.com/news/story'
+
+    # First declaration wins, self-references and cycles are ignored
+    assert canonicalizer.learn('https://example.com/story?id=1', 'https://example.com/other') is None
+    assert canonicalizer.learn('https://example.com/page', 'https://example.com/page/') is None
+    assert canonicalizer.learn('https://example.com/news/story', 'https://example.com/story?id=1') is None
+
+    reloaded = URLCanonicalizer(path)
+    assert reloaded.canonicalize('https://example.com/story?id=1') == 'https://example.com/news/story'
+
+
+def test_alias_file_records_original_urls(tmp_path):
+    path = tmp_path / 'canonical_aliases.jsonl'
+    URLCanonicalizer(str(path)).learn('http://www.example.com/story/?id=1&utm_source=x',
+                                      'https://example.com/news/story/')
+    assert json.loads(path.read_text()) == {
+        'url': 'https://example.com/story?id=1', 'canonical': 'https://example.com/news/story',
+        'source_url': 'http://www.example.com/story/?id=1&utm_source=x',
+        'declared_url': 'https://example.com/news/story/'}
+
+
+def test_torn_alias_line_is_skipped(tmp_path):
+    path = tmp_path / 'canonical_aliases.jsonl'
+    path.write_text('{"url": "https://example.com/a", "canonical": "https://example.com/b"}\n{"url": "ht')
+    assert URLCanonicalizer(str(path)).canonicalize('https://example.com/a') == 'https://example.com/b'
@@ -0,0 +1,48 @@
+"""URLQueueManager duplicate checks on canonical URLs."""
+
+import logging
+from datetime import datetime, timedelta
+
+import pytest
+
+from queue_backends import create_backend
+from url_canonical import URLCanonicalizer
+from url_queue import URLQueueManager
+
+
+@pytest.fixture(params=['json', 'journal', 'sqlite'])
+def manager(request, tmp_path):
+    # Built around a temporary queue directory instead of search/queue
+    manager = URLQueueManager.__new__(URLQueueManager)
+    manager.logger = logging.getLogger('test_url_queue')
+    manager.queue_dir = str(tmp_path)
+    manager.backend = create_backend(request.param, str(tmp_path), manager.logger)
+    manager.canonicalizer = URLCanonicalizer(str(tmp_path / 'canonical_aliases.jsonl'))
+    manager.worker_id = 'test-worker'
+    manager.lease_seconds = 60
+    manager.max_per_host = 0
+    yield manager
+    manager.close()
+
+
+def _results(*urls):
+    return {"urls": [{"url": url, "priority_score": 1.0} for url in urls]}
+
+
+def test_rolled_back_urls_are_not_queued(manager):
+    with pytest.raises(RuntimeError):
+        with manager.backend.transaction():
+            manager.add_search_results(_results("https://example.com/a"), search_term="test")
+            raise RuntimeError("ingest failed")
+    assert not manager.backend.contains("https://example.com/a")
+    assert manager.add_search_results(_results("https://example.com/a"), search_term="test") == 1
+
+
+def test_canonical_variants_are_duplicates_until_cleaned_up(manager):
+    assert manager.add_search_results(_results("https://example.com/a"), search_term="test") == 1
+    assert manager.add_search_results(_results("http://www.example.com/a/"), search_term="test") == 0
+
+    [url] = manager.get_next_urls(1)
+    manager.mark_url_status(url, "completed")
+    manager.backend.remove_completed(datetime.now() + timedelta(days=1))
+    assert manager.add_search_results(_results("https://example.com/a"), search_term="test") == 1